@@ -159,3 +159,9 @@ class PulpAppConfig(PulpPluginAppConfig):
     # with manage.py, etc. This cannot contain a dot and must not conflict with the name of a
     # package containing a Django app.
     label = 'core'
+
+    def ready(self):
+        super().ready()
+        # connect the signal receivers notifying content apps about changes
+        from pulpcore.app import signals
+        signals.connect_receivers()
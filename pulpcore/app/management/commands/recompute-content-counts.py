@@ -0,0 +1,42 @@
+from gettext import gettext as _
+
+from django.core.management import BaseCommand, CommandError
+
+from pulpcore.app.models import Repository, RepositoryVersion
+
+
+class Command(BaseCommand):
+    """
+    Django management command for computing the content counts of repository versions.
+    """
+    help = _('Computes the content counts of repository versions from their whole content, e.g. '
+             'to backfill or repair them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repository',
+                            dest='repository',
+                            default=None,
+                            help=_('Only compute the counts of the versions of the repository '
+                                   'with this name.'))
+        parser.add_argument('--missing',
+                            action='store_true',
+                            dest='missing',
+                            default=False,
+                            help=_('Only compute the counts of the versions without any count.'))
+
+    def handle(self, *args, **options):
+        versions = RepositoryVersion.objects.filter(complete=True)
+        if options['repository']:
+            try:
+                repository = Repository.objects.get(name=options['repository'])
+            except Repository.DoesNotExist:
+                raise CommandError(_('Repository "%s" does not exist.') % options['repository'])
+            versions = versions.filter(repository=repository)
+        if options['missing']:
+            versions = versions.filter(counts__isnull=True)
+
+        computed = 0
+        for version in versions.select_related('repository').order_by('repository', 'number'):
+            version._compute_counts(full=True)
+            computed += 1
+        self.stdout.write(_('Computed the content counts of %d repository versions.') % computed)
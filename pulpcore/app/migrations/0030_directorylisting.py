@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:51
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_export_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectoryListing',
+            fields=[
+                ('pulp_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('pulp_created', models.DateTimeField(auto_now_add=True)),
+                ('pulp_last_updated', models.DateTimeField(auto_now=True, null=True)),
+                ('path', models.TextField()),
+                ('entries', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('publication', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='directory_listings', to='core.Publication')),
+                ('repository_version', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='directory_listings', to='core.RepositoryVersion')),
+            ],
+            options={
+                'default_related_name': 'directory_listings',
+                'unique_together': {('publication', 'path'), ('repository_version', 'path')},
+            },
+        ),
+    ]
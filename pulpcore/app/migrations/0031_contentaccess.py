@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_directorylisting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentAccess',
+            fields=[
+                ('pulp_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('pulp_created', models.DateTimeField(auto_now_add=True)),
+                ('pulp_last_updated', models.DateTimeField(auto_now=True, null=True)),
+                ('relative_path', models.TextField()),
+                ('hits', models.BigIntegerField(default=0)),
+                ('pull_through_hits', models.BigIntegerField(default=0)),
+                ('last_accessed', models.DateTimeField()),
+                ('distribution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accesses', to='core.BaseDistribution')),
+            ],
+            options={
+                'default_related_name': 'accesses',
+                'unique_together': {('distribution', 'relative_path')},
+            },
+        ),
+    ]
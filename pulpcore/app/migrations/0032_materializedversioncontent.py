@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_contentaccess'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositoryversion',
+            name='materialized',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='MaterializedVersionContent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.Content')),
+                ('repository_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='materialized_content', to='core.RepositoryVersion')),
+            ],
+            options={
+                'unique_together': {('repository_version', 'content')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_materializedversioncontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='retain_repo_versions',
+            field=models.PositiveIntegerField(null=True),
+        ),
+    ]
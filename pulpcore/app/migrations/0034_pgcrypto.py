@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_repository_retain_repo_versions'),
+    ]
+
+    operations = [
+        # gen_random_uuid() generates the primary keys of rows inserted in SQL. It is built into
+        # PostgreSQL 13 and later, and provided by the pgcrypto extension before.
+        migrations.RunSQL(
+            sql="""
+                DO $$
+                BEGIN
+                    IF current_setting('server_version_num')::integer < 130000 THEN
+                        CREATE EXTENSION IF NOT EXISTS pgcrypto;
+                    END IF;
+                END
+                $$;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
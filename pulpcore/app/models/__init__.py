@@ -26,6 +26,7 @@ from .importer import (  # noqa
 )
 from .publication import (  # noqa
     BaseDistribution,
+    ContentAccess,
     ContentGuard,
     Publication,
     PublicationDistribution,
@@ -34,6 +35,8 @@ from .publication import (  # noqa
     RepositoryVersionDistribution,
 )
 from .repository import (  # noqa
+    DirectoryListing,
+    MaterializedVersionContent,
     Remote,
     Repository,
     RepositoryContent,
@@ -1,11 +1,22 @@
-from django.db import IntegrityError, models, transaction
+from contextlib import suppress
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, connection, models, transaction
+from django.utils import timezone
 
 from .base import MasterModel, BaseModel
 from .content import Artifact, Content, ContentArtifact
-from .repository import Remote, Repository, RepositoryVersion
+from .repository import DirectoryListing, Remote, Repository, RepositoryVersion
 from .task import CreatedResource
 from pulpcore.app.files import PulpTemporaryUploadedFile
 
+# The lookups from BaseDistribution to the repository versions served by its detail models, found
+# by BaseDistribution.serving() once all the models are loaded.
+_serving_lookups = None
+
 
 class Publication(MasterModel):
     """
@@ -113,6 +124,20 @@ class Publication(MasterModel):
         """
         pass
 
+    def _compute_directory_listings(self):
+        """
+        Compute and save the listings of the directories served from this publication.
+
+        Listings are stored as :class:`~pulpcore.app.models.DirectoryListing` and include the
+        content of the repository version when the publication is `pass_through`.
+        """
+        relative_paths = self.published_artifact.values_list('relative_path', flat=True)
+        if self.pass_through:
+            relative_paths = relative_paths.union(ContentArtifact.objects.filter(
+                content__in=self.repository_version.content
+            ).values_list('relative_path', flat=True))
+        DirectoryListing.create_from_relative_paths(relative_paths.iterator(), publication=self)
+
     def __enter__(self):
         """
         Enter context.
@@ -136,6 +161,7 @@ class Publication(MasterModel):
         else:
             try:
                 self.finalize_new_publication()
+                self._compute_directory_listings()
                 self.complete = True
                 self.save()
             except Exception:
@@ -259,6 +285,26 @@ class ContentGuard(MasterModel):
         """
         raise NotImplementedError()
 
+    def permit_cache_key(self, request):
+        """
+        Get the key the decision of :meth:`permit` for a request can be cached with.
+
+        The content app calls :meth:`permit` once per key and lifetime, and reuses its decision,
+        allowed or denied, for all the requests to the same distribution with the same key. The key
+        must therefore be derived from everything :meth:`permit` bases its decision on, e.g. a
+        client certificate fingerprint or a token.
+
+        Guards are not cached by default, so this returns None. Override it to opt in.
+
+        Args:
+            request (aiohttp.web.Request): A request for a published file.
+
+        Returns:
+            tuple: The (key, lifetime) of the decision, where key is a hashable and lifetime is a
+                number of seconds, or None if the decision must not be cached.
+        """
+        return None
+
 
 class BaseDistribution(MasterModel):
     """
@@ -289,6 +335,84 @@ class BaseDistribution(MasterModel):
     content_guard = models.ForeignKey(ContentGuard, null=True, on_delete=models.SET_NULL)
     remote = models.ForeignKey(Remote, null=True, on_delete=models.SET_NULL)
 
+    @classmethod
+    def serving(cls, repository_version):
+        """
+        Find the distributions serving a repository version, or a publication of it.
+
+        Args:
+            repository_version (pulpcore.app.models.RepositoryVersion): The repository version.
+
+        Returns:
+            django.db.models.QuerySet: The distributions, queried with a single query.
+        """
+        global _serving_lookups
+        if _serving_lookups is None:
+            _serving_lookups = []
+            for model in apps.get_models():
+                if not issubclass(model, cls) or model is cls:
+                    continue
+                parents = [parent for parent in reversed(model._meta.get_parent_list())
+                           if issubclass(parent, cls) and parent is not cls]
+                path = '__'.join(m._meta.model_name for m in parents + [model])
+                for name, lookup in (('repository_version', '__repository_version'),
+                                     ('publication', '__publication__repository_version')):
+                    with suppress(FieldDoesNotExist):
+                        if model._meta.get_field(name).model is model:
+                            _serving_lookups.append(path + lookup)
+
+        query = models.Q()
+        for lookup in _serving_lookups:
+            query |= models.Q(**{lookup: repository_version})
+        if not query:
+            return cls.objects.none()
+        return cls.objects.filter(query)
+
+    def _served_repository_version(self):
+        """
+        Returns:
+            pulpcore.app.models.RepositoryVersion: The repository version served by the
+                distribution, directly or through a publication, if any.
+        """
+        publication = getattr(self, 'publication', None)
+        if publication:
+            return publication.repository_version
+        return getattr(self, 'repository_version', None)
+
+    def save(self, *args, **kwargs):
+        """
+        Save the distribution, and prepare the repository version it serves, if any.
+
+        The directories served by the version are listed if they were not, since only the latest
+        version of a repository keeps its listings once it is no longer distributed, and its
+        content is materialized. The version served before is released if nothing else
+        distributes it.
+        """
+        previous = None
+        if not self._state.adding:
+            with suppress(type(self).DoesNotExist):
+                previous = type(self).objects.get(pk=self.pk)._served_repository_version()
+        super().save(*args, **kwargs)
+        direct_version = getattr(self, 'repository_version', None)
+        if direct_version and not direct_version.directory_listings.filter(path='').exists():
+            direct_version._compute_directory_listings()
+        repository_version = self._served_repository_version()
+        if repository_version and settings.MATERIALIZE_REPOSITORY_VERSION_CONTENT:
+            repository_version.materialize_content()
+        if previous and previous != repository_version:
+            previous._release_if_undistributed()
+
+    def delete(self, **kwargs):
+        """
+        Delete the distribution, and release the repository version it served if nothing else
+        distributes it.
+        """
+        repository_version = self._served_repository_version()
+        with transaction.atomic():
+            super().delete(**kwargs)
+            if repository_version:
+                repository_version._release_if_undistributed()
+
 
 class PublicationDistribution(BaseDistribution):
     """
@@ -321,3 +445,62 @@ class RepositoryVersionDistribution(BaseDistribution):
 
     class Meta:
         abstract = True
+
+
+class ContentAccess(BaseModel):
+    """
+    The number of requests the content app served for a path of a distribution.
+
+    Counts are aggregated by the content app and written in batches, see the
+    ``CONTENT_APP_ACCESS_STATISTICS_INTERVAL`` setting.
+
+    Fields:
+        relative_path (models.TextField): The requested path, relative to the distribution.
+        hits (models.BigIntegerField): The number of successful requests.
+        pull_through_hits (models.BigIntegerField): The number of those requests served by
+            downloading the content from the remote.
+        last_accessed (models.DateTimeField): The time of the last write of counts for the path.
+
+    Relations:
+        distribution (models.ForeignKey): The distribution the path was requested from.
+    """
+    relative_path = models.TextField()
+    hits = models.BigIntegerField(default=0)
+    pull_through_hits = models.BigIntegerField(default=0)
+    last_accessed = models.DateTimeField()
+
+    distribution = models.ForeignKey(BaseDistribution, on_delete=models.CASCADE)
+
+    class Meta:
+        default_related_name = 'accesses'
+        unique_together = (
+            ('distribution', 'relative_path'),
+        )
+
+    @classmethod
+    def add_counts(cls, counts):
+        """
+        Add request counts to the counts stored, creating the missing rows.
+
+        Args:
+            counts (dict): The (hits, pull_through_hits) counts to add, keyed on
+                (distribution id, relative path).
+        """
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO {table} (pulp_id, pulp_created, pulp_last_updated, distribution_id, '
+                'relative_path, hits, pull_through_hits, last_accessed) '
+                'VALUES (%s, %s, %s, %s, %s, %s, %s, %s) '
+                'ON CONFLICT (distribution_id, relative_path) DO UPDATE SET '
+                'hits = {table}.hits + EXCLUDED.hits, '
+                'pull_through_hits = {table}.pull_through_hits + EXCLUDED.pull_through_hits, '
+                'pulp_last_updated = EXCLUDED.pulp_last_updated, '
+                'last_accessed = EXCLUDED.last_accessed'.format(table=cls._meta.db_table),
+                [
+                    (uuid.uuid4(), now, now, distribution_id, relative_path, hits,
+                     pull_through_hits, now)
+                    for (distribution_id, relative_path), (hits, pull_through_hits)
+                    in counts.items()
+                ]
+            )
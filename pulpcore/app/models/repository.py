@@ -3,11 +3,16 @@ Repository related Django models.
 """
 from contextlib import suppress
 from gettext import gettext as _
+from itertools import chain
 from os import path
 import logging
 
 import django
-from django.db import models, transaction
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, models, transaction
+from django.db.models.expressions import RawSQL
 from django.urls import reverse
 
 from pulpcore.app.util import batch_qs, get_view_name_for_model
@@ -15,7 +20,7 @@ from pulpcore.download.factory import DownloaderFactory
 from pulpcore.exceptions import ResourceImmutableError
 
 from .base import MasterModel, BaseModel
-from .content import Artifact, Content
+from .content import Artifact, Content, ContentArtifact
 from .task import CreatedResource, Task
 
 
@@ -32,6 +37,9 @@ class Repository(MasterModel):
         description (models.TextField): An optional description.
         next_version (models.PositiveIntegerField): A record of the next version number to be
             created.
+        retain_repo_versions (models.PositiveIntegerField): The number of complete versions to
+            keep. Older versions are deleted whenever a new version is completed. All versions
+            are kept if null.
 
     Relations:
 
@@ -43,6 +51,7 @@ class Repository(MasterModel):
     name = models.TextField(db_index=True, unique=True)
     description = models.TextField(null=True)
     next_version = models.PositiveIntegerField(default=0)
+    retain_repo_versions = models.PositiveIntegerField(null=True)
     content = models.ManyToManyField('Content', through='RepositoryContent',
                                      related_name='repositories')
 
@@ -145,6 +154,107 @@ class Repository(MasterModel):
             model = self.versions.exclude(complete=False).latest()
             return model
 
+    def prune_versions(self, retain=None):
+        """
+        Delete the complete versions older than the latest `retain` ones.
+
+        The changes of all the deleted versions are squashed into the oldest version kept at once,
+        see :meth:`squash_versions`.
+
+        Pruning should be done in a RQ Job.
+
+        Args:
+            retain (int): The number of complete versions to keep. Defaults to
+                `retain_repo_versions`. Nothing is deleted if None.
+
+        Returns:
+            int: The number of versions deleted.
+        """
+        if retain is None:
+            retain = self.retain_repo_versions
+        if not retain:
+            return 0
+        kept = self.versions.exclude(complete=False).order_by('-number')[retain - 1:retain]
+        try:
+            oldest_kept = kept.get()
+        except RepositoryVersion.DoesNotExist:
+            return 0
+        versions = self.versions.exclude(complete=False).filter(number__lt=oldest_kept.number)
+        return self.squash_versions(versions, oldest_kept)
+
+    def squash_versions(self, versions, next_version):
+        """
+        Delete consecutive complete versions by squashing their changes into the next version.
+
+        The RepositoryContent of all the versions are rewritten with a few statements, instead of
+        once for every deleted version like :meth:`RepositoryVersion.delete` does, so the content
+        of every remaining version stays the same.
+
+        Args:
+            versions (django.db.models.QuerySet): The consecutive complete RepositoryVersions to
+                delete.
+            next_version (pulpcore.app.models.RepositoryVersion): The complete version following
+                them, which receives their changes.
+
+        Returns:
+            int: The number of versions deleted.
+        """
+        squashed = list(versions.values_list('pk', flat=True))
+        if not squashed:
+            return 0
+        through = squashed + [next_version.pk]
+        table = RepositoryContent._meta.db_table
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Content removed by the squashed versions and added back by them or by the next
+            # version is kept in the relation which added it first. The relations adding it back
+            # are deleted first, since the removal they carry would collide with the one of the
+            # relation kept.
+            cursor.execute(
+                'DELETE FROM {table} WHERE repository_id = %s AND version_added_id = ANY(%s) '
+                'AND (version_removed_id IS NULL OR NOT version_removed_id = ANY(%s)) '
+                'AND content_id IN (SELECT content_id FROM {table} WHERE repository_id = %s '
+                'AND version_removed_id = ANY(%s) AND NOT version_added_id = ANY(%s)) '
+                'RETURNING content_id, version_removed_id'.format(table=table),
+                [self.pk, through, through, self.pk, squashed, squashed]
+            )
+            readded = cursor.fetchall()
+            if readded:
+                content_ids, removed_ids = zip(*readded)
+                cursor.execute(
+                    'UPDATE {table} SET version_removed_id = readded.version_removed_id '
+                    'FROM unnest(%s::uuid[], %s::uuid[]) '
+                    'AS readded (content_id, version_removed_id) '
+                    'WHERE {table}.repository_id = %s '
+                    'AND {table}.content_id = readded.content_id '
+                    'AND {table}.version_removed_id = ANY(%s) '
+                    'AND NOT {table}.version_added_id = ANY(%s)'.format(table=table),
+                    [list(content_ids), list(removed_ids), self.pk, squashed, squashed]
+                )
+
+            # Content added and removed again before the next version is gone.
+            cursor.execute(
+                'DELETE FROM {table} WHERE repository_id = %s AND version_added_id = ANY(%s) '
+                'AND version_removed_id = ANY(%s)'.format(table=table),
+                [self.pk, squashed, through]
+            )
+
+            # Other additions and removals are moved forward to the next version.
+            cursor.execute(
+                'UPDATE {table} SET version_added_id = %s WHERE repository_id = %s '
+                'AND version_added_id = ANY(%s)'.format(table=table),
+                [next_version.pk, self.pk, squashed]
+            )
+            cursor.execute(
+                'UPDATE {table} SET version_removed_id = %s WHERE repository_id = %s '
+                'AND version_removed_id = ANY(%s)'.format(table=table),
+                [next_version.pk, self.pk, squashed]
+            )
+
+            RepositoryVersion.objects.filter(pk__in=squashed).delete()
+            next_version._compute_counts()
+        return len(squashed)
+
     def natural_key(self):
         """
         Get the model's natural key.
@@ -378,6 +488,8 @@ class RepositoryVersion(BaseModel):
         action  (models.TextField): The action that produced the version.
         complete (models.BooleanField): If true, the RepositoryVersion is visible. This field is set
             to true when the task that creates the RepositoryVersion is complete.
+        materialized (models.BooleanField): If true, the content of the RepositoryVersion is
+            stored as :class:`~pulpcore.app.models.MaterializedVersionContent`.
 
     Relations:
 
@@ -386,6 +498,7 @@ class RepositoryVersion(BaseModel):
     repository = models.ForeignKey(Repository, on_delete=models.CASCADE)
     number = models.PositiveIntegerField(db_index=True)
     complete = models.BooleanField(db_index=True, default=False)
+    materialized = models.BooleanField(default=False)
     base_version = models.ForeignKey('RepositoryVersion', null=True,
                                      on_delete=models.SET_NULL)
 
@@ -406,6 +519,22 @@ class RepositoryVersion(BaseModel):
             repository=self.repository, version_added__number__lte=self.number
         ).exclude(version_removed__number__lte=self.number)
 
+    def _content_filter(self):
+        """
+        Returns the filter restricting a Content queryset to the content of this version.
+
+        The content of a materialized version is looked up by version in its
+        :class:`~pulpcore.app.models.MaterializedVersionContent`, instead of scanning the
+        repository_content of the repository for the range of versions containing it.
+
+        Returns:
+            django.db.models.Q: The filter.
+        """
+        if self.materialized:
+            return models.Q(pk__in=MaterializedVersionContent.objects.filter(
+                repository_version=self).values('content_id'))
+        return models.Q(version_memberships__in=self._content_relationships())
+
     @property
     def content(self):
         """
@@ -425,7 +554,7 @@ class RepositoryVersion(BaseModel):
             >>>     ...
             >>>
         """
-        return Content.objects.filter(version_memberships__in=self._content_relationships())
+        return Content.objects.filter(self._content_filter())
 
     def content_batch_qs(self, content_qs=None, order_by_params=("pk",), batch_size=1000):
         """
@@ -441,8 +570,9 @@ class RepositoryVersion(BaseModel):
             * This generator is not safe against changes (i.e. add/remove content) during
               the iteration!
 
-            * As the method uses slices internally, the queryset must be ordered to yield
-              stable results. By default, it is ordered by primary key.
+            * Batches are paginated by keyset with :func:`~pulpcore.app.util.batch_qs`, so the
+              ordering fields must not be null. The ordering is completed with the primary key to
+              yield stable results. By default, it is ordered by primary key.
 
         Args:
             content_qs (:class:`django.db.models.QuerySet`): The queryset for Content that will be
@@ -481,7 +611,7 @@ class RepositoryVersion(BaseModel):
         if content_qs is None:
             content_qs = Content.objects
         version_content_qs = content_qs.filter(
-            version_memberships__in=self._content_relationships()
+            self._content_filter()
         ).order_by(*order_by_params)
         yield from batch_qs(version_content_qs, batch_size=batch_size)
 
@@ -506,11 +636,8 @@ class RepositoryVersion(BaseModel):
         if not base_version:
             return Content.objects.filter(version_memberships__version_added=self)
 
-        return Content.objects.filter(
-            version_memberships__in=self._content_relationships()
-        ).exclude(
-            version_memberships__in=base_version._content_relationships()
-        )
+        return Content.objects.filter(pk__in=RawSQL(
+            *self._content_ids_difference_sql(base_version)))
 
     def removed(self, base_version=None):
         """
@@ -523,11 +650,96 @@ class RepositoryVersion(BaseModel):
         if not base_version:
             return Content.objects.filter(version_memberships__version_removed=self)
 
-        return Content.objects.filter(
-            version_memberships__in=base_version._content_relationships()
-        ).exclude(
-            version_memberships__in=self._content_relationships()
+        return Content.objects.filter(pk__in=RawSQL(
+            *base_version._content_ids_difference_sql(self)))
+
+    def _content_ids_sql(self, after=None):
+        """
+        Returns the SQL selecting the content_id of the content of this version.
+
+        Args:
+            after (uuid.UUID): Only select the ids greater than this one, if not None.
+
+        Returns:
+            tuple: The SQL and its parameters.
+        """
+        if self.materialized:
+            sql = 'SELECT content_id FROM {table} WHERE repository_version_id = %s'.format(
+                table=MaterializedVersionContent._meta.db_table)
+            params = [self.pk]
+        else:
+            sql, params = self._content_relationships().values('content_id').query.sql_with_params()
+            params = list(params)
+        if after is not None:
+            sql = 'SELECT content_id FROM ({sql}) AS version_content WHERE content_id > %s'.format(
+                sql=sql)
+            params.append(after)
+        return sql, params
+
+    def _content_ids_difference_sql(self, other):
+        """
+        Returns the SQL selecting the content_id of the content of this version not in `other`.
+
+        Both sets of content are compared with one anti-join, instead of excluding the content of
+        `other` for every content unit of this version.
+
+        Returns:
+            tuple: The SQL and its parameters.
+        """
+        sql, params = self._content_ids_sql()
+        other_sql, other_params = other._content_ids_sql()
+        return (
+            'SELECT content_id FROM ({sql}) AS version_content WHERE NOT EXISTS '
+            '(SELECT 1 FROM ({other_sql}) AS other_content '
+            'WHERE other_content.content_id = version_content.content_id)'.format(
+                sql=sql, other_sql=other_sql),
+            params + other_params
+        )
+
+    def diff(self, base_version, pulp_type=None, after=None, limit=None):
+        """
+        Compare the content of this version to the content of another version.
+
+        Both sets of content are compared with a single full outer join in the database, using the
+        materialized content of the versions when available. Results are ordered by content id, so
+        the difference of versions of any size can be read page by page with `after` and `limit`.
+
+        Args:
+            base_version (pulpcore.app.models.RepositoryVersion): The version to compare to, of
+                any repository.
+            pulp_type (str): Only compare the content of this type, if not None.
+            after (uuid.UUID): Only return the content with a greater id, if not None.
+            limit (int): The maximum number of content units returned, if not None.
+
+        Returns:
+            list: The (content id, pulp type, added) tuples of the content in only one of the
+                versions, where `added` is True for the content only in this version and False
+                for the content only in `base_version`.
+        """
+        sql, params = self._content_ids_sql(after)
+        base_sql, base_params = base_version._content_ids_sql(after)
+        params = params + base_params
+        where = ''
+        if pulp_type is not None:
+            where = 'WHERE content.pulp_type = %s '
+            params.append(pulp_type)
+        sql = (
+            'SELECT difference.content_id, content.pulp_type, difference.added FROM '
+            '(SELECT coalesce(version_content.content_id, base_content.content_id) AS content_id, '
+            'base_content.content_id IS NULL AS added '
+            'FROM ({sql}) AS version_content FULL OUTER JOIN ({base_sql}) AS base_content '
+            'ON version_content.content_id = base_content.content_id '
+            'WHERE version_content.content_id IS NULL OR base_content.content_id IS NULL) '
+            'AS difference JOIN {table} AS content ON content.pulp_id = difference.content_id '
+            '{where}ORDER BY difference.content_id'.format(
+                sql=sql, base_sql=base_sql, table=Content._meta.db_table, where=where)
         )
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
 
     def contains(self, content):
         """
@@ -542,6 +754,9 @@ class RepositoryVersion(BaseModel):
         """
         Add a content unit to this version.
 
+        The content is added with a few statements run by the database, so the memory used does
+        not depend on the amount of content added.
+
         Args:
            content (django.db.models.QuerySet): Set of Content to add
 
@@ -553,36 +768,38 @@ class RepositoryVersion(BaseModel):
         if self.complete:
             raise ResourceImmutableError(self)
 
-        repo_content = []
-        to_add = set(content.exclude(pk__in=self.content).values_list('pk', flat=True))
-
         # Normalize representation if content has already been removed in this version and
         # is re-added: Undo removal by setting version_removed to None.
-        for removed in batch_qs(self.removed().order_by('pk').values_list('pk', flat=True)):
-            to_readd = to_add.intersection(set(removed))
-            if to_readd:
-                RepositoryContent.objects.filter(
-                    content__in=to_readd,
-                    repository=self.repository,
-                    version_removed=self
-                ).update(version_removed=None)
-                to_add = to_add - to_readd
-
-        for content_pk in to_add:
-            repo_content.append(
-                RepositoryContent(
-                    repository=self.repository,
-                    content_id=content_pk,
-                    version_added=self
-                )
-            )
+        RepositoryContent.objects.filter(
+            repository=self.repository,
+            content__in=content,
+            version_removed=self
+        ).update(version_removed=None)
 
-        RepositoryContent.objects.bulk_create(repo_content)
+        to_add = content.exclude(pk__in=self.content).order_by().values('pk').distinct()
+        try:
+            sql, params = to_add.query.sql_with_params()
+        except EmptyResultSet:
+            # e.g. filtered on an empty list of primary keys
+            return
+        with connection.cursor() as cursor:
+            # gen_random_uuid() is provided by the pgcrypto extension, see the migrations.
+            cursor.execute(
+                'INSERT INTO {table} (pulp_id, pulp_created, pulp_last_updated, repository_id, '
+                'version_added_id, content_id) '
+                'SELECT gen_random_uuid(), now(), now(), %s, %s, content_id '
+                'FROM ({sql}) AS to_add (content_id)'.format(
+                    table=RepositoryContent._meta.db_table, sql=sql),
+                [self.repository_id, self.pk, *params]
+            )
 
     def remove_content(self, content):
         """
         Remove content from the repository.
 
+        The content is removed with a few statements run by the database, so the memory used does
+        not depend on the amount of content removed.
+
         Args:
             content (django.db.models.QuerySet): Set of Content to remove
 
@@ -594,7 +811,7 @@ class RepositoryVersion(BaseModel):
         if self.complete:
             raise ResourceImmutableError(self)
 
-        if not content or not content.count():
+        if content is None:
             return
 
         # Normalize representation if content has already been added in this version.
@@ -717,35 +934,175 @@ class RepositoryVersion(BaseModel):
                 CreatedResource.objects.filter(object_id=self.pk).delete()
                 super().delete(**kwargs)
 
-    def _compute_counts(self):
+    def _compute_counts(self, full=False):
         """
         Compute and save content unit counts by type.
 
         Count records are stored as :class:`~pulpcore.app.models.RepositoryVersionContentDetails`.
         This method deletes existing :class:`~pulpcore.app.models.RepositoryVersionContentDetails`
         objects and makes new ones with each call.
+
+        The present counts are derived from the present counts of the previous version and the
+        added and removed counts of this one, so only the content changed by this version is
+        counted. They are counted from the whole content of the version if `full` is True, or if
+        the counts of the previous version were never computed.
+
+        Args:
+            full (bool): Whether to count the present content from scratch, e.g. to repair
+                counts.
         """
-        with transaction.atomic():
-            counts_list = []
-            for value, name in RepositoryVersionContentDetails.COUNT_TYPE_CHOICES:
-                RepositoryVersionContentDetails.objects.filter(repository_version=self).delete()
-                if value == RepositoryVersionContentDetails.ADDED:
-                    qs = self.added()
-                elif value == RepositoryVersionContentDetails.PRESENT:
-                    qs = self.content
-                elif value == RepositoryVersionContentDetails.REMOVED:
-                    qs = self.removed()
-                annotated = qs.values('pulp_type').annotate(count=models.Count('pulp_type'))
-                for item in annotated:
-                    count_obj = RepositoryVersionContentDetails(
-                        content_type=item['pulp_type'],
+        def count_by_type(qs):
+            annotated = qs.values('pulp_type').annotate(count=models.Count('pulp_type'))
+            return {item['pulp_type']: item['count'] for item in annotated}
+
+        added = count_by_type(self.added())
+        removed = count_by_type(self.removed())
+        present = None if full else self._previous_present_counts()
+        if present is None:
+            present = count_by_type(self.content)
+        else:
+            for content_type, count in added.items():
+                present[content_type] = present.get(content_type, 0) + count
+            for content_type, count in removed.items():
+                present[content_type] = present.get(content_type, 0) - count
+
+        counts_list = []
+        for value, counts in ((RepositoryVersionContentDetails.ADDED, added),
+                              (RepositoryVersionContentDetails.PRESENT, present),
+                              (RepositoryVersionContentDetails.REMOVED, removed)):
+            for content_type, count in counts.items():
+                if count:
+                    counts_list.append(RepositoryVersionContentDetails(
+                        content_type=content_type,
                         repository_version=self,
-                        count=item['count'],
+                        count=count,
                         count_type=value,
-                    )
-                    counts_list.append(count_obj)
+                    ))
+        with transaction.atomic():
+            RepositoryVersionContentDetails.objects.filter(repository_version=self).delete()
             RepositoryVersionContentDetails.objects.bulk_create(counts_list)
 
+    def _previous_present_counts(self):
+        """
+        Returns:
+            dict: The present counts of the previous version keyed on content type, empty if there
+                is no previous version, or None if its counts were never computed.
+        """
+        try:
+            previous = self.previous()
+        except RepositoryVersion.DoesNotExist:
+            return {}
+        counts = previous.counts.values_list('count_type', 'content_type', 'count')
+        if not counts.exists():
+            # Versions without any count are empty, like the initial version, or were never
+            # counted.
+            return {} if not previous.content.exists() else None
+        return {
+            content_type: count for count_type, content_type, count in counts
+            if count_type == RepositoryVersionContentDetails.PRESENT
+        }
+
+    def _compute_directory_listings(self):
+        """
+        Compute and save the listings of the directories served from this version.
+
+        Listings are stored as :class:`~pulpcore.app.models.DirectoryListing`. They are derived
+        from the listings of the previous version and the paths this version added and removed, so
+        only the directories containing those paths are computed. All the paths of the version are
+        listed if the previous version has no listings.
+
+        The listings of the previous version are then deleted, unless a distribution serves it.
+        """
+        try:
+            previous = self.previous()
+        except RepositoryVersion.DoesNotExist:
+            previous = None
+        if previous is None or not previous.directory_listings.filter(path='').exists():
+            relative_paths = ContentArtifact.objects.filter(
+                content__in=self.content
+            ).values_list('relative_path', flat=True)
+            DirectoryListing.create_from_relative_paths(relative_paths.iterator(),
+                                                        repository_version=self)
+            return
+
+        def relative_paths(content, **kwargs):
+            return set(ContentArtifact.objects.filter(content__in=content, **kwargs).values_list(
+                'relative_path', flat=True))
+
+        added_paths = relative_paths(self.added())
+        removed_paths = relative_paths(self.removed())
+        if removed_paths:
+            # Paths of removed content are still served if other content has them.
+            removed_paths -= relative_paths(self.content, relative_path__in=removed_paths)
+        DirectoryListing.create_from_previous_version(
+            previous, self, added_paths, removed_paths, keep_previous=previous._is_distributed()
+        )
+
+    def _is_distributed(self):
+        """
+        Returns:
+            bool: True if a distribution serves this version, or a publication of it.
+        """
+        from .publication import BaseDistribution
+
+        return BaseDistribution.serving(self).exists()
+
+    def _release_if_undistributed(self):
+        """
+        Dematerialize this version and delete its directory listings, unless it is the latest
+        version of its repository or a distribution serves it.
+        """
+        if self == self.repository.latest_version() or self._is_distributed():
+            return
+        if self.materialized:
+            self.dematerialize_content()
+        self.directory_listings.all().delete()
+
+    def materialize_content(self):
+        """
+        Store the content of this version as
+        :class:`~pulpcore.app.models.MaterializedVersionContent`.
+
+        The content of complete versions never changes, so it is stored once and used by
+        :attr:`content` until :meth:`dematerialize_content` is called.
+        """
+        if self.materialized:
+            return
+        sql, params = self._content_relationships().values('content_id').query.sql_with_params()
+        with transaction.atomic():
+            MaterializedVersionContent.objects.filter(repository_version=self).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'INSERT INTO {table} (repository_version_id, content_id) '
+                    'SELECT %s, content_id FROM ({sql}) AS version_content'.format(
+                        table=MaterializedVersionContent._meta.db_table, sql=sql),
+                    [self.pk, *params]
+                )
+            self.materialized = True
+            self.save(update_fields=['materialized'])
+
+    def dematerialize_content(self):
+        """
+        Delete the :class:`~pulpcore.app.models.MaterializedVersionContent` of this version.
+        """
+        with transaction.atomic():
+            self.materialized = False
+            self.save(update_fields=['materialized'])
+            MaterializedVersionContent.objects.filter(repository_version=self).delete()
+
+    def _update_materialized_content(self):
+        """
+        Materialize this version, the latest one, and dematerialize the previous latest version if
+        nothing distributes it.
+        """
+        if not settings.MATERIALIZE_REPOSITORY_VERSION_CONTENT:
+            return
+        self.materialize_content()
+        with suppress(RepositoryVersion.DoesNotExist):
+            previous = self.previous()
+            if previous.materialized and not previous._is_distributed():
+                previous.dematerialize_content()
+
     def __enter__(self):
         """
         Create the repository version
@@ -769,8 +1126,9 @@ class RepositoryVersion(BaseModel):
                 if no_change:
                     self.delete()
                 else:
+                    # The content kept from the previous version was already checked.
                     content_types_seen = set(
-                        self.content.values_list('pulp_type', flat=True).distinct()
+                        self.added().values_list('pulp_type', flat=True).distinct()
                     )
                     content_types_supported = set(
                         ctype.get_pulp_type() for ctype in repository.CONTENT_TYPES
@@ -787,14 +1145,52 @@ class RepositoryVersion(BaseModel):
                     self.repository.save()
                     self.save()
                     self._compute_counts()
+                    self._compute_directory_listings()
+                    self._update_materialized_content()
             except Exception:
                 self.delete()
                 raise
+            if self.complete:
+                self._prune_repository_versions(repository)
+
+    def _prune_repository_versions(self, repository):
+        """
+        Delete the versions of the repository older than its `retain_repo_versions` latest ones.
+
+        This version is already saved, so failures are logged instead of failing its creation,
+        and the versions are pruned again when the next version is created.
+        """
+        try:
+            with transaction.atomic():
+                repository.prune_versions()
+        except Exception:
+            _logger.exception(_('Failed to prune the versions of repository {name}.').format(
+                name=repository.name))
 
     def __str__(self):
         return "<Repository: {}; Version: {}>".format(self.repository.name, self.number)
 
 
+class MaterializedVersionContent(models.Model):
+    """
+    The content of a materialized repository version.
+
+    Materialized versions are looked up by version instead of by range of versions, see the
+    ``MATERIALIZE_REPOSITORY_VERSION_CONTENT`` setting.
+
+    Relations:
+
+        repository_version (models.ForeignKey): The repository version.
+        content (models.ForeignKey): Content of the repository version.
+    """
+    repository_version = models.ForeignKey('RepositoryVersion', on_delete=models.CASCADE,
+                                           related_name='materialized_content')
+    content = models.ForeignKey('Content', on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ('repository_version', 'content')
+
+
 class RepositoryVersionContentDetails(models.Model):
     ADDED = 'A'
     PRESENT = 'P'
@@ -851,3 +1247,148 @@ class RepositoryVersionContentDetails(models.Model):
         full_url = partial_url_str.format(
             base=ctype_url, rv_href=rv_href)
         return full_url
+
+
+class DirectoryListing(BaseModel):
+    """
+    The entries of a directory served from a publication or a repository version.
+
+    Listings are computed once, when the publication or repository version is completed, so the
+    content app lists a directory with a single lookup instead of matching the relative path of
+    every file below it. The listings of a repository version are derived from the listings of the
+    previous version, which are then only kept if the previous version is distributed.
+
+    Fields:
+        path (models.TextField): The relative path of the directory with a trailing slash, or an
+            empty string for the root directory.
+        entries (ArrayField): The sorted names of the files and subdirectories of the directory.
+            Subdirectory names end with a slash.
+
+    Relations:
+        publication (models.ForeignKey): The publication serving the directory, if any.
+        repository_version (models.ForeignKey): The repository version serving the directory, if
+            any.
+    """
+    path = models.TextField()
+    entries = ArrayField(models.TextField())
+
+    publication = models.ForeignKey('Publication', null=True, on_delete=models.CASCADE)
+    repository_version = models.ForeignKey(RepositoryVersion, null=True, on_delete=models.CASCADE)
+
+    class Meta:
+        default_related_name = 'directory_listings'
+        unique_together = (
+            ('publication', 'path'),
+            ('repository_version', 'path'),
+        )
+
+    @staticmethod
+    def list_directories(relative_paths):
+        """
+        Group relative paths by directory.
+
+        Args:
+            relative_paths (iterable): The relative paths of the served files.
+
+        Returns:
+            dict: The entries of each directory keyed on its path. The root directory is always
+                present, even when there are no files.
+        """
+        directories = {'': set()}
+        for relative_path in relative_paths:
+            directory = ''
+            *names, filename = relative_path.split('/')
+            for name in names:
+                directories.setdefault(directory, set()).add(name + '/')
+                directory = directory + name + '/'
+            directories.setdefault(directory, set()).add(filename)
+        return directories
+
+    @classmethod
+    def create_from_previous_version(cls, previous_version, repository_version, added_paths,
+                                     removed_paths, keep_previous=True):
+        """
+        Derive the listings of a repository version from the listings of a previous version.
+
+        Only the listings of the directories containing added or removed paths are computed. The
+        other listings are copied by the database, or moved if the previous version does not keep
+        its listings.
+
+        Args:
+            previous_version (pulpcore.app.models.RepositoryVersion): The previous version, which
+                has listings.
+            repository_version (pulpcore.app.models.RepositoryVersion): The version to list.
+            added_paths (iterable): The relative paths served by `repository_version` and not by
+                `previous_version`.
+            removed_paths (iterable): The relative paths served by `previous_version` and not by
+                `repository_version`.
+            keep_previous (bool): Whether the listings of `previous_version` are kept.
+        """
+        directories = set()
+        for relative_path in chain(added_paths, removed_paths):
+            directory = ''
+            for name in relative_path.split('/')[:-1]:
+                directories.add(directory)
+                directory = directory + name + '/'
+            directories.add(directory)
+        listings = {directory: set() for directory in directories}
+        for path, entries in cls.objects.filter(
+            repository_version=previous_version, path__in=directories
+        ).values_list('path', 'entries'):
+            listings[path].update(entries)
+
+        for relative_path in removed_paths:
+            directory, _, filename = relative_path.rpartition('/')
+            listings[directory and directory + '/'].discard(filename)
+        for path, entries in cls.list_directories(added_paths).items():
+            if entries:
+                listings[path].update(entries)
+        # Remove the directories left empty from their parent, the deepest ones first.
+        for path in sorted(listings, key=lambda path: path.count('/'), reverse=True):
+            if path and not listings[path]:
+                parent, _, name = path[:-1].rpartition('/')
+                listings[parent and parent + '/'].discard(name + '/')
+
+        with transaction.atomic():
+            cls.objects.filter(repository_version=repository_version).delete()
+            unchanged = cls.objects.filter(repository_version=previous_version).exclude(
+                path__in=listings)
+            if keep_previous:
+                sql, params = unchanged.values('path', 'entries').query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'INSERT INTO {table} (pulp_id, pulp_created, pulp_last_updated, path, '
+                        'entries, repository_version_id) '
+                        'SELECT gen_random_uuid(), now(), now(), path, entries, %s '
+                        'FROM ({sql}) AS unchanged'.format(table=cls._meta.db_table, sql=sql),
+                        [repository_version.pk, *params]
+                    )
+            else:
+                unchanged.update(repository_version=repository_version)
+                cls.objects.filter(repository_version=previous_version).delete()
+            cls.objects.bulk_create((
+                cls(path=path, entries=sorted(entries), repository_version=repository_version)
+                for path, entries in listings.items() if entries or not path
+            ), batch_size=1000)
+
+    @classmethod
+    def create_from_relative_paths(cls, relative_paths, publication=None, repository_version=None):
+        """
+        Replace the listings of a publication or a repository version.
+
+        Args:
+            relative_paths (iterable): The relative paths of the served files.
+            publication (pulpcore.app.models.Publication): The publication serving the files.
+            repository_version (pulpcore.app.models.RepositoryVersion): The repository version
+                serving the files.
+        """
+        directories = cls.list_directories(relative_paths)
+        with transaction.atomic():
+            cls.objects.filter(
+                publication=publication, repository_version=repository_version
+            ).delete()
+            cls.objects.bulk_create((
+                cls(path=path, entries=sorted(entries), publication=publication,
+                    repository_version=repository_version)
+                for path, entries in directories.items()
+            ), batch_size=1000)
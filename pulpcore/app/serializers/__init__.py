@@ -55,6 +55,7 @@ from .progress import ProgressReportSerializer  # noqa
 from .publication import (  # noqa
     BaseDistributionSerializer,
     ContentGuardSerializer,
+    PrefetchSerializer,
     PublicationDistributionSerializer,
     PublicationSerializer,
     RepositoryVersionDistributionSerializer,
@@ -64,6 +65,9 @@ from .repository import (  # noqa
     RepositorySerializer,
     RepositorySyncURLSerializer,
     RepositoryAddRemoveContentSerializer,
+    RepositoryCopySerializer,
+    RepositoryPruneSerializer,
+    RepositoryVersionDiffSerializer,
     RepositoryVersionSerializer,
 )
 from .task import (  # noqa
@@ -4,13 +4,14 @@ from urllib.parse import urljoin
 from django.core.validators import URLValidator
 from drf_queryfields.mixins import QueryFieldsMixin
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from rest_framework_nested.relations import (
     NestedHyperlinkedIdentityField,
     NestedHyperlinkedRelatedField,
 )
 
 from pulpcore.app.models import Task
-from pulpcore.app.util import get_view_name_for_model
+from pulpcore.app.util import get_view_name_for_model, resolve_hrefs
 
 
 def validate_unknown_fields(initial_data, defined_fields):
@@ -172,7 +173,42 @@ class IdentityField(serializers.HyperlinkedIdentityField):
         return super().get_url(obj, view_name, request, *args, **kwargs)
 
 
-class RelatedField(serializers.HyperlinkedRelatedField):
+class _BulkManyRelatedField(serializers.ManyRelatedField):
+    """ManyRelatedField resolving all of its hrefs with one query per model
+
+    Child fields which override `get_object` resolve each href on their own, as usual.
+    """
+
+    def to_internal_value(self, data):
+        get_object = type(self.child_relation).get_object
+        if get_object not in (serializers.HyperlinkedRelatedField.get_object,
+                              DetailRelatedField.get_object):
+            return super().to_internal_value(data)
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        if isinstance(self.child_relation, DetailRelatedField):
+            # Like DetailRelatedField.get_object(), which casts the resources and matches any view.
+            return resolve_hrefs(data, self.child_relation.get_queryset(), objects=True,
+                                 cast=True)
+        return resolve_hrefs(data, self.child_relation.get_queryset(), objects=True,
+                             view_name=self.child_relation.view_name)
+
+
+class _BulkRelatedFieldMixin:
+    """Mixin class resolving the hrefs of `many=True` related fields in bulk"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return _BulkManyRelatedField(**list_kwargs)
+
+
+class RelatedField(_BulkRelatedFieldMixin, serializers.HyperlinkedRelatedField):
     """RelatedField when relating to non-Master/Detail models
 
     When using this field on a serializer, it will serialize the related resource as a relative URL.
@@ -195,7 +231,8 @@ class DetailIdentityField(_DetailFieldMixin, serializers.HyperlinkedIdentityFiel
     """
 
 
-class DetailRelatedField(_DetailFieldMixin, serializers.HyperlinkedRelatedField):
+class DetailRelatedField(_BulkRelatedFieldMixin, _DetailFieldMixin,
+                         serializers.HyperlinkedRelatedField):
     """RelatedField for use when relating to Master/Detail models
 
     When using this field on a Serializer, relate it to the Master model in a
@@ -214,3 +214,27 @@ class RepositoryVersionDistributionSerializer(BaseDistributionSerializer):
             raise serializers.ValidationError(msg)
 
         return data
+
+
+class PrefetchSerializer(serializers.Serializer):
+    """
+    A serializer for prefetching the most requested on-demand content.
+    """
+    count = serializers.IntegerField(
+        help_text=_('The maximum number of artifacts to download.'),
+        min_value=1,
+        default=100,
+    )
+    max_bytes = serializers.IntegerField(
+        help_text=_('The maximum number of bytes to download. Not limited if unset.'),
+        min_value=1,
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+    distributions = DetailRelatedField(
+        help_text=_('The distributions whose content is prefetched. All distributions if unset.'),
+        queryset=models.BaseDistribution.objects.all(),
+        many=True,
+        required=False,
+    )
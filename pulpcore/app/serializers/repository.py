@@ -1,6 +1,8 @@
 from gettext import gettext as _
 import os
 
+from django.core.exceptions import FieldError, ValidationError
+from django.db.models.constants import LOOKUP_SEP
 from rest_framework import fields, serializers
 from rest_framework.validators import UniqueValidator
 from rest_framework_nested.serializers import NestedHyperlinkedModelSerializer
@@ -17,6 +19,9 @@ from pulpcore.app.serializers import (
     RepositoryVersionsIdentityFromRepositoryField
 )
 
+#: The maximum number of content units listed in one page of a repository version diff.
+DIFF_MAX_LIMIT = 1000
+
 
 class RepositorySerializer(ModelSerializer):
     pulp_href = DetailIdentityField()
@@ -31,11 +36,18 @@ class RepositorySerializer(ModelSerializer):
         required=False,
         allow_null=True
     )
+    retain_repo_versions = serializers.IntegerField(
+        help_text=_('The number of complete versions to keep. Older versions are deleted '
+                    'whenever a new version is created. All versions are kept if null.'),
+        required=False,
+        allow_null=True,
+        min_value=1,
+    )
 
     class Meta:
         model = models.Repository
         fields = ModelSerializer.Meta.fields + ('versions_href', 'latest_version_href',
-                                                'name', 'description')
+                                                'name', 'description', 'retain_repo_versions')
 
 
 class RemoteSerializer(ModelSerializer):
@@ -168,6 +180,15 @@ class RepositorySyncURLSerializer(serializers.Serializer):
     )
 
 
+class RepositoryPruneSerializer(serializers.Serializer):
+    retain = serializers.IntegerField(
+        help_text=_('The number of complete versions to keep. Defaults to the '
+                    '`retain_repo_versions` of the repository.'),
+        required=False,
+        min_value=1,
+    )
+
+
 class ContentSummarySerializer(serializers.Serializer):
     """
     Serializer for the RepositoryVersion content summary
@@ -264,3 +285,84 @@ class RepositoryAddRemoveContentSerializer(ModelSerializer, NestedHyperlinkedMod
     class Meta:
         model = models.RepositoryVersion
         fields = ['add_content_units', 'remove_content_units', 'base_version']
+
+
+class RepositoryCopySerializer(ModelSerializer, NestedHyperlinkedModelSerializer):
+    source_version = RepositoryVersionRelatedField(
+        help_text=_('A repository version whose content will be copied to a new version of the '
+                    'repository.'),
+    )
+    content_filters = serializers.DictField(
+        child=serializers.DictField(),
+        help_text=_('An optional filter of the copied content for each content type, e.g. '
+                    '{"file.file": {"relative_path__startswith": "docs/"}}. Only the content of '
+                    'the types listed is copied, matching the lookups given for its type. All '
+                    'the content is copied if not specified.'),
+        write_only=True,
+        required=False,
+    )
+
+    def validate_content_filters(self, value):
+        """
+        Check that the destination repository supports every content type filtered, and that the
+        lookups only filter the fields of the content type.
+
+        The destination repository is expected in the `repository` key of the context.
+        """
+        repository = self.context['repository'].cast()
+        content_models = {
+            type_obj.get_pulp_type(): type_obj for type_obj in repository.CONTENT_TYPES
+        }
+        for pulp_type, lookups in value.items():
+            if pulp_type not in content_models:
+                raise serializers.ValidationError(
+                    _("Repository {repository} does not support content type {pulp_type}.").format(
+                        repository=repository.name, pulp_type=pulp_type))
+            content_model = content_models[pulp_type]
+            fields = {
+                field.name: field for field in content_model._meta.concrete_fields
+                if not field.is_relation
+            }
+            for lookup in lookups:
+                field_name, *lookup_names = lookup.split(LOOKUP_SEP)
+                if field_name not in fields or len(lookup_names) > 1 or (
+                        lookup_names and not fields[field_name].get_lookup(lookup_names[0])):
+                    raise serializers.ValidationError(
+                        _("Invalid filter for content type '{pulp_type}': '{lookup}' is not a "
+                          "field of the content type, with an optional lookup.").format(
+                              pulp_type=pulp_type, lookup=lookup))
+            try:
+                content_model.objects.filter(**lookups)
+            except (FieldError, ValidationError, ValueError) as e:
+                raise serializers.ValidationError(
+                    _("Invalid filter for content type '{pulp_type}': {error}").format(
+                        pulp_type=pulp_type, error=e))
+        return value
+
+    class Meta:
+        model = models.RepositoryVersion
+        fields = ['source_version', 'content_filters']
+
+
+class RepositoryVersionDiffSerializer(serializers.Serializer):
+    """
+    The query parameters of a diff between two repository versions.
+    """
+    base_version = RepositoryVersionRelatedField(
+        help_text=_('The repository version to compare to, of any repository.'),
+    )
+    pulp_type = serializers.CharField(
+        help_text=_('Only compare the content of this type, e.g. "file.file".'),
+        required=False,
+    )
+    after = serializers.UUIDField(
+        help_text=_('Only list the content with a greater id, as given in the "next" link.'),
+        required=False,
+    )
+    limit = serializers.IntegerField(
+        help_text=_('The maximum number of content units listed.'),
+        required=False,
+        min_value=1,
+        max_value=DIFF_MAX_LIMIT,
+        default=settings.REST_FRAMEWORK['PAGE_SIZE'],
+    )
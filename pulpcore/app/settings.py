@@ -206,6 +206,18 @@ LOGGING = {
 
 CONTENT_PATH_PREFIX = '/pulp/content/'
 CONTENT_APP_TTL = 30
+CONTENT_APP_WORKERS = 1
+CONTENT_APP_PATH_CACHE_SIZE = 10000
+CONTENT_APP_DB_POOL_SIZE = 10
+CONTENT_APP_VERSION_CACHE_SIZE = 100
+CONTENT_APP_PERMIT_CACHE_SIZE = 10000
+CONTENT_APP_SAVE_CONCURRENCY = 2
+CONTENT_APP_REDIRECT_CACHE_SIZE = 10000
+CONTENT_APP_REDIRECT_CACHE_FRACTION = 0.5
+CONTENT_APP_REDIRECT_STABLE_URLS = False
+CONTENT_APP_METRICS_PATH = None
+CONTENT_APP_ACCESS_STATISTICS_INTERVAL = None
+CONTENT_APP_CACHE_CONTROL = None
 
 REMOTE_USER_ENVIRON_NAME = "REMOTE_USER"
 
@@ -215,6 +227,8 @@ ALLOWED_EXPORT_PATHS = []
 
 PROFILE_STAGES_API = False
 
+MATERIALIZE_REPOSITORY_VERSION_CONTENT = False
+
 SWAGGER_SETTINGS = {
     'DEFAULT_GENERATOR_CLASS': 'pulpcore.app.openapigenerator.PulpOpenAPISchemaGenerator',
     'DEFAULT_AUTO_SCHEMA_CLASS': 'pulpcore.app.openapigenerator.PulpAutoSchema',
@@ -0,0 +1,78 @@
+"""
+Signal receivers telling running content apps about changes that affect their caches.
+"""
+from django.apps import apps
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+
+from pulpcore.app.models import (
+    BaseDistribution,
+    ContentGuard,
+    Publication,
+    Remote,
+    Repository,
+    RepositoryVersion,
+)
+
+#: The PostgreSQL channel content apps ``LISTEN`` on.
+CONTENT_APP_CHANNEL = 'pulp_content_app'
+
+# (model, kind, notify on save) for every model the content app caches something about. Deletes
+# always notify because ``on_delete=SET_NULL`` relations are updated without sending signals.
+CONTENT_APP_MODELS = (
+    (BaseDistribution, 'distribution', True),
+    (ContentGuard, 'contentguard', True),
+    (Publication, 'publication', False),
+    (Repository, 'repository', False),
+    (RepositoryVersion, 'repositoryversion', True),
+    (Remote, 'remote', False),
+)
+
+
+def notify_content_app(kind, pk):
+    """
+    Notify all content apps that an object they may have cached has changed.
+
+    The notification is sent with ``pg_notify`` so it is delivered when the current transaction
+    commits, and not at all if it rolls back.
+
+    Args:
+        kind (str): The kind of object that changed, e.g. 'distribution'.
+        pk (uuid.UUID): The primary key of the object that changed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)',
+                       [CONTENT_APP_CHANNEL, '{kind}:{pk}'.format(kind=kind, pk=pk)])
+
+
+#: The kind of object of every model connected by :func:`connect_receivers`.
+_model_kinds = {}
+
+
+def _notify_on_save(sender, instance, **kwargs):
+    notify_content_app(_model_kinds[sender], instance.pk)
+
+
+def _notify_on_delete(sender, instance, **kwargs):
+    notify_content_app(_model_kinds[sender], instance.pk)
+
+
+def connect_receivers():
+    """
+    Connect the receivers to the models the content app caches something about.
+
+    Receivers are connected to each concrete model with its own `sender`, so models the content
+    app does not care about have no delete receivers and keep Django's fast deletes. Called once
+    all the models are loaded, plugin models included.
+    """
+    for model in apps.get_models():
+        for base, kind, on_save in CONTENT_APP_MODELS:
+            if not issubclass(model, base):
+                continue
+            _model_kinds[model] = kind
+            if on_save:
+                post_save.connect(_notify_on_save, sender=model,
+                                  dispatch_uid='pulpcore_notify_content_app_save')
+            post_delete.connect(_notify_on_delete, sender=model,
+                                dispatch_uid='pulpcore_notify_content_app_delete')
+            break
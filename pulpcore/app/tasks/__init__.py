@@ -5,3 +5,5 @@ from .export import fs_publication_export, fs_repo_version_export  # noqa
 from .importer import pulp_import  # noqa
 
 from .orphan import orphan_cleanup  # noqa
+
+from .prefetch import prefetch_popular_content  # noqa
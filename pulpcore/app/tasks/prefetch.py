@@ -0,0 +1,193 @@
+import asyncio
+from collections import OrderedDict
+from gettext import gettext as _
+import logging
+
+from pulpcore.app.models import (
+    BaseDistribution,
+    ContentAccess,
+    ContentArtifact,
+    ProgressReport,
+    PublishedArtifact,
+    Remote,
+    RemoteArtifact,
+)
+from pulpcore.app.util import batch_qs, save_downloaded_artifact
+
+log = logging.getLogger(__name__)
+
+#: The number of access statistics rows resolved to content at once.
+ACCESS_BATCH_SIZE = 1000
+
+
+def prefetch_popular_content(count, max_bytes=None, distribution_pks=None):
+    """
+    Download the most requested on-demand content which is not stored yet.
+
+    The paths requested the most, according to the access statistics written by the content app,
+    are matched to the content currently served by their distribution, and the ContentArtifacts
+    without an Artifact are downloaded from their remote and saved, as if they were requested.
+    Remotes with the `streamed` policy are skipped, since their content is never stored.
+
+    Args:
+        count (int): The maximum number of ContentArtifacts to download.
+        max_bytes (int): The maximum number of bytes to download. Downloads of unknown size are
+            only started once the size of the downloads in progress is known. No limit if None.
+        distribution_pks (list): The primary keys of the distributions whose content is
+            prefetched. All distributions if None.
+    """
+    content_artifact_pks = _popular_content_artifacts(count, distribution_pks)
+    remote_artifacts = _remote_artifacts(content_artifact_pks)
+
+    with ProgressReport(message=_('Prefetching popular content'), code='prefetch.content',
+                        total=len(remote_artifacts)) as pb:
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(_download(remote_artifacts, max_bytes, pb))
+
+
+def _popular_content_artifacts(count, distribution_pks=None):
+    """
+    Find the ContentArtifacts without an Artifact served at the paths requested the most.
+
+    Args:
+        count (int): The maximum number of ContentArtifacts to find.
+        distribution_pks (list): The primary keys of the distributions to consider. All
+            distributions if None.
+
+    Returns:
+        list: The primary keys of the ContentArtifacts, the most requested first.
+    """
+    accesses = ContentAccess.objects.order_by('-hits', 'pk')
+    if distribution_pks is not None:
+        accesses = accesses.filter(distribution__in=distribution_pks)
+
+    distributions = {}
+    content_artifact_pks = OrderedDict()
+    for page in batch_qs(accesses, batch_size=ACCESS_BATCH_SIZE):
+        if len(content_artifact_pks) >= count:
+            break
+        batch = list(page.values_list('distribution_id', 'relative_path'))
+
+        paths = OrderedDict()
+        for distribution_id, relative_path in batch:
+            paths.setdefault(distribution_id, []).append(relative_path)
+        matches = {}
+        for distribution_id, relative_paths in paths.items():
+            if distribution_id not in distributions:
+                distributions[distribution_id] = BaseDistribution.objects.get(
+                    pk=distribution_id).cast()
+            for relative_path, pk in _match_paths(distributions[distribution_id],
+                                                  relative_paths):
+                matches.setdefault((distribution_id, relative_path), []).append(pk)
+
+        for key in batch:
+            for pk in matches.get(key, ()):
+                content_artifact_pks[pk] = None
+    return list(content_artifact_pks)[:count]
+
+
+def _match_paths(distribution, relative_paths):
+    """
+    Match paths of a distribution to the ContentArtifacts without an Artifact served there.
+
+    Args:
+        distribution (detail of :class:`~pulpcore.app.models.BaseDistribution`): The distribution.
+        relative_paths (list): The paths, relative to the distribution.
+
+    Returns:
+        list: The (relative path, ContentArtifact primary key) pairs matched.
+    """
+    matches = []
+    repository_version = None
+    publication = getattr(distribution, 'publication', None)
+    if publication:
+        matches.extend(PublishedArtifact.objects.filter(
+            publication=publication,
+            relative_path__in=relative_paths,
+            content_artifact__artifact__isnull=True,
+        ).values_list('relative_path', 'content_artifact_id'))
+        if publication.pass_through:
+            repository_version = publication.repository_version
+    elif getattr(distribution, 'repository', None):
+        repository_version = distribution.repository.latest_version()
+    else:
+        repository_version = getattr(distribution, 'repository_version', None)
+
+    if repository_version:
+        matches.extend(ContentArtifact.objects.filter(
+            content__in=repository_version.content,
+            relative_path__in=relative_paths,
+            artifact__isnull=True,
+        ).values_list('relative_path', 'pk'))
+    return matches
+
+
+def _remote_artifacts(content_artifact_pks):
+    """
+    Choose a RemoteArtifact to download each ContentArtifact from.
+
+    Args:
+        content_artifact_pks (list): The primary keys of the ContentArtifacts.
+
+    Returns:
+        list: The (RemoteArtifact, detail Remote) pairs, in the order of the ContentArtifacts.
+    """
+    remote_artifacts = {}
+    remotes = {}
+    for remote_artifact in RemoteArtifact.objects.filter(
+        content_artifact__in=content_artifact_pks,
+    ).exclude(remote__policy=Remote.STREAMED).select_related('remote').order_by('pulp_created'):
+        if remote_artifact.content_artifact_id not in remote_artifacts:
+            remote_artifacts[remote_artifact.content_artifact_id] = remote_artifact
+            if remote_artifact.remote_id not in remotes:
+                remotes[remote_artifact.remote_id] = remote_artifact.remote.cast()
+
+    return [
+        (remote_artifacts[pk], remotes[remote_artifacts[pk].remote_id])
+        for pk in content_artifact_pks if pk in remote_artifacts
+    ]
+
+
+async def _download(remote_artifacts, max_bytes, progress_report):
+    """
+    Download and save RemoteArtifacts within a budget of bytes.
+
+    The downloads run concurrently, bounded by the `download_concurrency` of their remote.
+
+    Args:
+        remote_artifacts (list): The (RemoteArtifact, detail Remote) pairs to download.
+        max_bytes (int): The maximum number of bytes to download. No limit if None.
+        progress_report (:class:`~pulpcore.app.models.ProgressReport`): The progress report
+            incremented for every download saved.
+    """
+    spent = 0
+    pending = set()
+
+    async def download(remote_artifact, remote):
+        nonlocal spent
+        downloader = remote.get_downloader(remote_artifact=remote_artifact)
+        try:
+            result = await downloader.run()
+        except Exception as exc:
+            spent -= remote_artifact.size or 0
+            log.warning(_('Prefetching {url} failed: {error}').format(url=remote_artifact.url,
+                                                                      error=exc))
+            return
+        spent += result.artifact_attributes['size'] - (remote_artifact.size or 0)
+        save_downloaded_artifact(result, remote_artifact)
+        progress_report.increment()
+
+    for remote_artifact, remote in remote_artifacts:
+        size = remote_artifact.size
+        if max_bytes is not None:
+            if size is None and pending:
+                await asyncio.wait(pending)
+                pending = set()
+            if spent + (size or 0) > max_bytes or spent >= max_bytes:
+                continue
+        spent += size or 0
+        pending.add(asyncio.ensure_future(download(remote_artifact, remote)))
+        pending = {future for future in pending if not future.done()}
+
+    if pending:
+        await asyncio.wait(pending)
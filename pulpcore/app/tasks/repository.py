@@ -5,6 +5,7 @@ import asyncio
 import hashlib
 
 from django.db import transaction
+from django.db.models import Q
 
 from pulpcore.app import models, serializers
 
@@ -38,6 +39,7 @@ def update(repo_id, partial=True, data=None):
     serializer = serializers.RepositorySerializer(instance, data=data, partial=partial)
     serializer.is_valid(raise_exception=True)
     serializer.save()
+    instance.prune_versions()
 
 
 def delete_version(pk):
@@ -69,6 +71,24 @@ def delete_version(pk):
         version.delete()
 
 
+def prune_versions(repository_pk, retain=None):
+    """
+    Delete the complete versions of a repository older than the latest `retain` ones.
+
+    All the deleted versions are squashed into the oldest version kept at once, instead of one
+    :func:`delete_version` task for each of them.
+
+    Args:
+        repository_pk (uuid): the primary key for a Repository to prune
+        retain (int): The number of complete versions to keep. Defaults to the
+            `retain_repo_versions` of the repository.
+    """
+    repository = models.Repository.objects.get(pk=repository_pk)
+    pruned = repository.prune_versions(retain)
+    log.info(_('Deleted %(n)d versions of repository %(r)s'),
+             {'n': pruned, 'r': repository.name})
+
+
 async def _repair_ca(content_artifact, repaired=None):
     for remote_artifact in content_artifact.remoteartifact_set.all():
         downloader = remote_artifact.remote.get_downloader(remote_artifact)
@@ -170,3 +190,40 @@ def add_and_remove(repository_pk, add_content_units, remove_content_units, base_
     with repository.new_version(base_version=base_version) as new_version:
         new_version.remove_content(models.Content.objects.filter(pk__in=remove_content_units))
         new_version.add_content(models.Content.objects.filter(pk__in=add_content_units))
+
+
+def copy_version(repository_pk, source_version_pk, content_filters=None):
+    """
+    Create a new repository version with the content of a version of any repository.
+
+    The content is copied by the database, with the statements of
+    :meth:`~pulpcore.app.models.RepositoryVersion.set_content`, so no content unit is loaded.
+
+    Args:
+        repository_pk (uuid): The primary key for a Repository for which a new Repository Version
+            should be created.
+        source_version_pk (uuid): The primary key for the RepositoryVersion whose content is
+            copied.
+        content_filters (dict): The field lookups filtering the copied content of each content
+            type, keyed on the pulp type. Content of other types is not copied. All the content is
+            copied if None.
+    """
+    repository = models.Repository.objects.get(pk=repository_pk).cast()
+    source_version = models.RepositoryVersion.objects.get(pk=source_version_pk)
+
+    content = source_version.content
+    if content_filters is not None:
+        content_models = {
+            type_obj.get_pulp_type(): type_obj for type_obj in repository.CONTENT_TYPES
+        }
+        query = Q()
+        for pulp_type, lookups in content_filters.items():
+            if pulp_type not in content_models:
+                raise ValueError(
+                    _("Repository {repository} does not support content type {pulp_type}.").format(
+                        repository=repository.name, pulp_type=pulp_type))
+            query |= Q(pk__in=content_models[pulp_type].objects.filter(**lookups))
+        content = content.filter(query) if query else content.none()
+
+    with repository.new_version() as new_version:
+        new_version.set_content(content)
@@ -9,7 +9,7 @@ from rest_framework.schemas import get_schema_view
 from rest_framework_nested import routers
 
 from pulpcore.app.apps import pulp_plugin_configs
-from pulpcore.app.views import OrphansView, StatusView
+from pulpcore.app.views import OrphansView, PrefetchView, StatusView
 from pulpcore.constants import API_ROOT
 
 log = logging.getLogger(__name__)
@@ -114,6 +114,7 @@ root_router = routers.DefaultRouter()
 urlpatterns = [
     url(r'^{api_root}status/'.format(api_root=API_ROOT), StatusView.as_view()),
     url(r'^{api_root}orphans/'.format(api_root=API_ROOT), OrphansView.as_view()),
+    url(r'^{api_root}prefetch/'.format(api_root=API_ROOT), PrefetchView.as_view()),
     url(r'^auth/', include('rest_framework.urls')),
 ]
 
@@ -1,8 +1,22 @@
+from gettext import gettext as _
+import logging
+from urllib.parse import urlparse
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q, QuerySet
+from django.urls import Resolver404, resolve
+from rest_framework.serializers import ValidationError as DRFValidationError
+
 from pulpcore.app.apps import pulp_plugin_configs
 from pulpcore.app import models
 
+log = logging.getLogger(__name__)
+
 # a little cache so viewset_for_model doesn't have iterate over every app every time
 _model_viewset_cache = {}
+_model_pulp_type_cache = {}
 
 
 # based on their name, viewset_for_model and view_name_for_model look like they should
@@ -73,18 +87,298 @@ def get_view_name_for_model(model_obj, view_action):
     raise LookupError('view not found')
 
 
-def batch_qs(qs, batch_size=1000):
+def get_model_for_pulp_type(master_model, pulp_type):
+    """
+    Given a MasterModel class and a pulp_type, return the detail Model of that type.
+
+    Args:
+        master_model (pulpcore.app.models.MasterModel): the master Model, e.g. Content
+        pulp_type (str): the pulp_type of the detail Model, e.g. 'file.file'
+
+    Returns:
+        pulpcore.app.models.MasterModel: the Model of the type, or its subclass
+
+    Raises:
+        LookupError: if no Model of the type is found
+    """
+    key = (master_model, pulp_type)
+    if key not in _model_pulp_type_cache:
+        for model in apps.get_models():
+            if issubclass(model, master_model) and model.get_pulp_type() == pulp_type:
+                _model_pulp_type_cache[key] = model
+                break
+        else:
+            raise LookupError('Could not find a {} model of type {}'.format(
+                master_model.__name__, pulp_type))
+    return _model_pulp_type_cache[key]
+
+
+def resolve_hrefs(hrefs, model, objects=False, cast=False, view_name=None):
+    """
+    Resolve resource hrefs, validating all of them at once.
+
+    The hrefs are parsed without querying the database and grouped by the model of their
+    ViewSet, then each group is checked with a single query, instead of one query per href like
+    :meth:`~pulpcore.app.viewsets.NamedModelViewSet.get_resource`. Hrefs of nested resources,
+    which have no primary key, are looked up one by one.
+
+    Args:
+        hrefs (list): The resource hrefs.
+        model (django.models.Model or django.db.models.QuerySet): A model class, or a queryset of
+            the resources allowed.
+        objects (bool): Whether to return the resources instead of their primary keys. They are
+            instances of the model of `model`.
+        cast (bool): Whether to return the resources of Master/Detail models as instances of the
+            Detail model of their href, like :meth:`~pulpcore.app.models.MasterModel.cast`.
+        view_name (str): The view name the hrefs must match, if any.
+
+    Returns:
+        list: The primary keys of the resources, or the resources, in the order of `hrefs`.
+
+    Raises:
+        rest_framework.exceptions.ValidationError: listing every href which is invalid or not
+            found.
+    """
+    queryset = model if isinstance(model, QuerySet) else model.objects.all()
+    model = queryset.model
+    errors = []
+    resolved = []
+    groups = {}
+    for href in hrefs:
+        try:
+            match = resolve(urlparse(href).path)
+        except Resolver404:
+            errors.append(_('URI not valid: {u}').format(u=href))
+            continue
+        viewset_queryset = getattr(getattr(match.func, 'cls', None), 'queryset', None)
+        href_model = model if viewset_queryset is None else viewset_queryset.model
+        if not issubclass(href_model, model) or (view_name and match.view_name != view_name):
+            errors.append(_('URI {u} is not a valid {m}.').format(u=href, m=model._meta.model_name))
+            continue
+
+        if 'pk' in match.kwargs:
+            try:
+                pk = href_model._meta.pk.to_python(match.kwargs['pk'])
+            except ValidationError:
+                errors.append(_('ID invalid: {u}').format(u=match.kwargs['pk']))
+                continue
+            groups.setdefault(href_model, set()).add(pk)
+            resolved.append((href, href_model, pk))
+            continue
+
+        kwargs = {}
+        for key, value in match.kwargs.items():
+            if key.endswith('_pk'):
+                kwargs["{}__pk".format(key[:-3])] = value
+            else:
+                kwargs[key] = value
+        try:
+            resource = queryset.get(**kwargs)
+        except (model.DoesNotExist, model.MultipleObjectsReturned, ValidationError):
+            errors.append(_('URI {u} not found for {m}.').format(u=href, m=model._meta.model_name))
+            continue
+        groups.setdefault(href_model, set()).add(resource.pk)
+        resolved.append((href, href_model, resource.pk))
+
+    found = {}
+    for href_model, pks in groups.items():
+        if href_model is model:
+            group_queryset = queryset.filter(pk__in=pks)
+        else:
+            # The resources must also be in the table of the Detail model of their href.
+            group_queryset = href_model.objects.filter(
+                pk__in=queryset.filter(pk__in=pks).values('pk'))
+            if objects and not cast:
+                group_queryset = queryset.filter(pk__in=group_queryset.values('pk'))
+        if objects:
+            found[href_model] = {resource.pk: resource for resource in group_queryset}
+        else:
+            found[href_model] = {pk: pk for pk in group_queryset.values_list('pk', flat=True)}
+
+    resources = []
+    for href, href_model, pk in resolved:
+        if pk in found[href_model]:
+            resources.append(found[href_model][pk])
+        else:
+            errors.append(_('URI {u} not found for {m}.').format(u=href, m=model._meta.model_name))
+    if errors:
+        raise DRFValidationError(detail=errors)
+    return resources
+
+
+def _keyset_ordering(qs):
+    """
+    Returns the ordering of a queryset as (field name, descending) pairs ending with the primary
+    key, so the ordering is total, or None if it is not made of field names only.
+    """
+    if qs.ordered:
+        ordering = qs.query.order_by or (
+            qs.query.default_ordering and qs.query.get_meta().ordering) or ()
+    else:
+        ordering = ()
+    if qs.query.extra_order_by:
+        return None
+
+    keys = []
+    for field in ordering:
+        if not isinstance(field, str) or field == '?':
+            return None
+        keys.append((field.lstrip('-'), field.startswith('-')))
+    pk_name = qs.model._meta.pk.name
+    if not any(name in ('pk', pk_name) for name, descending in keys):
+        keys.append(('pk', False))
+    return keys
+
+
+def _keyset_filter(keys, values):
+    """
+    Returns the filter matching the rows after `values` in the ordering `keys`.
+    """
+    after = Q()
+    for i, (name, descending) in enumerate(keys):
+        condition = Q(**{name + ('__lt' if descending else '__gt'): values[i]})
+        for j in range(i):
+            condition &= Q(**{keys[j][0]: values[j]})
+        after |= condition
+    return after
+
+
+def batch_qs(qs, batch_size=1000, keyset=True):
     """
     Returns a queryset batch in the given queryset.
 
+    Batches are paginated by keyset: each batch is the first `batch_size` rows ordered after the
+    last row of the previous batch, so every batch costs the same whatever its position. The
+    ordering of the queryset, or the primary key if it is not ordered, is used as the keyset and
+    completed with the primary key to be total. The ordering fields must not be null.
+
+    Querysets ordered by something else than fields, or with `keyset` False, are paginated with
+    OFFSET instead, which gets slower with every batch.
+
     Usage:
         # Make sure to order your querset
         article_qs = Article.objects.order_by('id')
         for qs in batch_qs(article_qs):
             for article in qs:
                 print article.body
+
+    Args:
+        qs (django.db.models.QuerySet): The queryset.
+        batch_size (int): The maximum number of rows of each batch.
+        keyset (bool): Whether to paginate by keyset if the ordering allows it.
+
+    Yields:
+        django.db.models.QuerySet: The batches, as sliced querysets.
+    """
+    keys = _keyset_ordering(qs) if keyset else None
+    if keys is None:
+        total = qs.count()
+        for start in range(0, total, batch_size):
+            end = min(start + batch_size, total)
+            yield qs[start:end]
+        return
+
+    ordered = qs.order_by(*[('-' if descending else '') + name for name, descending in keys])
+    fields = [name for name, descending in keys]
+    page = ordered
+    while True:
+        values = list(page.values_list(*fields)[:batch_size])
+        if not values:
+            return
+        yield page[:batch_size]
+        if len(values) < batch_size:
+            return
+        page = ordered.filter(_keyset_filter(keys, values[-1]))
+
+
+def batch_iterator(qs, batch_size=1000):
+    """
+    Returns lists of the rows of a queryset, read through a server-side cursor.
+
+    The query runs once and its rows are streamed, `batch_size` at a time, so it is the fastest
+    way to read all the rows of a large queryset when the batches do not need to be querysets.
+
+    Usage:
+        for articles in batch_iterator(Article.objects.all()):
+            for article in articles:
+                print article.body
+
+    Args:
+        qs (django.db.models.QuerySet): The queryset.
+        batch_size (int): The maximum number of rows of each batch.
+
+    Yields:
+        list: The batches.
+    """
+    batch = []
+    for row in qs.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def save_downloaded_artifact(download_result, remote_artifact):
+    """
+    Create/Get an Artifact and associate it to a RemoteArtifact and/or ContentArtifact.
+
+    Create (or get if already existing) an :class:`~pulpcore.plugin.models.Artifact` based on the
+    `download_result` and associate it to the `content_artifact` of the given `remote_artifact`.
+    When the ContentArtifact is not saved yet, which is the first time pull-through content is
+    requested, its Content is created from the Artifact and the `remote_artifact` is saved too.
+
+    Args:
+        download_result (:class:`~pulpcore.plugin.download.DownloadResult`): The DownloadResult
+            for the downloaded artifact.
+        remote_artifact (:class:`~pulpcore.plugin.models.RemoteArtifact`): The RemoteArtifact to
+            associate the Artifact with.
+
+    Returns:
+        The associated :class:`~pulpcore.plugin.models.Artifact`.
     """
-    total = qs.count()
-    for start in range(0, total, batch_size):
-        end = min(start + batch_size, total)
-        yield qs[start:end]
+    content_artifact = remote_artifact.content_artifact
+    remote = remote_artifact.remote
+    artifact = models.Artifact(
+        **download_result.artifact_attributes,
+        file=download_result.path
+    )
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                artifact.save()
+        except IntegrityError:
+            artifact = models.Artifact.objects.get(artifact.q())
+        update_content_artifact = True
+        if content_artifact._state.adding:
+            # This is the first time pull-through content was requested.
+            rel_path = content_artifact.relative_path
+            c_type = remote.get_remote_artifact_content_type(rel_path)
+            content = c_type.init_from_artifact_and_relative_path(artifact, rel_path)
+            try:
+                with transaction.atomic():
+                    content.save()
+                    content_artifact.content = content
+                    content_artifact.save()
+            except IntegrityError:
+                # There is already content for this Artifact
+                content = c_type.objects.get(content.q())
+                artifacts = content._artifacts
+                if artifact.sha256 != artifacts[0].sha256:
+                    raise RuntimeError("The Artifact downloaded during pull-through does not "
+                                       "match the Artifact already stored for the same "
+                                       "content.")
+                content_artifact = models.ContentArtifact.objects.get(content=content)
+                update_content_artifact = False
+            try:
+                with transaction.atomic():
+                    remote_artifact.content_artifact = content_artifact
+                    remote_artifact.save()
+            except IntegrityError:
+                # Remote artifact must have already gotten saved during a parallel request
+                log.info("RemoteArtifact already exists.")
+        if update_content_artifact:
+            content_artifact.artifact = artifact
+            content_artifact.save()
+    return artifact
@@ -1,2 +1,3 @@
 from .orphans import OrphansView  # noqa
+from .prefetch import PrefetchView  # noqa
 from .status import StatusView  # noqa
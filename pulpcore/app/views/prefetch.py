@@ -0,0 +1,37 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.views import APIView
+
+from pulpcore.app.response import OperationPostponedResponse
+from pulpcore.app.serializers import AsyncOperationResponseSerializer, PrefetchSerializer
+from pulpcore.app.tasks import prefetch_popular_content
+from pulpcore.tasking.tasks import enqueue_with_reservation
+
+
+class PrefetchView(APIView):
+
+    @swagger_auto_schema(operation_description="Trigger an asynchronous task that downloads the "
+                                               "most requested on-demand content which is not "
+                                               "stored yet.",
+                         operation_summary="Prefetch popular content",
+                         request_body=PrefetchSerializer,
+                         responses={202: AsyncOperationResponseSerializer})
+    def post(self, request, format=None):
+        """
+        Downloads the most requested on-demand content according to the access statistics.
+        """
+        serializer = PrefetchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        distributions = serializer.validated_data.get('distributions')
+
+        async_result = enqueue_with_reservation(
+            prefetch_popular_content, [],
+            kwargs={
+                'count': serializer.validated_data['count'],
+                'max_bytes': serializer.validated_data['max_bytes'],
+                'distribution_pks': (
+                    [distribution.pk for distribution in distributions]
+                    if distributions else None
+                ),
+            }
+        )
+        return OperationPostponedResponse(async_result, request)
@@ -17,6 +17,7 @@ from pulpcore.app import tasks
 from pulpcore.app.models import MasterModel
 from pulpcore.app.response import OperationPostponedResponse
 from pulpcore.app.serializers import AsyncOperationResponseSerializer
+from pulpcore.app.util import resolve_hrefs
 from pulpcore.tasking.tasks import enqueue_with_reservation
 
 # These should be used to prevent duplication and keep things consistent
@@ -183,6 +184,27 @@ class NamedModelViewSet(viewsets.GenericViewSet):
             raise DRFValidationError(detail=_('URI {u} is not a valid {m}.').format(
                 u=uri, m=model._meta.model_name))
 
+    @staticmethod
+    def get_resource_pks(uris, model):
+        """
+        Resolve resource URIs to the primary keys of the resources, in bulk.
+
+        Provides a means to resolve a list of hrefs passed in a POST body with one query per
+        model, see :func:`~pulpcore.app.util.resolve_hrefs`.
+
+        Args:
+            uris (list): Resource URIs.
+            model (django.models.Model): A model class.
+
+        Returns:
+            list: The primary keys of the resources, in the order of `uris`.
+
+        Raises:
+            rest_framework.exceptions.ValidationError: listing every invalid URI and every
+                resource not found.
+        """
+        return resolve_hrefs(uris, model)
+
     @classmethod
     def is_master_viewset(cls):
         # ViewSet isn't related to a model, so it can't represent a master model
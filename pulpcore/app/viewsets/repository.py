@@ -1,12 +1,15 @@
 import itertools
 from gettext import gettext as _
 
+from django.urls import reverse
 from django_filters import Filter
 from django_filters.rest_framework import DjangoFilterBackend, filters
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import mixins, serializers
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from pulpcore.app import tasks
 from pulpcore.app.models import (
@@ -20,9 +23,12 @@ from pulpcore.app.response import OperationPostponedResponse
 from pulpcore.app.serializers import (
     AsyncOperationResponseSerializer,
     RemoteSerializer,
+    RepositoryPruneSerializer,
     RepositorySerializer,
+    RepositoryVersionDiffSerializer,
     RepositoryVersionSerializer,
 )
+from pulpcore.app.util import get_model_for_pulp_type, get_view_name_for_model
 from pulpcore.app.viewsets import (
     AsyncRemoveMixin,
     AsyncUpdateMixin,
@@ -87,6 +93,25 @@ class RepositoryViewSet(NamedModelViewSet,
         )
         return OperationPostponedResponse(async_result, request)
 
+    @swagger_auto_schema(
+        operation_description="Trigger an asynchronous task to delete the versions of a "
+                              "repository older than the latest ones.",
+        responses={202: AsyncOperationResponseSerializer}
+    )
+    @action(detail=True, methods=['post'], serializer_class=RepositoryPruneSerializer)
+    def prune(self, request, pk):
+        """
+        Queues a task to delete the old RepositoryVersions of a Repository
+        """
+        repo = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        async_result = enqueue_with_reservation(
+            tasks.repository.prune_versions, [repo],
+            kwargs={'repository_pk': repo.pk, 'retain': serializer.validated_data.get('retain')}
+        )
+        return OperationPostponedResponse(async_result, request)
+
 
 class RepositoryVersionContentFilter(Filter):
     """
@@ -234,6 +259,52 @@ class RepositoryVersionViewSet(NamedModelViewSet,
         )
         return OperationPostponedResponse(async_result, request)
 
+    @swagger_auto_schema(
+        operation_description="List the content added and removed between a repository version "
+                              "and another repository version.",
+        query_serializer=RepositoryVersionDiffSerializer,
+    )
+    @action(detail=True, methods=['get'], filter_backends=[], pagination_class=None)
+    def diff(self, request, repository_pk, number):
+        """
+        Lists the content in only one of two RepositoryVersions, ordered by id
+
+        Pages are read with the "after" query parameter of the "next" link, so listing a page
+        costs the same wherever it is.
+        """
+        version = self.get_object()
+        serializer = RepositoryVersionDiffSerializer(data=request.query_params,
+                                                     context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        limit = serializer.validated_data['limit']
+
+        differences = version.diff(serializer.validated_data['base_version'],
+                                   pulp_type=serializer.validated_data.get('pulp_type'),
+                                   after=serializer.validated_data.get('after'),
+                                   limit=limit + 1)
+        next_link = None
+        if len(differences) > limit:
+            differences = differences[:limit]
+            next_link = replace_query_param(request.build_absolute_uri(), 'after',
+                                            differences[-1][0])
+
+        view_names = {}
+        results = []
+        for content_id, pulp_type, added in differences:
+            if pulp_type not in view_names:
+                try:
+                    view_names[pulp_type] = get_view_name_for_model(
+                        get_model_for_pulp_type(Content, pulp_type), 'detail')
+                except LookupError:
+                    view_names[pulp_type] = None
+            view_name = view_names[pulp_type]
+            results.append({
+                'pulp_href': reverse(view_name, kwargs={'pk': content_id}) if view_name else None,
+                'pulp_type': pulp_type,
+                'change': 'added' if added else 'removed',
+            })
+        return Response({'next': next_link, 'results': results})
+
 
 class RemoteFilter(BaseFilterSet):
     """
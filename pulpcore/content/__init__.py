@@ -15,7 +15,13 @@ from django.conf import settings
 from pulpcore.app.apps import pulp_plugin_configs
 from pulpcore.app.models import ContentAppStatus
 
+from .db import run_in_db_thread
+from .cache import guard_cache, latest_version_cache, permit_cache
 from .handler import Handler
+from .listener import change_listener
+from .metrics import MetricsAccessLogger, access_statistics, metrics_view  # noqa
+from .persist import artifact_save_queue
+from .routing import routing_table
 
 
 log = logging.getLogger(__name__)
@@ -25,21 +31,62 @@ app = web.Application()
 CONTENT_MODULE_NAME = 'content'
 
 
+def get_content_app_name(pid=None):
+    """
+    Get the name a content app process reports its status with.
+
+    Args:
+        pid (int): The id of the process. The current process if None.
+
+    Returns:
+        str: The name of the content app.
+    """
+    return '{pid}@{hostname}'.format(pid=pid or os.getpid(), hostname=socket.gethostname())
+
+
+def _write_heartbeat(name):
+    content_app_status, created = ContentAppStatus.objects.get_or_create(name=name)
+    if not created:
+        content_app_status.save_heartbeat()
+    routing_table.refresh_if_changed()
+
+
 async def _heartbeat():
-    name = '{pid}@{hostname}'.format(pid=os.getpid(), hostname=socket.gethostname())
+    name = get_content_app_name()
     heartbeat_interval = settings.CONTENT_APP_TTL // 4
     i8ln_msg = _("Content App '{name}' heartbeat written, sleeping for '{interarrival}' seconds")
     msg = i8ln_msg.format(name=name, interarrival=heartbeat_interval)
 
     while True:
-        content_app_status, created = ContentAppStatus.objects.get_or_create(name=name)
-        if not created:
-            content_app_status.save_heartbeat()
+        await run_in_db_thread(_write_heartbeat, name)
+        if not change_listener.listening:
+            change_listener.start()
         log.debug(msg)
         await asyncio.sleep(heartbeat_interval)
 
 
+def _subscribe_caches():
+    for kind in ('distribution', 'contentguard', 'publication', 'repository', 'remote'):
+        change_listener.subscribe(kind, routing_table.invalidate)
+    for kind in ('repository', 'repositoryversion'):
+        change_listener.subscribe(kind, latest_version_cache.clear)
+    change_listener.subscribe('contentguard', guard_cache.clear)
+    for kind in ('distribution', 'contentguard'):
+        change_listener.subscribe(kind, permit_cache.clear)
+
+
+async def _wait_for_saves(app):
+    await artifact_save_queue.join()
+
+
+async def _flush_access_statistics(app):
+    await access_statistics.flush()
+
+
 async def server(*args, **kwargs):
+    _subscribe_caches()
+    routing_table.load()
+    change_listener.start()
     asyncio.ensure_future(_heartbeat())
     for pulp_plugin in pulp_plugin_configs():
         if pulp_plugin.name != "pulpcore.app":
@@ -47,6 +94,12 @@ async def server(*args, **kwargs):
                                                            module=CONTENT_MODULE_NAME)
             with suppress(ModuleNotFoundError):
                 import_module(content_module_name)
+    app.on_shutdown.append(_wait_for_saves)
+    if settings.CONTENT_APP_ACCESS_STATISTICS_INTERVAL:
+        asyncio.ensure_future(access_statistics.run())
+        app.on_shutdown.append(_flush_access_statistics)
+    if settings.CONTENT_APP_METRICS_PATH:
+        app.add_routes([web.get(settings.CONTENT_APP_METRICS_PATH, metrics_view)])
     app.add_routes([web.get(settings.CONTENT_PATH_PREFIX, Handler().list_distributions)])
     app.add_routes([web.get(settings.CONTENT_PATH_PREFIX + '{path:.+}', Handler().stream_content)])
     return app
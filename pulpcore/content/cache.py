@@ -0,0 +1,118 @@
+from collections import OrderedDict
+import threading
+
+from django.conf import settings
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe, least-recently-used mapping.
+
+    Args:
+        maxsize (int): The maximum number of entries. A cache with a `maxsize` of 0 stores nothing.
+
+    Attributes:
+        generation (int): The number of times the cache was cleared. Values computed from the
+            database can be stored with the generation read before querying it, so they are
+            discarded if the cache was invalidated meanwhile.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Get an entry and mark it as the most recently used one.
+
+        Args:
+            key (hashable): The key of the entry.
+            default: The value returned when there is no entry for `key`.
+
+        Returns:
+            The cached value or `default`.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        """
+        Store an entry, evicting the least recently used one if the cache is full.
+
+        Args:
+            key (hashable): The key of the entry.
+            value: The value to cache.
+            generation (int): If set, the entry is only stored if the cache was not cleared since
+                `generation` was read.
+        """
+        if not self.maxsize:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """
+        Remove an entry.
+
+        Args:
+            key (hashable): The key of the entry.
+            default: The value returned when there is no entry for `key`.
+
+        Returns:
+            The removed value or `default`.
+        """
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self, *args):
+        """
+        Remove all entries. Accepts and ignores arguments so it can be used as a callback.
+        """
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+
+#: ContentArtifacts with a local Artifact, keyed on (publication or repository version id,
+#: requested relative path). Both are immutable once complete, so entries never go stale.
+path_cache = LRUCache(settings.CONTENT_APP_PATH_CACHE_SIZE)
+
+#: Cast ContentGuards, keyed on their id. Cleared by change notifications of content guards.
+guard_cache = LRUCache(settings.CONTENT_APP_PERMIT_CACHE_SIZE)
+
+#: (expiry, reason) permit decisions of ContentGuards, keyed on (distribution id, content guard id,
+#: ContentGuard.permit_cache_key()). The reason is None for requests that were permitted. Cleared
+#: by change notifications of distributions and content guards.
+permit_cache = LRUCache(settings.CONTENT_APP_PERMIT_CACHE_SIZE)
+
+#: (url, expiry) redirect URLs of artifacts in object storage, keyed on (artifact id,
+#: content disposition). Artifacts are immutable, so entries only go stale when they expire.
+redirect_cache = LRUCache(settings.CONTENT_APP_REDIRECT_CACHE_SIZE)
+
+#: The latest complete RepositoryVersion of repositories, keyed on repository id. Cleared by change
+#: notifications of repositories and repository versions.
+latest_version_cache = LRUCache(settings.CONTENT_APP_VERSION_CACHE_SIZE)
+
+#: The ContentArtifact ids served at requested relative paths of complete repository versions, or
+#: None if nothing is served there, keyed on (repository version id, relative path). The content of
+#: a complete version never changes, so entries never go stale.
+version_paths_cache = LRUCache(settings.CONTENT_APP_PATH_CACHE_SIZE)
@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+
+from django.conf import settings
+from django.db import connection
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.CONTENT_APP_DB_POOL_SIZE,
+                                       thread_name_prefix='pulp-content-db')
+    return _executor
+
+
+def _prepare_connection():
+    """
+    Close the connection of the current thread if it became unusable.
+
+    Connections of the pool threads are kept open across calls, regardless of ``CONN_MAX_AGE``,
+    so each thread holds at most one database connection for its lifetime.
+    """
+    connection.close_at = None
+    connection.close_if_unusable_or_obsolete()
+
+
+def _call(func, args, kwargs):
+    _prepare_connection()
+    return func(*args, **kwargs)
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """
+    Run a function accessing the database in a thread of the content app database pool.
+
+    Django database access is blocking, so doing it in a coroutine stalls every other request
+    served by the process. The pool is bounded by the ``CONTENT_APP_DB_POOL_SIZE`` setting, which
+    is also the maximum number of database connections opened by a content app process.
+
+    Lazily loaded relations of the model instances returned should be loaded in `func` too, e.g.
+    with ``select_related()``, otherwise they are queried from the event loop when accessed.
+
+    Usage::
+
+        distribution = await run_in_db_thread(MyDistribution.objects.get, base_path=base_path)
+
+    Args:
+        func (callable): The function to call.
+        args (tuple): Positional arguments for `func`.
+        kwargs (dict): Keyword arguments for `func`.
+
+    Returns:
+        The return value of `func`. Exceptions raised by `func` are raised to the caller.
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(_call, func, args, kwargs))
@@ -1,7 +1,11 @@
+import asyncio
+from datetime import timezone
+from email.utils import format_datetime
 import logging
 import mimetypes
 import os
 import re
+import time
 from gettext import gettext as _
 
 import django  # noqa otherwise E402: module level not at top of file
@@ -9,22 +13,53 @@ django.setup()  # noqa otherwise E402: module level not at top of file
 
 from aiohttp.client_exceptions import ClientResponseError
 from aiohttp.web import FileResponse, StreamResponse, HTTPOk
-from aiohttp.web_exceptions import HTTPForbidden, HTTPFound, HTTPNotFound
+from aiohttp.web_exceptions import HTTPForbidden, HTTPFound, HTTPNotFound, HTTPNotModified
 from django.conf import settings
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
-from django.db import connection, IntegrityError, transaction
+from django.db import connection
 from pulpcore.app.models import (
-    Artifact,
     BaseDistribution,
     ContentArtifact,
+    DirectoryListing,
     Remote,
     RemoteArtifact,
 )
+from pulpcore.app.util import save_downloaded_artifact
 
 from jinja2 import Template
 
+from .cache import (
+    guard_cache,
+    latest_version_cache,
+    path_cache,
+    permit_cache,
+    redirect_cache,
+    version_paths_cache,
+)
+from .db import run_in_db_thread
+from .inflight import InFlightDownload, in_flight_downloads
+from .metrics import content_app_metrics
+from .persist import artifact_save_queue
+from .routing import routing_table
+
 log = logging.getLogger(__name__)
 
+# The default of cache lookups, since None is cached for paths matching no ContentArtifact.
+_NOT_CACHED = object()
+
+directory_template = Template("""
+<!DOCTYPE html>
+<html>
+    <body>
+        <ul>
+        {% for name in dir_list %}
+            <li><a href="{{ name|e }}">{{ name|e }}</a></li>
+        {% endfor %}
+        </ul>
+    </body>
+</html>
+""")
+
 
 class PathNotResolved(HTTPNotFound):
     """
@@ -47,6 +82,38 @@ class ArtifactNotFound(Exception):
     pass
 
 
+class ArtifactFileResponse(FileResponse):
+    """
+    A FileResponse for an Artifact, with the validators of the Artifact instead of its file.
+
+    aiohttp derives the ETag and Last-Modified headers of a FileResponse from the stat of the file
+    and evaluates the conditions of the request against them. The :class:`Handler` evaluates the
+    conditions against the :meth:`Handler.cache_headers` of the Artifact instead, so they are
+    removed from the request the response is prepared for, and the ETag and Last-Modified
+    headers the response was created with are kept.
+    """
+
+    conditional_headers = (
+        'If-Match', 'If-None-Match', 'If-Modified-Since', 'If-Unmodified-Since'
+    )
+
+    async def prepare(self, request):
+        headers = request.headers.copy()
+        for name in self.conditional_headers:
+            headers.popall(name, None)
+        return await super().prepare(request.clone(headers=headers))
+
+    @FileResponse.etag.setter
+    def etag(self, value):
+        if 'ETag' not in self.headers:
+            FileResponse.etag.fset(self, value)
+
+    @FileResponse.last_modified.setter
+    def last_modified(self, value):
+        if 'Last-Modified' not in self.headers:
+            FileResponse.last_modified.fset(self, value)
+
+
 class Handler:
     """
     A default Handler for the Content App that also can be subclassed to create custom handlers.
@@ -88,9 +155,20 @@ class Handler:
     def _reset_db_connection():
         """
         Reset database connection if it's unusable or obselete to avoid "connection already closed".
+
+        The Handler itself queries the database through
+        :func:`~pulpcore.content.db.run_in_db_thread`, this only concerns subclasses still querying
+        it from the event loop.
         """
         connection.close_if_unusable_or_obsolete()
 
+    def _list_base_paths(self):
+        if self.distribution_model is None:
+            distributions = BaseDistribution.objects.only("base_path").all()
+        else:
+            distributions = self.distribution_model.objects.only("base_path").all()
+        return ['{}/'.format(d.base_path) for d in distributions]
+
     async def list_distributions(self, request):
         """
         The handler for an HTML listing all distributions
@@ -103,11 +181,7 @@ class Handler:
         """
         self._reset_db_connection()
 
-        if self.distribution_model is None:
-            distributions = BaseDistribution.objects.only("base_path").all()
-        else:
-            distributions = self.distribution_model.objects.only("base_path").all()
-        directory_list = ['{}/'.format(d.base_path) for d in distributions]
+        directory_list = await run_in_db_thread(self._list_base_paths)
         return HTTPOk(headers={"Content-Type": "text/html"}, body=self.render_html(directory_list))
 
     async def stream_content(self, request):
@@ -152,6 +226,10 @@ class Handler:
         """
         Match a distribution using a list of base paths and return its detail object.
 
+        The distribution is looked up in the process-local
+        :class:`~pulpcore.content.routing.RoutingTable` first, which needs no database query. The
+        database is only queried when the routing table has no matching distribution.
+
         Args:
             path (str): The path component of the URL.
 
@@ -161,19 +239,27 @@ class Handler:
         Raises:
             PathNotResolved: when not matched.
         """
+        route = routing_table.match(path)
+        if route is not None:
+            distribution = route.distribution_copy()
+            if cls.distribution_model is None or isinstance(distribution, cls.distribution_model):
+                return distribution
+
         base_paths = cls._base_paths(path)
         try:
             if cls.distribution_model is None:
                 model_class = BaseDistribution
-                return BaseDistribution.objects.get(base_path__in=base_paths).cast()
+                distribution = BaseDistribution.objects.get(base_path__in=base_paths).cast()
             else:
                 model_class = cls.distribution_model
-                return cls.distribution_model.objects.get(base_path__in=base_paths)
+                distribution = cls.distribution_model.objects.get(base_path__in=base_paths)
         except ObjectDoesNotExist:
             log.debug(_('{model_name} not matched for {path} using: {base_paths}').format(
                 model_name=model_class.__name__, path=path, base_paths=base_paths
             ))
             raise PathNotResolved(path)
+        routing_table.add(distribution.cast())
+        return distribution
 
     @staticmethod
     def _permit(request, distribution):
@@ -181,6 +267,8 @@ class Handler:
         Permit the request.
 
         Authorization is delegated to the optional content-guard associated with the distribution.
+        Its decision is cached when the content-guard provides a
+        :meth:`~pulpcore.plugin.models.ContentGuard.permit_cache_key` for the request.
 
         Args:
             request (:class:`aiohttp.web.Request`): A request for a published file.
@@ -190,11 +278,27 @@ class Handler:
         Raises:
             :class:`aiohttp.web_exceptions.HTTPForbidden`: When not permitted.
         """
-        guard = distribution.content_guard
-        if not guard:
+        if not distribution.content_guard_id:
             return
+        guard = guard_cache.get(distribution.content_guard_id)
+        if guard is None:
+            generation = guard_cache.generation
+            guard = distribution.content_guard.cast()
+            guard_cache.set(distribution.content_guard_id, guard, generation)
+
+        cache_key = guard.permit_cache_key(request)
+        if cache_key is not None:
+            key, lifetime = cache_key
+            cache_key = (distribution.pk, guard.pk, key)
+            decision = permit_cache.get(cache_key)
+            if decision is not None and decision[0] > time.monotonic():
+                if decision[1] is not None:
+                    raise HTTPForbidden(reason=decision[1])
+                return
+            generation = permit_cache.generation
+
         try:
-            guard.cast().permit(request)
+            guard.permit(request)
         except PermissionError as pe:
             log.debug(
                 _('Path: %(p)s not permitted by guard: "%(g)s" reason: %(r)s'),
@@ -203,7 +307,11 @@ class Handler:
                     'g': guard.name,
                     'r': str(pe)
                 })
+            if cache_key is not None:
+                permit_cache.set(cache_key, (time.monotonic() + lifetime, str(pe)), generation)
             raise HTTPForbidden(reason=str(pe))
+        if cache_key is not None:
+            permit_cache.set(cache_key, (time.monotonic() + lifetime, None), generation)
 
     @staticmethod
     def response_headers(path):
@@ -224,6 +332,58 @@ class Handler:
             headers['Content-Encoding'] = encoding
         return headers
 
+    @staticmethod
+    def cache_headers(sha256=None, last_modified=None):
+        """
+        Get the validator and Cache-Control headers of an artifact.
+
+        Artifacts are immutable, so their sha256 is a strong ETag.
+
+        Args:
+            sha256 (str): The sha256 digest of the artifact, if known.
+            last_modified (datetime.datetime): The creation time of the artifact, if any.
+
+        Returns:
+            headers (dict): A dictionary of response headers.
+        """
+        headers = {}
+        if sha256:
+            headers['ETag'] = '"{}"'.format(sha256)
+        if last_modified:
+            last_modified = last_modified.astimezone(timezone.utc)
+            headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+        if settings.CONTENT_APP_CACHE_CONTROL:
+            headers['Cache-Control'] = settings.CONTENT_APP_CACHE_CONTROL
+        return headers
+
+    @staticmethod
+    def _not_modified(request, etag=None, last_modified=None):
+        """
+        Evaluate the `If-None-Match` and `If-Modified-Since` conditions of a request.
+
+        `If-Modified-Since` is ignored when `If-None-Match` is present, as per RFC 7232.
+
+        Args:
+            request (:class:`aiohttp.web.Request`): The request, if any.
+            etag (str): The ETag of the requested file, if known.
+            last_modified (datetime.datetime): The modification time of the requested file, if
+                known.
+
+        Returns:
+            bool: True when the copy the client has is current.
+        """
+        if request is None:
+            return False
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            if etag is None:
+                return False
+            tags = {tag.strip() for tag in if_none_match.split(',')}
+            return bool(tags & {'*', etag, 'W/' + etag})
+        if last_modified is not None and request.if_modified_since is not None:
+            return last_modified.replace(microsecond=0) <= request.if_modified_since
+        return False
+
     @staticmethod
     def render_html(directory_list):
         """
@@ -235,19 +395,7 @@ class Handler:
         Returns:
             String representing HTML of the directory listing.
         """
-        template = Template("""
-        <!DOCTYPE html>
-        <html>
-            <body>
-                <ul>
-                {% for name in dir_list %}
-                    <li><a href="{{ name|e }}">{{ name|e }}</a></li>
-                {% endfor %}
-                </ul>
-            </body>
-        </html>
-        """)
-        return template.render(dir_list=sorted(directory_list))
+        return directory_template.render(dir_list=sorted(directory_list))
 
     async def list_directory(self, repo_version, publication, path):
         """
@@ -257,6 +405,10 @@ class Handler:
         method generates HTML directory list of a path inside the repository version or
         publication.
 
+        The entries are read from the :class:`~pulpcore.app.models.DirectoryListing` computed when
+        the repository version or publication was completed. Without one, they are found by
+        matching the relative path of every file below `path`.
+
         Args:
             repo_version (:class:`~pulpcore.app.models.RepositoryVersion`): The repository version
             publication (:class:`~pulpcore.app.models.Publication`): Publication
@@ -274,36 +426,162 @@ class Handler:
             result = re.match(r'({})([^\/]*)(\/*)'.format(directory_path), relative_path)
             return '{}{}'.format(result.groups()[1], result.groups()[2])
 
-        directory_list = set()
-
-        if publication:
-            pas = publication.published_artifact.filter(relative_path__startswith=path)
-            for pa in pas:
-                directory_list.add(file_or_directory_name(path, pa.relative_path))
-
-            if publication.pass_through:
+        def list_entries():
+            listings = dict(DirectoryListing.objects.filter(
+                publication=publication, repository_version=repo_version, path__in={path, ''}
+            ).values_list('path', 'entries'))
+            if path in listings:
+                return listings[path]
+            elif listings:
+                return []
+
+        def list_relative_paths():
+            relative_paths = []
+
+            if publication:
+                pas = publication.published_artifact.filter(relative_path__startswith=path)
+                relative_paths.extend(pas.values_list('relative_path', flat=True))
+
+                if publication.pass_through:
+                    cas = ContentArtifact.objects.filter(
+                            content__in=publication.repository_version.content,
+                            relative_path__startswith=path)
+                    relative_paths.extend(cas.values_list('relative_path', flat=True))
+
+            if repo_version:
                 cas = ContentArtifact.objects.filter(
-                        content__in=publication.repository_version.content,
-                        relative_path__startswith=path)
-                for ca in cas:
-                    directory_list.add(file_or_directory_name(path, ca.relative_path))
+                    content__in=repo_version.content,
+                    relative_path__startswith=path)
+                relative_paths.extend(cas.values_list('relative_path', flat=True))
 
-        if repo_version:
-            cas = ContentArtifact.objects.filter(
-                content__in=repo_version.content,
-                relative_path__startswith=path)
-            for ca in cas:
-                directory_list.add(file_or_directory_name(path, ca.relative_path))
+            return relative_paths
+
+        directory_list = await run_in_db_thread(list_entries)
+        if directory_list is None:
+            directory_list = set()
+            for relative_path in await run_in_db_thread(list_relative_paths):
+                directory_list.add(file_or_directory_name(path, relative_path))
 
         if directory_list:
             return self.render_html(directory_list)
         else:
             raise PathNotResolved(path)
 
+    @staticmethod
+    def _get_publication(distro):
+        return getattr(distro, 'publication', None)
+
+    @staticmethod
+    def _get_repository_version(distro):
+        repository_id = getattr(distro, 'repository_id', None)
+        if repository_id:
+            repo_version = latest_version_cache.get(repository_id)
+            if repo_version is None:
+                generation = latest_version_cache.generation
+                repo_version = distro.repository.latest_version()
+                if repo_version is not None:
+                    latest_version_cache.set(repository_id, repo_version, generation)
+            return repo_version
+        return getattr(distro, 'repository_version', None)
+
+    @staticmethod
+    def _get_remote(distro):
+        if distro.remote:
+            return distro.remote.cast()
+
+    @classmethod
+    def _match_content_artifact(cls, distro, repo_version, rel_path):
+        """
+        Match the ContentArtifact of a repository version by relative path.
+
+        The ContentArtifact ids matched at the requested paths of complete repository versions,
+        or None when nothing is served there, are cached, so a path is then fetched by primary key.
+
+        Args:
+            distro (detail of :class:`pulpcore.plugin.models.BaseDistribution`): The matched
+                distribution.
+            repo_version (:class:`~pulpcore.app.models.RepositoryVersion`): The repository version.
+            rel_path (str): The relative path of the ContentArtifact.
+
+        Returns:
+            :class:`~pulpcore.app.models.ContentArtifact`: The matched ContentArtifact with its
+                Artifact loaded, or None.
+        """
+        content_artifacts = ContentArtifact.objects.select_related('artifact')
+        cache_key = (repo_version.pk, rel_path) if repo_version.complete else None
+        try:
+            if cache_key:
+                pk = version_paths_cache.get(cache_key, _NOT_CACHED)
+                if pk is None:
+                    return None
+                elif pk is not _NOT_CACHED:
+                    return content_artifacts.get(pk=pk)
+            try:
+                ca = content_artifacts.get(content__in=repo_version.content,
+                                           relative_path=rel_path)
+            except ObjectDoesNotExist:
+                ca = None
+            if cache_key:
+                version_paths_cache.set(cache_key, ca and ca.pk)
+            return ca
+        except MultipleObjectsReturned:
+            log.error(
+                _('Multiple (pass-through) matches for {b}/{p}'),
+                {
+                    'b': distro.base_path,
+                    'p': rel_path,
+                }
+            )
+            raise
+        except ObjectDoesNotExist:
+            return None
+
+    @classmethod
+    def _match_published_content_artifact(cls, distro, publication, rel_path):
+        """
+        Match the ContentArtifact published by a publication at a relative path.
+
+        Published artifacts are matched first, then the content of the published repository
+        version if the publication is `pass_through`.
+
+        Args:
+            distro (detail of :class:`pulpcore.plugin.models.BaseDistribution`): The matched
+                distribution.
+            publication (:class:`~pulpcore.app.models.Publication`): The publication.
+            rel_path (str): The relative path of the ContentArtifact.
+
+        Returns:
+            :class:`~pulpcore.app.models.ContentArtifact`: The matched ContentArtifact with its
+                Artifact loaded, or None.
+        """
+        try:
+            pa = publication.published_artifact.select_related(
+                'content_artifact__artifact'
+            ).get(relative_path=rel_path)
+        except ObjectDoesNotExist:
+            pass
+        else:
+            return pa.content_artifact
+
+        if publication.pass_through:
+            return cls._match_content_artifact(distro, publication.repository_version, rel_path)
+        return None
+
+    @staticmethod
+    def _match_remote_artifact(remote, url):
+        try:
+            return RemoteArtifact.objects.select_related('content_artifact__artifact').get(
+                remote=remote, url=url)
+        except ObjectDoesNotExist:
+            return None
+
     async def _match_and_stream(self, path, request):
         """
         Match the path and stream results either from the filesystem or by downloading new data.
 
+        The database is queried through :func:`~pulpcore.content.db.run_in_db_thread`, so other
+        requests are served while the path is being matched.
+
         Args:
             path (str): The path component of the URL.
             request(:class:`~aiohttp.web.Request`): The request to prepare a response for.
@@ -316,114 +594,85 @@ class Handler:
             :class:`aiohttp.web.StreamResponse` or :class:`aiohttp.web.FileResponse`: The response
                 streamed back to the client.
         """
-        distro = self._match_distribution(path)
-        self._permit(request, distro)
+        distro = await run_in_db_thread(self._match_distribution, path)
+        await run_in_db_thread(self._permit, request, distro)
 
         rel_path = path.lstrip('/')
         rel_path = rel_path[len(distro.base_path):]
         rel_path = rel_path.lstrip('/')
 
+        request['distribution'] = distro.base_path
+        request['distribution_id'] = distro.pk
+        request['relative_path'] = rel_path
+
         headers = self.response_headers(rel_path)
 
-        publication = getattr(distro, 'publication', None)
+        requested_path = rel_path
+        publication_id = getattr(distro, 'publication_id', None)
+        if publication_id:
+            ca = path_cache.get((publication_id, requested_path))
+            if ca is not None:
+                return self._serve_content_artifact(ca, headers, request)
+
+        publication = await run_in_db_thread(self._get_publication, distro)
 
         if publication:
             if rel_path == '' or rel_path[-1] == '/':
-                try:
-                    index_path = '{}index.html'.format(rel_path)
-                    publication.published_artifact.get(relative_path=index_path)
+                index_path = '{}index.html'.format(rel_path)
+                index = publication.published_artifact.filter(relative_path=index_path)
+                if await run_in_db_thread(index.exists):
                     rel_path = index_path
-                except ObjectDoesNotExist:
+                else:
                     dir_list = await self.list_directory(None, publication, rel_path)
                     return HTTPOk(headers={"Content-Type": "text/html"}, body=dir_list)
 
-            # published artifact
-            try:
-                pa = publication.published_artifact.get(relative_path=rel_path)
-                ca = pa.content_artifact
-            except ObjectDoesNotExist:
-                pass
-            else:
+            ca = await run_in_db_thread(self._match_published_content_artifact, distro,
+                                        publication, rel_path)
+            if ca is not None:
                 if ca.artifact:
-                    return self._serve_content_artifact(ca, headers)
+                    path_cache.set((publication.pk, requested_path), ca)
+                    return self._serve_content_artifact(ca, headers, request)
                 else:
                     return await self._stream_content_artifact(request,
                                                                StreamResponse(headers=headers), ca)
 
-            # pass-through
-            if publication.pass_through:
-                try:
-                    ca = ContentArtifact.objects.get(
-                        content__in=publication.repository_version.content,
-                        relative_path=rel_path)
-                except MultipleObjectsReturned:
-                    log.error(
-                        _('Multiple (pass-through) matches for {b}/{p}'),
-                        {
-                            'b': distro.base_path,
-                            'p': rel_path,
-                        }
-                    )
-                    raise
-                except ObjectDoesNotExist:
-                    pass
-                else:
-                    if ca.artifact:
-                        return self._serve_content_artifact(ca, headers)
-                    else:
-                        return await self._stream_content_artifact(request,
-                                                                   StreamResponse(headers=headers),
-                                                                   ca)
-
-        repo_version = getattr(distro, 'repository_version', None)
-        repository = getattr(distro, 'repository', None)
-
-        if repository or repo_version:
-            if repository:
-                repo_version = distro.repository.latest_version()
+        repo_version = await run_in_db_thread(self._get_repository_version, distro)
+
+        if repo_version:
+            ca = path_cache.get((repo_version.pk, requested_path))
+            if ca is not None:
+                return self._serve_content_artifact(ca, headers, request)
 
             if rel_path == '' or rel_path[-1] == '/':
-                try:
-                    index_path = '{}index.html'.format(rel_path)
-                    ContentArtifact.objects.get(
-                        content__in=repo_version.content,
-                        relative_path=index_path)
+                index_path = '{}index.html'.format(rel_path)
+                index = await run_in_db_thread(self._match_content_artifact, distro, repo_version,
+                                               index_path)
+                if index is not None:
                     rel_path = index_path
-                except ObjectDoesNotExist:
+                else:
                     dir_list = await self.list_directory(repo_version, None, rel_path)
                     return HTTPOk(headers={"Content-Type": "text/html"}, body=dir_list)
 
-            try:
-                ca = ContentArtifact.objects.get(
-                    content__in=repo_version.content,
-                    relative_path=rel_path)
-            except MultipleObjectsReturned:
-                log.error(
-                    _('Multiple (pass-through) matches for {b}/{p}'),
-                    {
-                        'b': distro.base_path,
-                        'p': rel_path,
-                    }
-                )
-                raise
-            except ObjectDoesNotExist:
-                pass
-            else:
-                return self._serve_content_artifact(ca, headers)
-
-        if distro.remote:
-            remote = distro.remote.cast()
-            try:
-                url = remote.get_remote_artifact_url(rel_path)
-                ra = RemoteArtifact.objects.get(remote=remote, url=url)
+            ca = await run_in_db_thread(self._match_content_artifact, distro, repo_version,
+                                        rel_path)
+            if ca is not None:
+                if ca.artifact:
+                    path_cache.set((repo_version.pk, requested_path), ca)
+                return self._serve_content_artifact(ca, headers, request)
+
+        remote = await run_in_db_thread(self._get_remote, distro)
+        if remote:
+            url = remote.get_remote_artifact_url(rel_path)
+            ra = await run_in_db_thread(self._match_remote_artifact, remote, url)
+            if ra is not None:
                 ca = ra.content_artifact
                 if ca.artifact:
-                    return self._serve_content_artifact(ca, headers)
+                    return self._serve_content_artifact(ca, headers, request)
                 else:
                     return await self._stream_content_artifact(request,
                                                                StreamResponse(headers=headers),
                                                                ca)
-            except ObjectDoesNotExist:
+            else:
                 ca = ContentArtifact(relative_path=rel_path)
                 ra = RemoteArtifact(remote=remote, url=url, content_artifact=ca)
                 return await self._stream_remote_artifact(request,
@@ -454,7 +703,10 @@ class Handler:
                 :class:`~pulpcore.plugin.models.ContentArtifact` returned the binary data needed for
                 the client.
         """
-        for remote_artifact in content_artifact.remoteartifact_set.all():
+        remote_artifacts = await run_in_db_thread(
+            list, content_artifact.remoteartifact_set.select_related('remote')
+        )
+        for remote_artifact in remote_artifacts:
             try:
                 response = await self._stream_remote_artifact(request, response, remote_artifact)
 
@@ -470,7 +722,8 @@ class Handler:
         Create (or get if already existing) an :class:`~pulpcore.plugin.models.Artifact`
         based on the `download_result` and associate it to the `content_artifact` of the given
         `remote_artifact`. Both the created artifact and the updated content_artifact are saved to
-        the DB.  The `remote_artifact` is also saved for the pull-through caching use case.
+        the DB.  The `remote_artifact` is also saved for the pull-through caching use case. This is
+        done by :func:`~pulpcore.app.util.save_downloaded_artifact`, which prefetching uses too.
 
         Plugin-writers may overide this method if their content module requires
         additional/different steps for saving.
@@ -485,87 +738,106 @@ class Handler:
         Returns:
             The associated :class:`~pulpcore.plugin.models.Artifact`.
         """
-        content_artifact = remote_artifact.content_artifact
-        remote = remote_artifact.remote
-        artifact = Artifact(
-            **download_result.artifact_attributes,
-            file=download_result.path
-        )
-        with transaction.atomic():
-            try:
-                with transaction.atomic():
-                    artifact.save()
-            except IntegrityError:
-                artifact = Artifact.objects.get(artifact.q())
-            update_content_artifact = True
-            if content_artifact._state.adding:
-                # This is the first time pull-through content was requested.
-                rel_path = content_artifact.relative_path
-                c_type = remote.get_remote_artifact_content_type(rel_path)
-                content = c_type.init_from_artifact_and_relative_path(artifact, rel_path)
-                try:
-                    with transaction.atomic():
-                        content.save()
-                        content_artifact.content = content
-                        content_artifact.save()
-                except IntegrityError:
-                    # There is already content for this Artifact
-                    content = c_type.objects.get(content.q())
-                    artifacts = content._artifacts
-                    if artifact.sha256 != artifacts[0].sha256:
-                        raise RuntimeError("The Artifact downloaded during pull-through does not "
-                                           "match the Artifact already stored for the same "
-                                           "content.")
-                    content_artifact = ContentArtifact.objects.get(content=content)
-                    update_content_artifact = False
-                try:
-                    with transaction.atomic():
-                        remote_artifact.content_artifact = content_artifact
-                        remote_artifact.save()
-                except IntegrityError:
-                    # Remote artifact must have already gotten saved during a parallel request
-                    log.info("RemoteArtifact already exists.")
-            if update_content_artifact:
-                content_artifact.artifact = artifact
-                content_artifact.save()
-        return artifact
-
-    def _serve_content_artifact(self, content_artifact, headers):
+        return save_downloaded_artifact(download_result, remote_artifact)
+
+    def _serve_content_artifact(self, content_artifact, headers, request=None):
         """
         Handle response for a Content Artifact with the file present.
 
         Depending on where the file storage (e.g. filesystem, S3, etc) this could be responding with
         the file (filesystem) or a redirect (S3).
 
+        The response carries the :meth:`cache_headers` of the artifact. When the conditions of
+        `request` show the client has the file already, a 304 is returned without accessing the
+        storage.
+
         Args:
             content_artifact (:class:`pulpcore.app.models.ContentArtifact`): The Content Artifact to
                 respond with.
             headers (dict): A dictionary of response headers.
+            request (:class:`aiohttp.web.Request`): The request to respond to, if any.
 
         Raises:
             :class:`aiohttp.web_exceptions.HTTPFound`: When we need to redirect to the file
             NotImplementedError: If file is stored in a file storage we can't handle
 
         Returns:
-            The :class:`aiohttp.web.FileResponse` for the file.
+            The :class:`ArtifactFileResponse` for the file, or a
+            :class:`aiohttp.web.HTTPNotModified`.
         """
+        artifact = content_artifact.artifact
+        cache_headers = self.cache_headers(artifact.sha256, artifact.pulp_created)
+        if self._not_modified(request, cache_headers.get('ETag'), artifact.pulp_created):
+            return HTTPNotModified(headers=cache_headers)
+        headers = {**headers, **cache_headers}
+
         if settings.DEFAULT_FILE_STORAGE == 'pulpcore.app.models.storage.FileSystem':
             filename = content_artifact.artifact.file.name
-            return FileResponse(os.path.join(settings.MEDIA_ROOT, filename), headers=headers)
+            return ArtifactFileResponse(os.path.join(settings.MEDIA_ROOT, filename),
+                                        headers=headers)
         elif (settings.DEFAULT_FILE_STORAGE == 'storages.backends.s3boto3.S3Boto3Storage' or
               settings.DEFAULT_FILE_STORAGE == 'storages.backends.azure_storage.AzureStorage'):
-            artifact_file = content_artifact.artifact.file
+            raise HTTPFound(self._get_redirect_url(content_artifact))
+        else:
+            raise NotImplementedError()
+
+    @staticmethod
+    def _get_redirect_url(content_artifact):
+        """
+        Get the object storage URL to redirect a request for a Content Artifact to.
+
+        Signing URLs is costly, so they are cached for a fraction of their expiry, set by the
+        ``CONTENT_APP_REDIRECT_CACHE_FRACTION`` setting, and the same URL is returned meanwhile.
+        When ``CONTENT_APP_REDIRECT_STABLE_URLS`` is set, the URL does not include the relative path
+        as the content disposition, so it is the same for all the Content Artifacts of an
+        Artifact.
+
+        Args:
+            content_artifact (:class:`pulpcore.app.models.ContentArtifact`): The Content Artifact to
+                redirect to.
+
+        Returns:
+            str: The URL of the Artifact file.
+        """
+        if settings.CONTENT_APP_REDIRECT_STABLE_URLS:
+            content_disposition = None
+            parameters = {}
+        else:
             content_disposition = f'attachment;filename={content_artifact.relative_path}'
             parameters = {"ResponseContentDisposition": content_disposition}
-            url = artifact_file.storage.url(artifact_file.name, parameters=parameters)
-            raise HTTPFound(url)
+
+        key = (content_artifact.artifact_id, content_disposition)
+        now = time.monotonic()
+        cached = redirect_cache.get(key)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        artifact_file = content_artifact.artifact.file
+        storage = artifact_file.storage
+        url = storage.url(artifact_file.name, parameters=parameters)
+        expire = (getattr(storage, 'querystring_expire', None) or
+                  getattr(storage, 'expiration_secs', None))
+        if expire:
+            expiry = now + expire * settings.CONTENT_APP_REDIRECT_CACHE_FRACTION
         else:
-            raise NotImplementedError()
+            expiry = float('inf')
+        redirect_cache.set(key, (url, expiry))
+        return url
 
     async def _stream_remote_artifact(self, request, response, remote_artifact):
         """
         Stream and save a RemoteArtifact.
 
+        Unless the remote policy is `streamed`, concurrent requests for the same RemoteArtifact
+        share a single download: the first request starts it and every request, the first one
+        included, streams the file being downloaded. The download keeps running if the client that
+        started it disconnects, and queues the save of the Artifact with the
+        :class:`~pulpcore.content.persist.ArtifactSaveQueue` once all the data was streamed.
+
+        When the sha256 of the RemoteArtifact is known, the response carries the same
+        :meth:`cache_headers` as the saved Artifact would, and a 304 is returned without
+        downloading anything if the client has the file already.
+
         Args:
             request(:class:`~aiohttp.web.Request`): The request to prepare a response for.
             response (:class:`~aiohttp.web.StreamResponse`): The response to stream data to.
@@ -579,32 +851,101 @@ class Handler:
                 the client.
 
         """
-        remote = remote_artifact.remote.cast()
+        cache_headers = self.cache_headers(remote_artifact.sha256)
+        if self._not_modified(request, cache_headers.get('ETag')):
+            return HTTPNotModified(headers=cache_headers)
+
+        remote = await run_in_db_thread(remote_artifact.remote.cast)
+        request['pull_through'] = True
+
+        if remote.policy == Remote.STREAMED:
+            content_app_metrics.increment('pull_through.streamed')
+            return await self._stream_remote_artifact_unsaved(request, response, remote,
+                                                              remote_artifact)
+
+        key = (remote.pk, remote_artifact.url)
+        download = in_flight_downloads.get(key)
+        if download is None:
+            content_app_metrics.increment('pull_through.downloads')
+            download = in_flight_downloads[key] = InFlightDownload()
+            asyncio.ensure_future(self._download_remote_artifact(remote, remote_artifact,
+                                                                 download, key))
+        else:
+            content_app_metrics.increment('pull_through.joined')
+        await download.stream(request, response)
+        return response
+
+    async def _download_remote_artifact(self, remote, remote_artifact, download, key):
+        """
+        Download and save a RemoteArtifact, reporting the progress to an InFlightDownload.
+
+        Args:
+            remote (detail of :class:`~pulpcore.plugin.models.Remote`): The cast remote.
+            remote_artifact (:class:`~pulpcore.plugin.models.RemoteArtifact`): The RemoteArtifact
+                to download.
+            download (:class:`~pulpcore.content.inflight.InFlightDownload`): The shared download.
+            key (tuple): The key of `download` in the in-flight downloads.
+        """
+        async def handle_headers(headers):
+            download.set_headers([
+                (name, value) for name, value in headers.items()
+                if name.lower() not in self.hop_by_hop_headers
+            ] + list(self.cache_headers(remote_artifact.sha256).items()))
+
+        async def handle_data(data):
+            await original_handle_data(data)
+            downloader._writer.flush()
+            download.add_data(downloader.path, len(data))
+
+        try:
+            downloader = remote.get_downloader(remote_artifact=remote_artifact,
+                                               headers_ready_callback=handle_headers)
+            original_handle_data = downloader.handle_data
+            downloader.handle_data = handle_data
+            download_result = await downloader.run()
+        except Exception as exc:
+            download.finish(exc)
+        else:
+            download.finish()
+            try:
+                await artifact_save_queue.save(self._save_artifact, download_result,
+                                               remote_artifact)
+            except Exception:
+                log.exception(_('Failed to save the Artifact downloaded from {url}').format(
+                    url=remote_artifact.url))
+        finally:
+            del in_flight_downloads[key]
+            download.close()
+
+    async def _stream_remote_artifact_unsaved(self, request, response, remote, remote_artifact):
+        """
+        Stream a RemoteArtifact of a remote with the `streamed` policy without saving it.
 
+        Args:
+            request(:class:`~aiohttp.web.Request`): The request to prepare a response for.
+            response (:class:`~aiohttp.web.StreamResponse`): The response to stream data to.
+            remote (detail of :class:`~pulpcore.plugin.models.Remote`): The cast remote.
+            remote_artifact (:class:`~pulpcore.plugin.models.RemoteArtifact`): The RemoteArtifact
+                to stream.
+        """
         async def handle_headers(headers):
             for name, value in headers.items():
                 if name.lower() in self.hop_by_hop_headers:
                     continue
                 response.headers[name] = value
+            response.headers.update(self.cache_headers(remote_artifact.sha256))
             await response.prepare(request)
 
         async def handle_data(data):
             await response.write(data)
-            if remote.policy != Remote.STREAMED:
-                await original_handle_data(data)
 
         async def finalize():
-            if remote.policy != Remote.STREAMED:
-                await original_finalize()
+            pass
+
         downloader = remote.get_downloader(remote_artifact=remote_artifact,
                                            headers_ready_callback=handle_headers)
-        original_handle_data = downloader.handle_data
         downloader.handle_data = handle_data
-        original_finalize = downloader.finalize
         downloader.finalize = finalize
-        download_result = await downloader.run()
-
-        if remote.policy != Remote.STREAMED:
-            self._save_artifact(download_result, remote_artifact)
+        await downloader.run()
         await response.write_eof()
         return response
@@ -0,0 +1,141 @@
+import asyncio
+import os
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class DownloadAborted(Exception):
+    """
+    Raised to the requests streaming a download which was closed before it finished.
+    """
+
+
+class InFlightDownload:
+    """
+    A pull-through download shared by all the requests for the same remote artifact.
+
+    The download writes to its temporary file as usual and reports its progress here, while every
+    request streams the file to its client with :meth:`stream`, reading only what was written
+    already. Requests arriving while the download is in progress therefore join it instead of
+    downloading the same file again, and start with the data already on disk.
+
+    The file is read through a descriptor opened when the download starts writing, so it can be
+    read until the last request finished even after the file was moved to the artifact storage.
+
+    Attributes:
+        headers (list): The (name, value) pairs of the response headers to send to the clients.
+            None until the upstream response headers are received.
+        size (int): The number of bytes written to the file so far.
+        done (bool): Whether the download finished.
+        exception (Exception): The exception the download failed with, if any.
+    """
+
+    def __init__(self):
+        self.headers = None
+        self.size = 0
+        self.done = False
+        self.exception = None
+        self._fd = None
+        self._readers = 0
+        self._closed = False
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _close_if_unused(self):
+        if self._closed and not self._readers and self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def set_headers(self, headers):
+        """
+        Set the response headers once the upstream response headers are received.
+
+        Args:
+            headers (list): The (name, value) pairs of the response headers.
+        """
+        self.headers = headers
+        self._notify()
+
+    def add_data(self, path, size):
+        """
+        Report data written and flushed to the file of the download.
+
+        Args:
+            path (str): The path of the file.
+            size (int): The number of bytes written.
+        """
+        if self._fd is None:
+            self._fd = os.open(path, os.O_RDONLY)
+        self.size += size
+        self._notify()
+
+    def finish(self, exception=None):
+        """
+        Mark the download as finished.
+
+        Args:
+            exception (Exception): The exception the download failed with, if any. It is raised
+                to all the requests streaming the download.
+        """
+        self.done = True
+        self.exception = exception
+        self._notify()
+
+    def close(self):
+        """
+        Release the file once the requests still streaming it are done.
+
+        A download closed before it finished, e.g. because it was cancelled, fails with
+        :class:`DownloadAborted`, so the requests streaming it do not wait for it forever.
+        """
+        if not self.done:
+            self.finish(DownloadAborted())
+        self._closed = True
+        self._close_if_unused()
+
+    async def stream(self, request, response):
+        """
+        Stream the download to a client, waiting for data as it is downloaded.
+
+        Args:
+            request (:class:`~aiohttp.web.Request`): The request to prepare a response for.
+            response (:class:`~aiohttp.web.StreamResponse`): The response to stream data to.
+
+        Raises:
+            Exception: The exception the download failed with.
+        """
+        self._readers += 1
+        try:
+            while self.headers is None and not self.size and not self.done:
+                await self._changed.wait()
+            if self.exception and not self.size:
+                raise self.exception
+
+            for name, value in self.headers or ():
+                response.headers[name] = value
+            await response.prepare(request)
+
+            offset = 0
+            while True:
+                changed = self._changed
+                if offset < self.size:
+                    data = os.pread(self._fd, min(self.size - offset, CHUNK_SIZE), offset)
+                    await response.write(data)
+                    offset += len(data)
+                elif self.done:
+                    if self.exception:
+                        raise self.exception
+                    break
+                else:
+                    await changed.wait()
+            await response.write_eof()
+        finally:
+            self._readers -= 1
+            self._close_if_unused()
+
+
+#: The pull-through downloads in progress in this process, keyed on (remote id, url).
+in_flight_downloads = {}
@@ -0,0 +1,111 @@
+import asyncio
+from collections import defaultdict
+from gettext import gettext as _
+import logging
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from django.db import connection
+
+from pulpcore.app.signals import CONTENT_APP_CHANNEL
+
+log = logging.getLogger(__name__)
+
+
+class ChangeListener:
+    """
+    Listen for the change notifications sent by :func:`pulpcore.app.signals.notify_content_app`.
+
+    The listener holds its own PostgreSQL connection, separate from the Django one, which is
+    watched by the event loop so notifications are dispatched as soon as they arrive. Callbacks
+    are called with the primary key of the changed object, or with `None` when notifications may
+    have been missed (e.g. the connection was lost) and anything may have changed.
+
+    Usage::
+
+        change_listener.subscribe('distribution', lambda pk: routing_table.invalidate())
+        change_listener.start()
+    """
+
+    def __init__(self):
+        self._callbacks = defaultdict(list)
+        self._connection = None
+
+    @property
+    def listening(self):
+        """
+        Returns:
+            bool: True if the listener is connected and listening.
+        """
+        return self._connection is not None
+
+    def subscribe(self, kind, callback):
+        """
+        Register a callback for changes of one kind of object.
+
+        Args:
+            kind (str): The kind of object, e.g. 'distribution'.
+            callback (callable): Called with the primary key of the changed object as a string,
+                or `None` if anything may have changed.
+        """
+        self._callbacks[kind].append(callback)
+
+    def start(self):
+        """
+        Connect, start listening and register with the running event loop.
+
+        Notifications may have been missed while the listener was not listening, so all
+        callbacks are called with `None` once the listener is started.
+
+        Returns:
+            bool: True if the listener is listening.
+        """
+        if self.listening:
+            return True
+        try:
+            self._connection = psycopg2.connect(**connection.get_connection_params())
+            self._connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with self._connection.cursor() as cursor:
+                cursor.execute('LISTEN {channel}'.format(channel=CONTENT_APP_CHANNEL))
+        except psycopg2.Error as e:
+            log.warning(_('Could not listen for content app notifications: {err}').format(err=e))
+            self._connection = None
+            return False
+        asyncio.get_event_loop().add_reader(self._connection.fileno(), self._poll)
+        self._dispatch_all()
+        return True
+
+    def stop(self):
+        """
+        Stop listening and close the connection.
+        """
+        if not self.listening:
+            return
+        asyncio.get_event_loop().remove_reader(self._connection.fileno())
+        try:
+            self._connection.close()
+        except psycopg2.Error:
+            pass
+        self._connection = None
+
+    def _poll(self):
+        try:
+            self._connection.poll()
+        except psycopg2.Error as e:
+            log.warning(_('Lost the content app notification connection: {err}').format(err=e))
+            self.stop()
+            self._dispatch_all()
+            return
+        while self._connection.notifies:
+            notify = self._connection.notifies.pop(0)
+            kind, __, pk = notify.payload.partition(':')
+            for callback in self._callbacks[kind]:
+                callback(pk)
+
+    def _dispatch_all(self):
+        for callbacks in self._callbacks.values():
+            for callback in callbacks:
+                callback(None)
+
+
+change_listener = ChangeListener()
@@ -0,0 +1,235 @@
+import asyncio
+import bisect
+from collections import Counter
+from gettext import gettext as _
+import logging
+import os
+import threading
+import time
+
+from aiohttp import web
+from aiohttp.web_log import AccessLogger
+from django.conf import settings
+
+from pulpcore.app.models import ContentAccess
+
+from . import cache
+from .db import run_in_db_thread
+
+log = logging.getLogger(__name__)
+
+#: The upper bounds, in seconds, of the buckets of the request latency histograms.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+#: The caches of the content app reported by :meth:`ContentAppMetrics.to_dict`.
+CACHES = (
+    'path_cache',
+    'version_paths_cache',
+    'latest_version_cache',
+    'guard_cache',
+    'permit_cache',
+    'redirect_cache',
+)
+
+
+class RequestStats:
+    """
+    Request counters and latency histogram of a distribution.
+
+    Attributes:
+        requests (int): The number of requests.
+        statuses (collections.Counter): The number of responses by status code.
+        bytes (int): The number of body bytes served.
+        latency (list): The number of requests by bucket of :data:`LATENCY_BUCKETS`.
+        latency_sum (float): The total number of seconds spent serving requests.
+    """
+
+    __slots__ = ('requests', 'statuses', 'bytes', 'latency', 'latency_sum')
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = Counter()
+        self.bytes = 0
+        self.latency = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The counters, with the histogram keyed on the upper bound of its buckets.
+        """
+        return {
+            'requests': self.requests,
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'bytes': self.bytes,
+            'latency': {
+                str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.latency)
+            },
+            'latency_sum': self.latency_sum,
+        }
+
+
+class ContentAppMetrics:
+    """
+    In-process request metrics of the content app.
+
+    Requests are recorded by :class:`MetricsAccessLogger` and grouped by the base path of the
+    distribution that served them, or None for requests not matched to a distribution. Other
+    events, like pull-through downloads, are counted with :meth:`increment`.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._distributions = {}
+        self._counters = Counter()
+
+    def record(self, distribution, status, size, duration):
+        """
+        Record a request.
+
+        Args:
+            distribution (str): The base path of the distribution serving the request, if any.
+            status (int): The response status.
+            size (int): The number of body bytes sent.
+            duration (float): The number of seconds spent serving the request.
+        """
+        with self._lock:
+            stats = self._distributions.get(distribution)
+            if stats is None:
+                stats = self._distributions[distribution] = RequestStats()
+            stats.requests += 1
+            stats.statuses[status] += 1
+            stats.bytes += size
+            stats.latency[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.latency_sum += duration
+
+    def increment(self, name, value=1):
+        """
+        Increment a counter.
+
+        Args:
+            name (str): The name of the counter, e.g. 'pull_through.downloads'.
+            value (int): The increment.
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The metrics of the process, its counters and the statistics of its caches.
+        """
+        with self._lock:
+            distributions = {
+                distribution or '': stats.to_dict()
+                for distribution, stats in self._distributions.items()
+            }
+            counters = dict(self._counters)
+        caches = {}
+        for name in CACHES:
+            lru = getattr(cache, name)
+            caches[name] = {'size': len(lru), 'hits': lru.hits, 'misses': lru.misses}
+        return {
+            'pid': os.getpid(),
+            'started': self.started,
+            'distributions': distributions,
+            'counters': counters,
+            'caches': caches,
+        }
+
+
+content_app_metrics = ContentAppMetrics()
+
+
+class AccessStatisticsWriter:
+    """
+    Aggregate the requests served per distribution and path, and write them to the database.
+
+    Counts are added to :class:`~pulpcore.app.models.ContentAccess` every `interval` seconds with
+    one batch of upserts, so recording a request costs a dictionary update.
+
+    Args:
+        interval (int): The number of seconds between writes. Nothing is recorded if None or 0.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._counts = {}
+
+    def record(self, distribution_id, relative_path, pull_through=False):
+        """
+        Record a successful request.
+
+        Args:
+            distribution_id (uuid.UUID): The id of the distribution serving the request.
+            relative_path (str): The requested path, relative to the distribution.
+            pull_through (bool): Whether the request was served by downloading from the remote.
+        """
+        if not self.interval:
+            return
+        counts = self._counts.get((distribution_id, relative_path))
+        if counts is None:
+            counts = self._counts[(distribution_id, relative_path)] = [0, 0]
+        counts[0] += 1
+        if pull_through:
+            counts[1] += 1
+
+    async def flush(self):
+        """
+        Write the counts recorded since the last write.
+        """
+        counts, self._counts = self._counts, {}
+        if counts:
+            await run_in_db_thread(ContentAccess.add_counts, counts)
+
+    async def run(self):
+        """
+        Write the counts every `interval` seconds, forever.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                log.exception(_('Failed to write the access statistics of the content app.'))
+
+
+access_statistics = AccessStatisticsWriter(settings.CONTENT_APP_ACCESS_STATISTICS_INTERVAL)
+
+
+class MetricsAccessLogger(AccessLogger):
+    """
+    An access logger recording the metrics of every request served by the content app.
+
+    Access loggers are called once the response was sent, so the recorded latency and size cover
+    sending the body. The distribution and the relative path are read from the
+    ``'distribution'``, ``'distribution_id'`` and ``'relative_path'`` keys of the request, which
+    :class:`~pulpcore.content.handler.Handler` sets once it matched a distribution. Successful
+    requests are also recorded by the :class:`AccessStatisticsWriter`.
+
+    Requests are logged to the access log as usual, if its level is enabled. Pass it as the
+    `access_log_class` of :func:`aiohttp.web.run_app`.
+    """
+
+    @property
+    def enabled(self):
+        return True
+
+    def log(self, request, response, time):
+        content_app_metrics.record(request.get('distribution'), response.status,
+                                   response.body_length, time)
+        if response.status < 400 and 'distribution_id' in request:
+            access_statistics.record(request['distribution_id'], request['relative_path'],
+                                     request.get('pull_through', False))
+        if self.logger.isEnabledFor(logging.INFO):
+            super().log(request, response, time)
+
+
+async def metrics_view(request):
+    """
+    Serve the metrics of the content app process as JSON.
+
+    The view is not authenticated, so it must not be exposed through the reverse proxy.
+    """
+    return web.json_response(content_app_metrics.to_dict())
@@ -0,0 +1,102 @@
+import asyncio
+from gettext import gettext as _
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .db import run_in_db_thread
+
+log = logging.getLogger(__name__)
+
+
+class ArtifactSaveQueue:
+    """
+    Save downloaded pull-through artifacts in the background.
+
+    Saves run in the database thread pool, but at most `concurrency` at once so a burst of
+    downloads finishing together does not keep the pool from serving requests. Saves of the same
+    digest are run one after the other, so only the first one creates the Artifact and the next
+    ones find it instead of racing for the same rows. Saves failing with a database error are
+    retried.
+
+    Args:
+        concurrency (int): The maximum number of saves running at once.
+        retries (int): The number of times a failed save is retried.
+        retry_delay (float): The number of seconds to wait before the first retry. The delay is
+            doubled after every retry.
+    """
+
+    def __init__(self, concurrency, retries=3, retry_delay=1):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._semaphore = None
+        self._idle = None
+        self._locks = {}
+        self._pending = 0
+
+    async def save(self, save_artifact, download_result, remote_artifact):
+        """
+        Queue the save of a downloaded artifact and wait for it.
+
+        Args:
+            save_artifact (callable): The function saving the artifact, called with
+                `download_result` and `remote_artifact` in a thread of the database pool, e.g.
+                :meth:`~pulpcore.content.handler.Handler._save_artifact`.
+            download_result (:class:`~pulpcore.plugin.download.DownloadResult`): The result of
+                the download.
+            remote_artifact (:class:`~pulpcore.plugin.models.RemoteArtifact`): The RemoteArtifact
+                downloaded.
+
+        Returns:
+            The return value of `save_artifact`.
+
+        Raises:
+            Exception: The exception of the last attempt, when all of them failed.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._idle = asyncio.Event()
+        digest = download_result.artifact_attributes.get('sha256')
+        lock, waiting = self._locks.get(digest, (asyncio.Lock(), 0))
+        self._locks[digest] = (lock, waiting + 1)
+        self._pending += 1
+        self._idle.clear()
+        try:
+            async with lock:
+                async with self._semaphore:
+                    return await self._save(save_artifact, download_result, remote_artifact)
+        finally:
+            self._pending -= 1
+            if not self._pending:
+                self._idle.set()
+            lock, waiting = self._locks[digest]
+            if waiting == 1:
+                del self._locks[digest]
+            else:
+                self._locks[digest] = (lock, waiting - 1)
+
+    async def _save(self, save_artifact, download_result, remote_artifact):
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                return await run_in_db_thread(save_artifact, download_result, remote_artifact)
+            except DatabaseError as exc:
+                if attempt == self.retries:
+                    raise
+                log.warning(_('Saving the Artifact downloaded from {url} failed, retrying in '
+                              '{delay} seconds: {error}').format(url=remote_artifact.url,
+                                                                 delay=delay, error=exc))
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def join(self):
+        """
+        Wait for the saves in progress and queued to finish.
+        """
+        if self._pending:
+            await self._idle.wait()
+
+
+artifact_save_queue = ArtifactSaveQueue(settings.CONTENT_APP_SAVE_CONCURRENCY)
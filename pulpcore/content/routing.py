@@ -0,0 +1,162 @@
+import copy
+from gettext import gettext as _
+import logging
+
+from django.db.models import Count, Max
+from pygtrie import StringTrie
+
+from pulpcore.app.models import BaseDistribution
+
+log = logging.getLogger(__name__)
+
+
+class Route:
+    """
+    A distribution served by the content app along with the ids of the objects it refers to.
+
+    Attributes:
+        distribution (detail of :class:`~pulpcore.app.models.BaseDistribution`): The cast
+            distribution.
+        publication_id (uuid.UUID): The id of the served publication, if any.
+        repository_id (uuid.UUID): The id of the repository whose latest version is served, if
+            any.
+        repository_version_id (uuid.UUID): The id of the served repository version, if any.
+        content_guard_id (uuid.UUID): The id of the content guard, if any.
+        remote_id (uuid.UUID): The id of the remote used for pull-through, if any.
+    """
+
+    __slots__ = ('distribution', 'publication_id', 'repository_id', 'repository_version_id',
+                 'content_guard_id', 'remote_id')
+
+    def __init__(self, distribution):
+        self.distribution = distribution
+        self.publication_id = getattr(distribution, 'publication_id', None)
+        self.repository_id = getattr(distribution, 'repository_id', None)
+        self.repository_version_id = getattr(distribution, 'repository_version_id', None)
+        self.content_guard_id = distribution.content_guard_id
+        self.remote_id = distribution.remote_id
+
+    def distribution_copy(self):
+        """
+        Copy the distribution so related objects loaded while serving a request are not shared.
+
+        Returns:
+            detail of :class:`~pulpcore.app.models.BaseDistribution`: A copy of the distribution
+                with an empty related-object cache.
+        """
+        distribution = copy.copy(self.distribution)
+        distribution._state = copy.copy(self.distribution._state)
+        distribution._state.fields_cache = {}
+        return distribution
+
+
+class RoutingTable:
+    """
+    A process-local trie mapping distribution base paths to :class:`Route` objects.
+
+    The table is loaded with a handful of queries, one per distribution type, and then routes
+    requests without touching the database. It is invalidated by change notifications (see
+    :class:`~pulpcore.content.listener.ChangeListener`) and reloaded lazily on the next lookup.
+    As a fallback for missed notifications, :meth:`refresh_if_changed` compares a cheap
+    fingerprint of the distribution table and is polled by the content app heartbeat.
+    """
+
+    def __init__(self):
+        self._trie = None
+        self._fingerprint = None
+
+    @staticmethod
+    def _get_fingerprint():
+        return tuple(BaseDistribution.objects.aggregate(
+            count=Count('pk'), last_updated=Max('pulp_last_updated')
+        ).values())
+
+    @staticmethod
+    def _cast_distributions():
+        """
+        Load all distributions cast to their detail type with one query per detail type.
+
+        Yields:
+            detail of :class:`~pulpcore.app.models.BaseDistribution`: Cast distributions.
+        """
+        pks_by_type = {}
+        for pk, pulp_type in BaseDistribution.objects.values_list('pk', 'pulp_type'):
+            pks_by_type.setdefault(pulp_type, []).append(pk)
+
+        detail_models = {}
+        for model in BaseDistribution._meta.apps.get_models():
+            if issubclass(model, BaseDistribution) and model is not BaseDistribution:
+                detail_models[model.get_pulp_type()] = model
+
+        for pulp_type, pks in pks_by_type.items():
+            model = detail_models.get(pulp_type)
+            if model is None:
+                for distribution in BaseDistribution.objects.filter(pk__in=pks):
+                    yield distribution.cast()
+            else:
+                for distribution in model.objects.filter(pk__in=pks):
+                    yield distribution.cast()
+
+    def load(self):
+        """
+        Load all distributions from the database, replacing the current table.
+        """
+        fingerprint = self._get_fingerprint()
+        trie = StringTrie(separator='/')
+        for distribution in self._cast_distributions():
+            trie[distribution.base_path] = Route(distribution)
+        self._trie = trie
+        self._fingerprint = fingerprint
+        log.debug(_('Loaded {count} distributions into the routing table.').format(
+            count=len(trie)))
+
+    def invalidate(self, pk=None):
+        """
+        Mark the table as stale, causing it to be reloaded by the next lookup.
+
+        Args:
+            pk (str): The primary key of the changed object. Unused, the whole table is reloaded.
+        """
+        self._trie = None
+
+    def refresh_if_changed(self):
+        """
+        Reload the table if the distributions changed since it was loaded.
+
+        This is a fallback for notifications that were missed and costs one aggregate query.
+        """
+        if self._trie is not None and self._get_fingerprint() != self._fingerprint:
+            self.invalidate()
+
+    def add(self, distribution):
+        """
+        Add a distribution found in the database but missing from the table.
+
+        Args:
+            distribution (detail of :class:`~pulpcore.app.models.BaseDistribution`): The cast
+                distribution.
+        """
+        if self._trie is not None:
+            self._trie[distribution.base_path] = Route(distribution)
+
+    def match(self, path):
+        """
+        Match the route whose base path is the longest parent directory of `path`.
+
+        Args:
+            path (str): The path component of the URL.
+
+        Returns:
+            :class:`Route`: The matched route or None.
+        """
+        trie = self._trie
+        if trie is None:
+            self.load()
+            trie = self._trie
+        directory = path.rpartition('/')[0]
+        if not directory:
+            return None
+        return trie.longest_prefix(directory).value
+
+
+routing_table = RoutingTable()
@@ -0,0 +1,111 @@
+from gettext import gettext as _
+import logging
+import os
+import signal
+import time
+
+from aiohttp import web
+from django.db import connection
+
+from pulpcore.app.models import ContentAppStatus
+from pulpcore.content import MetricsAccessLogger, get_content_app_name, server
+
+log = logging.getLogger(__name__)
+
+
+class Supervisor:
+    """
+    Run the content app in several worker processes sharing the listening port.
+
+    Each worker is a forked process running its own event loop, caches and heartbeat, and binds
+    the port with ``SO_REUSEPORT`` so the kernel balances connections between them. Workers that
+    exit unexpectedly are restarted, and the status of exited workers is deleted so they are not
+    reported as missing. On SIGTERM or SIGINT the workers are asked to shut down gracefully and
+    the supervisor exits once they did.
+
+    Workers are forked before any event loop, thread or database connection exists in the
+    supervisor, so none of them are shared with the workers.
+
+    Args:
+        workers (int): The number of worker processes.
+        host (str): The host to listen on. All interfaces if None.
+        port (int): The port to listen on.
+    """
+
+    #: Workers exiting sooner than this many seconds after being started are restarted only after
+    #: waiting for as long, so a worker failing at startup does not make the supervisor spin.
+    restart_delay = 1
+
+    def __init__(self, workers, host=None, port=24816):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.stopping = False
+        self._children = {}
+
+    def run(self):
+        """
+        Start the workers and supervise them until they are all shut down.
+        """
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for i in range(self.workers):
+            self._spawn()
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            self._delete_status(pid)
+            if not self.stopping:
+                log.warning(_('Content app worker {pid} exited with status {status}, restarting '
+                              'it.').format(pid=pid, status=status))
+                if time.monotonic() - started < self.restart_delay:
+                    time.sleep(self.restart_delay)
+                if not self.stopping:
+                    self._spawn()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            status = 1
+            try:
+                self.run_worker()
+                status = 0
+            except Exception:
+                log.exception(_('Content app worker {pid} failed.').format(pid=os.getpid()))
+            finally:
+                os._exit(status)
+        self._children[pid] = time.monotonic()
+
+    def run_worker(self):
+        """
+        Run the content app in the current worker process.
+        """
+        web.run_app(server(), host=self.host, port=self.port, reuse_port=True, print=None,
+                    access_log_class=MetricsAccessLogger)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    @staticmethod
+    def _delete_status(pid):
+        try:
+            ContentAppStatus.objects.filter(name=get_content_app_name(pid)).delete()
+        except Exception:
+            log.exception(_('Failed to delete the status of content app worker {pid}.').format(
+                pid=pid))
+        finally:
+            # Do not share the connection with the workers forked next.
+            connection.close()
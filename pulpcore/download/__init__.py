@@ -1,4 +1,5 @@
 from .base import BaseDownloader, DownloadResult  # noqa
 from .factory import DownloaderFactory  # noqa
 from .file import FileDownloader  # noqa
-from .http import http_giveup, HttpDownloader  # noqa
+from .http import http_backoff, http_giveup, HttpDownloader  # noqa
+from .metrics import DownloadMetrics, DownloadStats, download_metrics  # noqa
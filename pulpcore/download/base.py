@@ -4,10 +4,13 @@ import hashlib
 import logging
 import os
 import tempfile
+import time
 
 from pulpcore.app.models import Artifact
 from pulpcore.exceptions import DigestValidationError, SizeValidationError
 
+from .metrics import download_metrics
+
 
 log = logging.getLogger(__name__)
 
@@ -54,6 +57,10 @@ class BaseDownloader:
     data written to the file-like object is quiesced to disk before the file-like object has
     `close()` called on it.
 
+    Every call to :meth:`~pulpcore.plugin.download.BaseDownloader.run` records the number of bytes,
+    the duration, the time to first byte, and the retries of the download in
+    :data:`~pulpcore.plugin.download.download_metrics`, keyed by ``remote_name`` and host.
+
     Attributes:
         url (str): The url to download.
         expected_digests (dict): Keyed on the algorithm name provided by hashlib and stores the
@@ -61,8 +68,14 @@ class BaseDownloader:
         expected_size (int): The number of bytes the download is expected to have.
         path (str): The full path to the file containing the downloaded data if no
             ``custom_file_object`` option was specified, otherwise None.
+        remote_name (str): The name of the remote this downloader was built for, if any. Set by
+            the :class:`~pulpcore.plugin.download.DownloaderFactory`.
+        retries (int): The number of times the download was retried.
+        backoff_time (float): The number of seconds spent waiting between retries.
     """
 
+    remote_name = None
+
     def __init__(self, url, custom_file_object=None, expected_digests=None, expected_size=None,
                  semaphore=None):
         """
@@ -90,6 +103,9 @@ class BaseDownloader:
             self.semaphore = asyncio.Semaphore()  # This will always be acquired
         self._digests = {n: hashlib.new(n) for n in Artifact.DIGEST_FIELDS}
         self._size = 0
+        self._first_byte_time = None
+        self.retries = 0
+        self.backoff_time = 0.0
 
     def _ensure_writer_has_open_file(self):
         """
@@ -114,6 +130,8 @@ class BaseDownloader:
         Args:
             data (bytes): The data to be handled by the downloader.
         """
+        if self._first_byte_time is None:
+            self._first_byte_time = time.monotonic()
         self._ensure_writer_has_open_file()
         self._writer.write(data)
         self._record_size_and_digests_for_data(data)
@@ -210,6 +228,9 @@ class BaseDownloader:
         contained in `_run()`. This ensures that the semaphore stays acquired even as the `backoff`
         decorator on `_run()`, handles backoff-and-retry logic.
 
+        The download is recorded in :data:`~pulpcore.plugin.download.download_metrics` once it
+        finishes, whether it succeeded or not.
+
         Args:
             extra_data (dict): Extra data passed to the downloader.
 
@@ -218,7 +239,15 @@ class BaseDownloader:
 
         """
         async with self.semaphore:
-            return await self._run(extra_data=extra_data)
+            started = time.monotonic()
+            failed = True
+            try:
+                result = await self._run(extra_data=extra_data)
+                failed = False
+                return result
+            finally:
+                download_metrics.record(self, started, time.monotonic(),
+                                        first_byte=self._first_byte_time, failed=failed)
 
     async def _run(self, extra_data=None):
         """
@@ -47,6 +47,9 @@ class DownloaderFactory:
     Also for http and https urls, even though HTTP 1.1 is used, the TCP connection is setup and
     closed with each request. This is done for compatibility reasons due to various issues related
     to session continuation implementation in various servers.
+
+    Built downloaders have their ``remote_name`` set to the name of the remote so their
+    :data:`~pulpcore.plugin.download.download_metrics` are aggregated per remote.
     """
 
     def __init__(self, remote, downloader_overrides=None):
@@ -132,7 +135,9 @@ class DownloaderFactory:
         except KeyError:
             raise ValueError(_('URL: {u} not supported.'.format(u=url)))
         else:
-            return builder(download_class, url, **kwargs)
+            downloader = builder(download_class, url, **kwargs)
+            downloader.remote_name = self._remote.name
+            return downloader
 
     def _http_or_https(self, download_class, url, **kwargs):
         """
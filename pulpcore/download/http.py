@@ -32,6 +32,19 @@ def http_giveup(exc):
     return exc.code not in [429, 502, 503, 504]
 
 
+def http_backoff(details):
+    """
+    Record a retry on the downloader that is about to back off.
+
+    Args:
+        details (dict): The backoff event details, with the downloader as the first positional
+            argument of the retried call.
+    """
+    downloader = details['args'][0]
+    downloader.retries += 1
+    downloader.backoff_time += details['wait']
+
+
 class HttpDownloader(BaseDownloader):
     """
     An HTTP/HTTPS Downloader built on `aiohttp`.
@@ -166,7 +179,7 @@ class HttpDownloader(BaseDownloader):
                               url=self.url, headers=response.headers)
 
     @backoff.on_exception(backoff.expo, aiohttp.ClientResponseError,
-                          max_tries=10, giveup=http_giveup)
+                          max_tries=10, giveup=http_giveup, on_backoff=http_backoff)
     async def _run(self, extra_data=None):
         """
         Download, validate, and compute digests on the `url`. This is a coroutine.
@@ -0,0 +1,157 @@
+from gettext import gettext as _
+import threading
+from urllib.parse import urlparse
+
+
+class DownloadStats:
+    """
+    Aggregated download statistics for one remote and host.
+
+    Attributes:
+        downloads (int): The number of finished downloads, successful or not.
+        failures (int): The number of downloads that raised an exception.
+        bytes (int): The number of bytes handed to
+            :meth:`~pulpcore.plugin.download.BaseDownloader.handle_data`.
+        duration (float): The summed wall-clock seconds spent downloading, including backoff.
+        time_to_first_byte (float): The summed seconds between starting a download and receiving
+            its first chunk of data.
+        retries (int): The number of retried requests.
+        backoff_time (float): The summed seconds spent sleeping between retries.
+    """
+
+    __slots__ = (
+        'downloads', 'failures', 'bytes', 'duration', 'time_to_first_byte', 'retries',
+        'backoff_time',
+    )
+
+    def __init__(self):
+        self.downloads = 0
+        self.failures = 0
+        self.bytes = 0
+        self.duration = 0.0
+        self.time_to_first_byte = 0.0
+        self.retries = 0
+        self.backoff_time = 0.0
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The statistics keyed by attribute name.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def copy(self):
+        """
+        Returns:
+            DownloadStats: A copy of these statistics.
+        """
+        duplicate = DownloadStats()
+        for name in self.__slots__:
+            setattr(duplicate, name, getattr(self, name))
+        return duplicate
+
+    def __sub__(self, other):
+        difference = DownloadStats()
+        for name in self.__slots__:
+            setattr(difference, name, getattr(self, name) - getattr(other, name))
+        return difference
+
+    def __str__(self):
+        rate = self.bytes / self.duration if self.duration else 0.0
+        average_ttfb = self.time_to_first_byte / self.downloads if self.downloads else 0.0
+        return _(
+            '{bytes} bytes in {duration:.2f}s ({rate:.0f} B/s), {downloads} downloads, '
+            '{failures} failed, time to first byte avg {ttfb:.3f}s, {retries} retries, '
+            '{backoff:.2f}s backoff'
+        ).format(
+            bytes=self.bytes, duration=self.duration, rate=rate, downloads=self.downloads,
+            failures=self.failures, ttfb=average_ttfb, retries=self.retries,
+            backoff=self.backoff_time,
+        )
+
+
+class DownloadMetrics:
+    """
+    An in-process registry of :class:`DownloadStats` keyed by remote name and host.
+
+    Downloaders record one entry when a download finishes, so nothing is done per chunk of data
+    besides noting the arrival of the first one. The registry is cumulative for the lifetime of the
+    process; callers interested in a window of time (e.g. a single sync task) take a
+    :meth:`snapshot` before and after and subtract them. A metrics exporter can poll
+    :meth:`snapshot` periodically.
+
+    Usage::
+
+        before = download_metrics.snapshot()
+        ...  # run downloads
+        for (remote, host), stats in download_metrics.delta(before).items():
+            print(remote, host, stats)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, downloader, started, finished, first_byte=None, failed=False):
+        """
+        Record a finished download.
+
+        Args:
+            downloader (:class:`~pulpcore.plugin.download.BaseDownloader`): The downloader that
+                finished.
+            started (float): The monotonic time the download started.
+            finished (float): The monotonic time the download finished.
+            first_byte (float): The monotonic time the first chunk of data arrived, if any.
+            failed (bool): Whether the download raised an exception.
+        """
+        key = (downloader.remote_name, urlparse(downloader.url).hostname)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = DownloadStats()
+            stats.downloads += 1
+            stats.failures += int(failed)
+            stats.bytes += downloader._size
+            stats.duration += finished - started
+            if first_byte is not None:
+                stats.time_to_first_byte += first_byte - started
+            stats.retries += downloader.retries
+            stats.backoff_time += downloader.backoff_time
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: A copy of the current statistics keyed on (remote name, host) tuples.
+        """
+        with self._lock:
+            return {key: stats.copy() for key, stats in self._stats.items()}
+
+    def delta(self, snapshot):
+        """
+        Compute the statistics recorded since `snapshot` was taken.
+
+        Args:
+            snapshot (dict): A value previously returned by :meth:`snapshot`.
+
+        Returns:
+            dict: The statistics keyed on (remote name, host) tuples, only including keys that saw
+                downloads since the snapshot.
+        """
+        delta = {}
+        for key, stats in self.snapshot().items():
+            previous = snapshot.get(key)
+            if previous is not None:
+                stats = stats - previous
+            if stats.downloads:
+                delta[key] = stats
+        return delta
+
+    def reset(self):
+        """
+        Forget all recorded statistics.
+        """
+        with self._lock:
+            self._stats.clear()
+
+
+download_metrics = DownloadMetrics()
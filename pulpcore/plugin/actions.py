@@ -6,7 +6,8 @@ from pulpcore.app.models import Content, RepositoryVersion
 from pulpcore.app.response import OperationPostponedResponse
 from pulpcore.app.serializers import (
     AsyncOperationResponseSerializer,
-    RepositoryAddRemoveContentSerializer
+    RepositoryAddRemoveContentSerializer,
+    RepositoryCopySerializer,
 )
 from pulpcore.tasking.tasks import enqueue_with_reservation
 
@@ -38,18 +39,14 @@ class ModifyRepositoryActionMixin:
             base_version_pk = None
 
         if 'add_content_units' in request.data:
-            for url in request.data['add_content_units']:
-                content = self.get_resource(url, Content)
-                add_content_units.append(content.pk)
+            add_content_units = self.get_resource_pks(request.data['add_content_units'], Content)
 
         if 'remove_content_units' in request.data:
-            for url in request.data['remove_content_units']:
-                if url == '*':
-                    remove_content_units = [url]
-                    break
-                else:
-                    content = self.get_resource(url, Content)
-                    remove_content_units.append(content.pk)
+            hrefs = request.data['remove_content_units']
+            remove_content_units = self.get_resource_pks(
+                [href for href in hrefs if href != '*'], Content)
+            if '*' in hrefs:
+                remove_content_units = ['*']
 
         result = enqueue_with_reservation(
             tasks.repository.add_and_remove, [repository],
@@ -61,3 +58,34 @@ class ModifyRepositoryActionMixin:
             }
         )
         return OperationPostponedResponse(result, request)
+
+    @swagger_auto_schema(
+        operation_description="Trigger an asynchronous task to create a new repository version "
+                              "with the content of another repository version.",
+        operation_summary="Copy Repository Content",
+        responses={202: AsyncOperationResponseSerializer}
+    )
+    @action(detail=True, methods=["post"], serializer_class=RepositoryCopySerializer)
+    def copy(self, request, pk):
+        """
+        Queues a task that creates a new RepositoryVersion with the content of a RepositoryVersion
+        """
+        repository = self.get_object()
+        context = self.get_serializer_context()
+        context['repository'] = repository
+        serializer = self.get_serializer_class()(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        source_version = serializer.validated_data['source_version']
+
+        resources = [repository]
+        if source_version.repository_id != repository.pk:
+            resources.append(source_version.repository)
+        result = enqueue_with_reservation(
+            tasks.repository.copy_version, resources,
+            kwargs={
+                'repository_pk': pk,
+                'source_version_pk': source_version.pk,
+                'content_filters': serializer.validated_data.get('content_filters'),
+            }
+        )
+        return OperationPostponedResponse(result, request)
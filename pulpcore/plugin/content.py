@@ -1,2 +1,3 @@
 from pulpcore.content import app  # noqa
+from pulpcore.content.db import run_in_db_thread  # noqa
 from pulpcore.content.handler import Handler, PathNotResolved  # noqa
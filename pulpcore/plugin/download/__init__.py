@@ -2,7 +2,11 @@ from pulpcore.download import (  # noqa
     BaseDownloader,
     DownloadResult,
     DownloaderFactory,
+    DownloadMetrics,
+    DownloadStats,
+    download_metrics,
     FileDownloader,
+    http_backoff,
     http_giveup,
     HttpDownloader,
 )
@@ -1,11 +1,10 @@
 from gettext import gettext as _
 import logging
 
-from django.db.models import Q
+from django.db.models import BooleanField, Case, Exists, OuterRef, Q, Value, When
 
 from pulpcore.app.files import validate_file_paths
 from pulpcore.app.models import Content, ContentArtifact
-from pulpcore.app.util import batch_qs
 
 
 _logger = logging.getLogger(__name__)
@@ -18,8 +17,8 @@ def remove_duplicates(repository_version):
     Inspect content additions in the `RepositoryVersion` and remove existing repository duplicates.
 
     This function will inspect the content being added to a repo version and remove any existing
-    content which would collide with the content being added to the repository version. It does not
-    inspect the content being added for duplicates.
+    content which would collide with the content being added to the repository version. The content
+    being added is then validated to contain no duplicates of its own.
 
     Some content can have two instances A and B which are unique, but cannot both exist together in
     one repository. For example, pulp_file's content has `relative_path` for that file within the
@@ -34,6 +33,9 @@ def remove_duplicates(repository_version):
     Args:
         repository_version: The :class:`~pulpcore.plugin.models.RepositoryVersion` to be checked
             and possibly modified.
+
+    Raises:
+        ValueError: If the content added to the repository version has duplicates.
     """
     added_content = repository_version.added(base_version=repository_version.base_version)
     if repository_version.base_version:
@@ -46,37 +48,114 @@ def remove_duplicates(repository_version):
     repository = repository_version.repository.cast()
     content_types = {type_obj.get_pulp_type(): type_obj for type_obj in repository.CONTENT_TYPES}
 
+    error_messages = []
     for pulp_type, type_obj in content_types.items():
         repo_key_fields = type_obj.repo_key_fields
+        if repo_key_fields == ():
+            continue
+
         new_content_qs = type_obj.objects.filter(
             pk__in=added_content.filter(pulp_type=pulp_type)
-        ).values(*repo_key_fields)
-
-        if type_obj.repo_key_fields == ():
+        )
+        if not new_content_qs.exists():
             continue
 
-        if new_content_qs.count() and existing_content.count():
-            _logger.debug(_("Removing duplicates for type: {}".format(type_obj.get_pulp_type())))
+        _logger.debug(_("Removing duplicates for type: {}".format(type_obj.get_pulp_type())))
+
+        # The existing content is joined to the new content on the repo_key_fields by the
+        # database, instead of matching batches of keys loaded in Python.
+        new_duplicates = _repo_key_duplicates(type_obj, new_content_qs)
+        duplicates_qs = _annotate_null_repo_keys(type_obj, type_obj.objects.filter(
+            pk__in=existing_content
+        )).annotate(duplicated=Exists(new_duplicates)).filter(duplicated=True).values('pk')
+        repository_version.remove_content(duplicates_qs)
+
+        added_duplicates = _annotate_null_repo_keys(type_obj, new_content_qs).annotate(
+            duplicated=Exists(_repo_key_duplicates(type_obj, new_content_qs))
+        ).filter(duplicated=True)
+        if added_duplicates.exists():
+            error_messages.append(_duplicate_content_message(type_obj))
+    if error_messages:
+        raise ValueError(
+            _("Cannot create repository version. {msg}").format(msg=", ".join(error_messages))
+        )
 
-            for batch in batch_qs(new_content_qs):
-                find_dup_qs = Q()
 
-                for content_dict in batch:
-                    item_query = Q(**content_dict)
-                    find_dup_qs |= item_query
+def _annotate_null_repo_keys(type_obj, queryset):
+    """
+    Annotate whether the nullable repo_key_fields of the content are NULL.
+
+    Args:
+        type_obj: The Content model.
+        queryset (django.db.models.QuerySet): The content of type `type_obj`.
+
+    Returns:
+        django.db.models.QuerySet: The queryset, annotated for :func:`_repo_key_duplicates`.
+    """
+    return queryset.annotate(**{
+        "{}_isnull".format(field): Case(
+            When(**{"{}__isnull".format(field): True}, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+        for field in _nullable_repo_key_fields(type_obj)
+    })
 
-                duplicates_qs = type_obj.objects.filter(pk__in=existing_content)\
-                                                .filter(find_dup_qs)\
-                                                .only('pk')
-                repository_version.remove_content(duplicates_qs)
 
+def _nullable_repo_key_fields(type_obj):
+    return [
+        field for field in type_obj.repo_key_fields if type_obj._meta.get_field(field).null
+    ]
 
-def validate_duplicate_content(version):
+
+def _repo_key_duplicates(type_obj, queryset):
+    """
+    Find the content sharing the values of the repo_key_fields of the content of an outer query.
+
+    NULL values are considered equal, like by the DISTINCT of the full validation, so the outer
+    query must be annotated with :func:`_annotate_null_repo_keys`.
+
+    Args:
+        type_obj: The Content model.
+        queryset (django.db.models.QuerySet): The content of type `type_obj` to look in.
+
+    Returns:
+        django.db.models.QuerySet: The content of `queryset` other than the content of the outer
+            query, sharing its repo_key_fields.
+    """
+    nullable_fields = _nullable_repo_key_fields(type_obj)
+    duplicates = _annotate_null_repo_keys(type_obj, queryset)
+    for field in type_obj.repo_key_fields:
+        query = Q(**{field: OuterRef(field)})
+        if field in nullable_fields:
+            isnull = "{}_isnull".format(field)
+            query |= Q(**{isnull: True}) & Q(**{isnull: OuterRef(isnull)})
+        duplicates = duplicates.filter(query)
+    return duplicates.exclude(pk=OuterRef('pk'))
+
+
+def _duplicate_content_message(type_obj):
+    return _(
+        "More than one {pulp_type} content with the duplicate values for {fields}."
+    ).format(
+        pulp_type=type_obj.get_pulp_type(),
+        fields=", ".join(type_obj.repo_key_fields),
+    )
+
+
+def validate_duplicate_content(version, incremental=False):
     """
     Validate that a repository version doesn't contain duplicate content.
 
     Uses repo_key_fields to determine if content is duplicated.
 
+    Args:
+        version: The :class:`~pulpcore.plugin.models.RepositoryVersion` to validate.
+        incremental (bool): Whether to only look for duplicates of the content added by the
+            version, assuming the previous version is valid. Each added content unit is looked up
+            by its repo_key_fields, so the time spent depends on the number of added content units
+            instead of the size of the repository.
+
     Raises:
         ValueError: If repo version has duplicate content.
     """
@@ -88,37 +167,67 @@ def validate_duplicate_content(version):
 
         pulp_type = type_obj.get_pulp_type()
         repo_key_fields = type_obj.repo_key_fields
-        new_content_total = type_obj.objects.filter(
-            pk__in=version.content.filter(pulp_type=pulp_type)
-        ).count()
-        unique_new_content_total = type_obj.objects.filter(
-            pk__in=version.content.filter(pulp_type=pulp_type)
-        ).distinct(*repo_key_fields).count()
-
-        if unique_new_content_total < new_content_total:
-            error_messages.append(_(
-                "More than one {pulp_type} content with the duplicate values for {fields}."
-                ).format(
-                    pulp_type=pulp_type,
-                    fields=", ".join(repo_key_fields),
-                )
-            )
+        if incremental:
+            has_duplicates = _added_duplicates(version, type_obj).exists()
+        else:
+            new_content_total = type_obj.objects.filter(
+                pk__in=version.content.filter(pulp_type=pulp_type)
+            ).count()
+            unique_new_content_total = type_obj.objects.filter(
+                pk__in=version.content.filter(pulp_type=pulp_type)
+            ).distinct(*repo_key_fields).count()
+            has_duplicates = unique_new_content_total < new_content_total
+
+        if has_duplicates:
+            error_messages.append(_duplicate_content_message(type_obj))
     if error_messages:
         raise ValueError(
             _("Cannot create repository version. {msg}").format(msg=", ".join(error_messages))
         )
 
 
-def validate_version_paths(version):
+def _added_duplicates(version, type_obj):
+    """
+    Find the content added by a version which has a duplicate in the version.
+
+    Args:
+        version: The :class:`~pulpcore.plugin.models.RepositoryVersion`.
+        type_obj: The Content model to check.
+
+    Returns:
+        django.db.models.QuerySet: The added content of type `type_obj` sharing the values of its
+            repo_key_fields with other content of the version.
+    """
+    in_version = version._content_relationships().filter(content=OuterRef('pk'))
+    duplicates = _repo_key_duplicates(type_obj, type_obj.objects.annotate(
+        in_version=Exists(in_version)
+    ).filter(in_version=True))
+    return _annotate_null_repo_keys(type_obj, type_obj.objects.filter(
+        pk__in=version.added().filter(pulp_type=type_obj.get_pulp_type())
+    )).annotate(has_duplicate=Exists(duplicates)).filter(has_duplicate=True)
+
+
+def validate_version_paths(version, incremental=False):
     """
     Validate artifact relative paths for dupes or overlap (e.g. a/b and a/b/c).
 
+    Args:
+        version: The :class:`~pulpcore.plugin.models.RepositoryVersion` to validate.
+        incremental (bool): Whether to only validate the paths of the content added by the version,
+            assuming the previous version is valid. The paths of the content kept from the
+            previous version are looked up in its
+            :class:`~pulpcore.app.models.DirectoryListing`, so the time spent depends on the
+            number of added paths instead of the size of the repository. All the paths are
+            validated if the listings of the previous version were not computed.
+
     Raises:
         ValueError: If two artifact relative paths overlap
     """
-    paths = ContentArtifact.objects. \
-        filter(content__pk__in=version.content). \
-        values_list("relative_path", flat=True)
+    paths = _added_version_paths(version) if incremental else None
+    if paths is None:
+        paths = ContentArtifact.objects. \
+            filter(content__pk__in=version.content). \
+            values_list("relative_path", flat=True)
 
     try:
         validate_file_paths(paths)
@@ -126,14 +235,91 @@ def validate_version_paths(version):
         raise ValueError(_("Cannot create repository version. {err}.").format(err=e))
 
 
-def validate_repo_version(version):
+def _added_version_paths(version):
+    """
+    Find the paths to validate for the content added by a version.
+
+    The listings of the previous version tell which paths added by the version, or directories
+    containing them, were already served. Those are then matched against the content the version
+    kept, since the content they were served for may have been removed by the version.
+
+    Args:
+        version: The :class:`~pulpcore.plugin.models.RepositoryVersion`.
+
+    Returns:
+        list: The added paths followed by the kept paths overlapping them, or None if the listings
+            of the previous version were not computed.
+    """
+    added_paths = list(
+        ContentArtifact.objects.filter(content__in=version.added()).values_list(
+            "relative_path", flat=True)
+    )
+    try:
+        previous = version.previous()
+    except version.DoesNotExist:
+        return added_paths
+
+    directories = set()
+    for path in added_paths:
+        directory = ""
+        for name in path.split("/"):
+            directories.add(directory)
+            directory = directory + name + "/"
+    listings = {
+        path: set(entries)
+        for path, entries in previous.directory_listings.filter(
+            path__in=directories).values_list("path", "entries")
+    }
+    if "" not in listings:
+        # The root directory is listed for every version, even empty ones.
+        return None
+
+    exact_paths = set()
+    prefixes = set()
+    for path in added_paths:
+        directory = ""
+        *names, filename = path.split("/")
+        for name in names:
+            if name in listings.get(directory, ()):
+                exact_paths.add(directory + name)
+            directory = directory + name + "/"
+        entries = listings.get(directory, ())
+        if filename in entries:
+            exact_paths.add(path)
+        if filename + "/" in entries:
+            prefixes.add(path + "/")
+    if not exact_paths and not prefixes:
+        return added_paths
+
+    query = Q(relative_path__in=exact_paths)
+    matched_prefix = None
+    for prefix in sorted(prefixes):
+        # Sorted prefixes starting with a matched one follow it and need no condition of their own.
+        if matched_prefix is None or not prefix.startswith(matched_prefix):
+            matched_prefix = prefix
+            query |= Q(relative_path__startswith=prefix)
+
+    kept_content = Content.objects.filter(
+        version_memberships__in=version._content_relationships().exclude(version_added=version)
+    )
+    kept_paths = ContentArtifact.objects.filter(content__in=kept_content).filter(
+        query).values_list("relative_path", flat=True)
+    return added_paths + list(kept_paths)
+
+
+def validate_repo_version(version, incremental=False):
     """
     Validate a repo version.
 
     Checks for duplicate content, duplicate relative paths, etc.
 
+    Args:
+        version: The :class:`~pulpcore.plugin.models.RepositoryVersion` to validate.
+        incremental (bool): Whether to only validate the content added by the version, assuming
+            the previous version is valid.
+
     Raises:
         ValueError: If repo version is not valid.
     """
-    validate_duplicate_content(version)
-    validate_version_paths(version)
+    validate_duplicate_content(version, incremental=incremental)
+    validate_version_paths(version, incremental=incremental)
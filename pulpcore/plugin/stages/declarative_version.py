@@ -1,5 +1,9 @@
 import asyncio
+from gettext import gettext as _
 
+from pulpcore.constants import TASK_STATES
+from pulpcore.plugin.download import download_metrics
+from pulpcore.plugin.models import ProgressReport
 from pulpcore.plugin.tasking import WorkingDirectory
 
 from .api import create_pipeline, EndStage
@@ -50,6 +54,8 @@ class DeclarativeVersion:
             :class:`~pulpcore.plugin.stages.ContentAssociation`
         11. Unassociate any content units not declared in the stream (only when mirror=True)
             with :class:`~pulpcore.plugin.stages.ContentUnassociation`
+        12. Write a :class:`~pulpcore.plugin.models.ProgressReport` with the download metrics of
+            every remote and host the pipeline downloaded from
 
         To do this, the plugin writer should subclass the
         :class:`~pulpcore.plugin.stages.Stage` class and define its
@@ -137,6 +143,7 @@ class DeclarativeVersion:
         """
         Perform the work. This is the long-blocking call where all syncing occurs.
         """
+        metrics_before = download_metrics.snapshot()
         with WorkingDirectory():
             with self.repository.new_version() as new_version:
                 loop = asyncio.get_event_loop()
@@ -147,3 +154,29 @@ class DeclarativeVersion:
                 stages.append(EndStage())
                 pipeline = create_pipeline(stages)
                 loop.run_until_complete(pipeline)
+        self.report_download_metrics(metrics_before)
+
+    @staticmethod
+    def report_download_metrics(metrics_before):
+        """
+        Save the download metrics recorded since `metrics_before` as progress reports.
+
+        One completed :class:`~pulpcore.plugin.models.ProgressReport` is saved per remote and host
+        with `done` counting the successful downloads and `suffix` summarizing bytes, duration, time
+        to first byte, retries and backoff.
+
+        Args:
+            metrics_before (dict): A snapshot taken from
+                :data:`~pulpcore.plugin.download.download_metrics` before the downloads started.
+        """
+        for (remote_name, host), stats in download_metrics.delta(metrics_before).items():
+            ProgressReport(
+                message=_('Download metrics for {remote} from {host}').format(
+                    remote=remote_name, host=host
+                ),
+                code='downloading.metrics',
+                state=TASK_STATES.COMPLETED,
+                total=stats.downloads,
+                done=stats.downloads - stats.failures,
+                suffix=str(stats),
+            ).save()
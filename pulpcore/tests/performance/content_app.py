@@ -0,0 +1,333 @@
+"""
+Load-test benchmarks of the content app.
+
+The benchmarks create a synthetic repository version with local artifacts, served by one
+distribution, and a second distribution serving on-demand content from an upstream stub running
+in the same process. Concurrent GET requests are then sent to :meth:`Handler.stream_content` over
+HTTP, and the throughput and latency are reported for each scenario:
+
+* ``cached``: files of the repository version, with the content app caches warm.
+* ``miss``: the same files, with the content app caches cleared before every request.
+* ``listing``: directory listings of the repository version.
+* ``pull-through``: on-demand files streamed from the upstream stub.
+
+Only a database is needed. The objects are created with the configured settings, so point
+``PULP_SETTINGS`` at a development database, and are deleted when the benchmarks finish. Run it
+with::
+
+    python -m pulpcore.tests.performance.content_app --artifacts 1000 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import tempfile
+import time
+import uuid
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pulpcore.app.settings')
+django.setup()  # noqa otherwise E402: module level not at top of file
+
+from aiohttp import ClientError, ClientSession, TCPConnector, web  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from pulpcore.app.models import (  # noqa: E402
+    Artifact,
+    BaseDistribution,
+    Content,
+    ContentArtifact,
+    Remote,
+    RemoteArtifact,
+    Repository,
+)
+from pulpcore.content import cache  # noqa: E402
+from pulpcore.content.handler import Handler  # noqa: E402
+from pulpcore.content.metrics import MetricsAccessLogger  # noqa: E402
+
+SCENARIOS = ('cached', 'miss', 'listing', 'pull-through')
+
+#: The number of directories the files of the repository version are spread over.
+DIRECTORIES = 10
+
+
+class BenchmarkHandler(Handler):
+    """
+    A Handler serving repository versions attached to plain BaseDistributions.
+
+    pulpcore has no concrete distribution serving a repository version, so the repository
+    version of each distribution is provided here instead of being read from its detail model.
+    """
+
+    def __init__(self, repository_versions):
+        self.repository_versions = repository_versions
+
+    def _get_repository_version(self, distro):
+        return self.repository_versions.get(distro.pk)
+
+
+class SyntheticData:
+    """
+    The objects served by the benchmarks.
+
+    Args:
+        artifacts (int): The number of local artifacts, and of on-demand artifacts.
+        size (int): The size of each artifact in bytes.
+        upstream_url (str): The URL of the upstream stub serving the on-demand artifacts.
+    """
+
+    def __init__(self, artifacts, size, upstream_url):
+        self.artifacts = artifacts
+        self.size = size
+        self.upstream_url = upstream_url
+        self.name = 'benchmark-{}'.format(uuid.uuid4().hex[:8])
+
+        self.local_paths = []
+        self.remote_paths = []
+        self.directories = []
+
+    def create(self):
+        """
+        Create the repository version, the remote and the distributions.
+        """
+        self.repository = Repository.objects.create(name=self.name)
+        self.repository.CONTENT_TYPES = [Content]
+        self.remote = Remote.objects.create(name=self.name, url=self.upstream_url,
+                                            policy=Remote.STREAMED)
+
+        local = [Content(pulp_type='core.content') for i in range(self.artifacts)]
+        remote = [Content(pulp_type='core.content') for i in range(self.artifacts)]
+        Content.objects.bulk_create(local + remote)
+        self.content_pks = [content.pk for content in local + remote]
+
+        content_artifacts = []
+        with tempfile.TemporaryDirectory(dir=settings.WORKING_DIRECTORY) as working_dir:
+            for i, content in enumerate(local):
+                relative_path = 'dir{}/file{}'.format(i % DIRECTORIES, i)
+                path = os.path.join(working_dir, str(i))
+                with open(path, 'wb') as f:
+                    f.write(os.urandom(self.size))
+                artifact = Artifact.init_and_validate(path)
+                artifact.save()
+                content_artifacts.append(ContentArtifact(
+                    content=content, artifact=artifact, relative_path=relative_path))
+                self.local_paths.append(relative_path)
+
+        for i, content in enumerate(remote):
+            relative_path = 'file{}'.format(i)
+            content_artifacts.append(ContentArtifact(content=content, relative_path=relative_path))
+            self.remote_paths.append(relative_path)
+        ContentArtifact.objects.bulk_create(content_artifacts)
+        RemoteArtifact.objects.bulk_create([
+            RemoteArtifact(url=self.remote.get_remote_artifact_url(ca.relative_path),
+                           size=self.size, remote=self.remote, content_artifact=ca)
+            for ca in content_artifacts[len(local):]
+        ])
+
+        with self.repository.new_version() as version:
+            version.add_content(Content.objects.filter(pk__in=[c.pk for c in local]))
+        self.repository_version = version
+        self.directories = ['dir{}/'.format(i) for i in range(DIRECTORIES)]
+
+        self.local_distribution = BaseDistribution.objects.create(
+            name=self.name, base_path=self.name)
+        self.remote_distribution = BaseDistribution.objects.create(
+            name=self.name + '-remote', base_path=self.name + '-remote', remote=self.remote)
+
+    def delete(self):
+        """
+        Delete the objects created, and the files of the artifacts.
+        """
+        BaseDistribution.objects.filter(name__startswith=self.name).delete()
+        self.repository.delete()
+        artifacts = list(Artifact.objects.filter(contentartifact__content__in=self.content_pks))
+        Content.objects.filter(pk__in=self.content_pks).delete()
+        for artifact in artifacts:
+            artifact.delete()
+        self.remote.delete()
+
+
+def percentile(latencies, fraction):
+    """
+    Returns:
+        float: The latency below which `fraction` of the sorted `latencies` are.
+    """
+    if not latencies:
+        return float('nan')
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+async def run_scenario(session, urls, requests, concurrency, before_request=None):
+    """
+    Send requests for random `urls` from `concurrency` clients at once.
+
+    Args:
+        session (:class:`aiohttp.ClientSession`): The client session.
+        urls (list): The URLs to request.
+        requests (int): The total number of requests.
+        concurrency (int): The number of requests in flight at once.
+        before_request (callable): A function called before every request, if any.
+
+    Returns:
+        dict: The number of requests and errors, the requests per second and the 50th and 99th
+            percentile latencies in milliseconds. Requests failing with a client error, e.g. a
+            connection reset or a timeout, are counted as errors and not in the latencies.
+    """
+    latencies = []
+    errors = 0
+    remaining = requests
+
+    async def client():
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            if before_request:
+                before_request()
+            started = time.monotonic()
+            try:
+                async with session.get(random.choice(urls)) as response:
+                    await response.read()
+            except (ClientError, asyncio.TimeoutError):
+                errors += 1
+                continue
+            if response.status != 200:
+                errors += 1
+            latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*[client() for i in range(concurrency)])
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': requests / elapsed,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def clear_caches():
+    """
+    Clear the content app caches, so requests are served from the database.
+    """
+    cache.path_cache.clear()
+    cache.version_paths_cache.clear()
+    cache.latest_version_cache.clear()
+
+
+async def start_site(app, **kwargs):
+    """
+    Serve an aiohttp application on a free local port.
+
+    Args:
+        app (:class:`aiohttp.web.Application`): The application.
+        kwargs (dict): Keyword arguments for :class:`aiohttp.web.AppRunner`.
+
+    Returns:
+        tuple: The :class:`aiohttp.web.AppRunner` and the URL of the application.
+    """
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    runner = web.AppRunner(app, **kwargs)
+    await runner.setup()
+    await web.SockSite(runner, sock).start()
+    return runner, 'http://127.0.0.1:{}'.format(sock.getsockname()[1])
+
+
+def upstream_app(size, latency):
+    """
+    An aiohttp application serving `size` bytes at any path after `latency` seconds.
+    """
+    body = os.urandom(size)
+
+    async def serve(request):
+        if latency:
+            await asyncio.sleep(latency)
+        return web.Response(body=body)
+
+    app = web.Application()
+    app.add_routes([web.get('/{path:.+}', serve)])
+    return app
+
+
+def content_app(handler):
+    """
+    A content app serving `handler` like :func:`pulpcore.content.server` does.
+    """
+    app = web.Application()
+    app.add_routes([web.get(settings.CONTENT_PATH_PREFIX + '{path:.+}', handler.stream_content)])
+    return app
+
+
+async def benchmark(options):
+    upstream, upstream_url = await start_site(
+        upstream_app(options.size, options.upstream_latency / 1000), access_log=None)
+    data = SyntheticData(options.artifacts, options.size, upstream_url + '/')
+    runner = None
+    try:
+        data.create()
+        handler = BenchmarkHandler({data.local_distribution.pk: data.repository_version})
+        runner, url = await start_site(content_app(handler),
+                                       access_log_class=MetricsAccessLogger)
+
+        def urls(distribution, paths):
+            return ['{}{}{}/{}'.format(url, settings.CONTENT_PATH_PREFIX, distribution.base_path,
+                                       path) for path in paths]
+
+        scenarios = {
+            'cached': (urls(data.local_distribution, data.local_paths), None),
+            'miss': (urls(data.local_distribution, data.local_paths), clear_caches),
+            'listing': (urls(data.local_distribution, data.directories), None),
+            'pull-through': (urls(data.remote_distribution, data.remote_paths), None),
+        }
+        connector = TCPConnector(limit=options.concurrency)
+        async with ClientSession(connector=connector) as session:
+            # Warm up the caches and the database connections.
+            await run_scenario(session, scenarios['cached'][0], len(data.local_paths),
+                               options.concurrency)
+
+            print('{:<14}{:>10}{:>8}{:>12}{:>12}{:>12}'.format(
+                'scenario', 'requests', 'errors', 'requests/s', 'p50 (ms)', 'p99 (ms)'))
+            for name in options.scenarios:
+                scenario_urls, before_request = scenarios[name]
+                result = await run_scenario(session, scenario_urls, options.requests,
+                                            options.concurrency, before_request)
+                print('{:<14}{requests:>10}{errors:>8}{rps:>12.1f}{p50:>12.2f}{p99:>12.2f}'.format(
+                    name, **result))
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        data.delete()
+        await upstream.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the throughput and latency of the '
+                                                 'content app.')
+    parser.add_argument('--artifacts', type=int, default=1000,
+                        help='The number of local artifacts, and of on-demand artifacts.')
+    parser.add_argument('--size', type=int, default=10240,
+                        help='The size of the artifacts in bytes.')
+    parser.add_argument('--requests', type=int, default=5000,
+                        help='The number of requests of each scenario.')
+    parser.add_argument('--concurrency', type=int, default=50,
+                        help='The number of requests in flight at once.')
+    parser.add_argument('--upstream-latency', type=float, default=0,
+                        help='The milliseconds the upstream waits before responding.')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS,
+                        help='The scenarios to run.')
+    options = parser.parse_args()
+    # Logging every request would be benchmarked too.
+    logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(benchmark(options))
+
+
+if __name__ == '__main__':
+    main()
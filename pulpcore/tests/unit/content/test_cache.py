@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from pulpcore.content.cache import LRUCache
+
+
+class LRUCacheTestCase(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_counts_hits_and_misses(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_pop_and_clear(self):
+        cache = LRUCache(3)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.pop('a'))
+        cache.clear()
+        self.assertIsNone(cache.get('b'))
+
+    def test_set_discards_values_of_older_generations(self):
+        cache = LRUCache(3)
+        generation = cache.generation
+        cache.clear()
+        cache.set('a', 1, generation)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1, cache.generation)
+        self.assertEqual(cache.get('a'), 1)
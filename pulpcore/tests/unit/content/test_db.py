@@ -0,0 +1,22 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from pulpcore.content.db import run_in_db_thread
+
+
+class RunInDbThreadTestCase(TestCase):
+
+    def run_in_loop(self, coroutine):
+        return asyncio.get_event_loop().run_until_complete(coroutine)
+
+    def test_runs_in_pool_thread(self):
+        thread = self.run_in_loop(run_in_db_thread(threading.current_thread))
+        self.assertTrue(thread.name.startswith('pulp-content-db'))
+
+    def test_passes_arguments(self):
+        self.assertEqual(self.run_in_loop(run_in_db_thread(int, '10', base=2)), 2)
+
+    def test_raises_exceptions(self):
+        with self.assertRaises(ValueError):
+            self.run_in_loop(run_in_db_thread(int, 'foo'))
@@ -1,10 +1,26 @@
+import asyncio
+from datetime import datetime, timezone
+import os
+import shutil
+import tempfile
 from unittest.mock import Mock
 
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from aiohttp.web_exceptions import HTTPForbidden
+from django.core.exceptions import MultipleObjectsReturned
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from pulpcore.content import Handler
-from pulpcore.plugin.models import Artifact, Content, ContentArtifact
+from pulpcore.content.cache import (
+    guard_cache,
+    permit_cache,
+    redirect_cache,
+    version_paths_cache,
+)
+from pulpcore.content.inflight import DownloadAborted, InFlightDownload, in_flight_downloads
+from pulpcore.plugin.models import Artifact, Content, ContentArtifact, Repository
 
 
 class HandlerSaveContentTestCase(TestCase):
@@ -44,3 +60,200 @@ class HandlerSaveContentTestCase(TestCase):
         c2 = Content.objects.get(pk=self.c2.pk)
         self.assertEqual(existing_artifact.pk, new_artifact.pk)
         self.assertEqual(c2._artifacts.get().pk, existing_artifact.pk)
+
+
+class HandlerConditionalRequestTestCase(TestCase):
+
+    def setUp(self):
+        self.created = datetime(2020, 5, 1, 12, 30, 15, 500, tzinfo=timezone.utc)
+
+    def request_mock(self, headers, if_modified_since=None):
+        return Mock(headers=headers, if_modified_since=if_modified_since)
+
+    @override_settings(CONTENT_APP_CACHE_CONTROL='max-age=60')
+    def test_cache_headers(self):
+        self.assertEqual(Handler.cache_headers('abc123', self.created), {
+            'ETag': '"abc123"',
+            'Last-Modified': 'Fri, 01 May 2020 12:30:15 GMT',
+            'Cache-Control': 'max-age=60',
+        })
+
+    def test_if_none_match(self):
+        request = self.request_mock({'If-None-Match': '"foo", W/"abc123"'})
+        self.assertTrue(Handler._not_modified(request, '"abc123"'))
+        self.assertFalse(Handler._not_modified(request, '"bar"'))
+        self.assertFalse(Handler._not_modified(request, None))
+
+    def test_if_none_match_ignores_if_modified_since(self):
+        request = self.request_mock({'If-None-Match': '"foo"'}, if_modified_since=self.created)
+        self.assertFalse(Handler._not_modified(request, '"abc123"', self.created))
+
+    def test_if_modified_since(self):
+        since = self.created.replace(microsecond=0)
+        self.assertTrue(Handler._not_modified(self.request_mock({}, since), None, self.created))
+        since = since.replace(second=14)
+        self.assertFalse(Handler._not_modified(self.request_mock({}, since), None, self.created))
+
+    def test_file_response(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with open(os.path.join(media_root, 'artifact'), 'wb') as f:
+            f.write(b'foo')
+        artifact = Mock(sha256='abc123', pulp_created=self.created)
+        artifact.file.name = 'artifact'
+        content_artifact = Mock(artifact=artifact)
+
+        async def serve(request):
+            return Handler()._serve_content_artifact(content_artifact, {}, request)
+
+        async def run():
+            app = web.Application()
+            app.router.add_get('/', serve)
+            async with TestClient(TestServer(app)) as client:
+                response = await client.get('/')
+                self.assertEqual(response.status, 200)
+                self.assertEqual(await response.read(), b'foo')
+                self.assertEqual(response.headers['ETag'], '"abc123"')
+                self.assertEqual(response.headers['Last-Modified'],
+                                 'Fri, 01 May 2020 12:30:15 GMT')
+
+                response = await client.get('/', headers={'If-None-Match': '"abc123"'})
+                self.assertEqual(response.status, 304)
+                self.assertEqual(response.headers['ETag'], '"abc123"')
+
+                response = await client.get('/', headers={'If-None-Match': '"foo"'})
+                self.assertEqual(response.status, 200)
+
+        with override_settings(MEDIA_ROOT=media_root,
+                               DEFAULT_FILE_STORAGE='pulpcore.app.models.storage.FileSystem'):
+            asyncio.get_event_loop().run_until_complete(run())
+
+
+class HandlerMatchContentArtifactTestCase(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create()
+        self.repository.CONTENT_TYPES = [Content]
+        content = Content.objects.create(pulp_type='core.content')
+        self.ca = ContentArtifact.objects.create(content=content, relative_path='a/b.rpm')
+        with self.repository.new_version() as version:
+            version.add_content(Content.objects.filter(pk=content.pk))
+        self.version = version
+        self.distro = Mock(base_path='foo')
+        self.addCleanup(version_paths_cache.clear)
+
+    def test_match_is_cached(self):
+        self.assertEqual(Handler._match_content_artifact(self.distro, self.version, 'a/b.rpm'),
+                         self.ca)
+        self.assertEqual(version_paths_cache.get((self.version.pk, 'a/b.rpm')), self.ca.pk)
+        with self.assertNumQueries(1):
+            Handler._match_content_artifact(self.distro, self.version, 'a/b.rpm')
+
+        self.assertIsNone(Handler._match_content_artifact(self.distro, self.version, 'a/c.rpm'))
+        self.assertIsNone(version_paths_cache.get((self.version.pk, 'a/c.rpm'), 'missing'))
+        with self.assertNumQueries(0):
+            Handler._match_content_artifact(self.distro, self.version, 'a/c.rpm')
+
+    def test_multiple_matches(self):
+        content = Content.objects.create(pulp_type='core.content')
+        ContentArtifact.objects.create(content=content, relative_path='a/b.rpm')
+        with self.repository.new_version() as version:
+            version.add_content(Content.objects.filter(pk=content.pk))
+        with self.assertRaises(MultipleObjectsReturned):
+            Handler._match_content_artifact(self.distro, version, 'a/b.rpm')
+
+
+class HandlerPermitTestCase(TestCase):
+
+    def setUp(self):
+        self.guard = Mock(pk=1)
+        self.guard.permit_cache_key.return_value = ('key', 60)
+        self.distribution = Mock(pk=2, content_guard_id=1)
+        self.distribution.content_guard.cast.return_value = self.guard
+        self.addCleanup(guard_cache.clear)
+        self.addCleanup(permit_cache.clear)
+
+    def test_permit_cached(self):
+        Handler._permit(Mock(), self.distribution)
+        Handler._permit(Mock(), self.distribution)
+        self.guard.permit.assert_called_once()
+        self.distribution.content_guard.cast.assert_called_once()
+
+    def test_denial_cached(self):
+        self.guard.permit.side_effect = PermissionError('denied')
+        for i in range(2):
+            with self.assertRaises(HTTPForbidden):
+                Handler._permit(Mock(), self.distribution)
+        self.guard.permit.assert_called_once()
+
+    def test_not_cached_without_key(self):
+        self.guard.permit_cache_key.return_value = None
+        Handler._permit(Mock(), self.distribution)
+        Handler._permit(Mock(), self.distribution)
+        self.assertEqual(self.guard.permit.call_count, 2)
+
+    def test_expired(self):
+        self.guard.permit_cache_key.return_value = ('key', -1)
+        Handler._permit(Mock(), self.distribution)
+        Handler._permit(Mock(), self.distribution)
+        self.assertEqual(self.guard.permit.call_count, 2)
+
+
+class HandlerRedirectUrlTestCase(TestCase):
+
+    def setUp(self):
+        self.storage = Mock(querystring_expire=100)
+        self.storage.url.side_effect = lambda name, parameters: '{}?{}'.format(
+            name, len(self.storage.url.mock_calls))
+        artifact = Mock(file=Mock(storage=self.storage))
+        artifact.file.name = 'artifact/ab/cdef'
+        self.ca = Mock(artifact_id=1, artifact=artifact, relative_path='foo.rpm')
+        self.addCleanup(redirect_cache.clear)
+
+    def test_cached(self):
+        url = Handler._get_redirect_url(self.ca)
+        self.assertEqual(Handler._get_redirect_url(self.ca), url)
+        self.storage.url.assert_called_once_with(
+            'artifact/ab/cdef', parameters={'ResponseContentDisposition':
+                                            'attachment;filename=foo.rpm'})
+
+    @override_settings(CONTENT_APP_REDIRECT_CACHE_FRACTION=0)
+    def test_expired(self):
+        url = Handler._get_redirect_url(self.ca)
+        self.assertNotEqual(Handler._get_redirect_url(self.ca), url)
+
+    @override_settings(CONTENT_APP_REDIRECT_STABLE_URLS=True)
+    def test_stable(self):
+        url = Handler._get_redirect_url(self.ca)
+        self.ca.relative_path = 'bar.rpm'
+        self.assertEqual(Handler._get_redirect_url(self.ca), url)
+        self.storage.url.assert_called_once_with('artifact/ab/cdef', parameters={})
+
+
+class HandlerDownloadRemoteArtifactTestCase(TestCase):
+
+    def test_cancelled(self):
+        download = InFlightDownload()
+        key = ('remote', 'url')
+        in_flight_downloads[key] = download
+        remote = Mock()
+
+        async def run():
+            await asyncio.sleep(3600)
+
+        remote.get_downloader.return_value.run = run
+
+        async def cancel_leader():
+            leader = asyncio.ensure_future(
+                Handler()._download_remote_artifact(remote, Mock(), download, key))
+            follower = asyncio.ensure_future(download.stream(Mock(), Mock()))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.wait([leader, follower], timeout=1)
+            self.assertTrue(leader.cancelled())
+            self.assertTrue(follower.done())
+            self.assertIsInstance(follower.exception(), DownloadAborted)
+
+        asyncio.get_event_loop().run_until_complete(cancel_leader())
+        self.assertTrue(download.done)
+        self.assertNotIn(key, in_flight_downloads)
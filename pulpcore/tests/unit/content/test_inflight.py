@@ -0,0 +1,79 @@
+import asyncio
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from pulpcore.content.inflight import InFlightDownload
+
+
+class FakeResponse:
+
+    def __init__(self):
+        self.headers = {}
+        self.prepared = False
+        self.body = b''
+        self.eof = False
+
+    async def prepare(self, request):
+        self.prepared = True
+
+    async def write(self, data):
+        self.body += data
+
+    async def write_eof(self):
+        self.eof = True
+
+
+class InFlightDownloadTestCase(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.file = tempfile.NamedTemporaryFile(delete=False)
+        self.addCleanup(os.unlink, self.file.name)
+
+    def write(self, download, data):
+        self.file.write(data)
+        self.file.flush()
+        download.add_data(self.file.name, len(data))
+
+    def test_streams_to_all_requests(self):
+        download = InFlightDownload()
+        responses = [FakeResponse(), FakeResponse()]
+
+        async def run():
+            streams = [
+                asyncio.ensure_future(download.stream(mock.Mock(), response))
+                for response in responses
+            ]
+            await asyncio.sleep(0)
+            download.set_headers([('Content-Length', '6')])
+            self.write(download, b'foo')
+            await asyncio.sleep(0)
+            late = FakeResponse()
+            responses.append(late)
+            streams.append(asyncio.ensure_future(download.stream(mock.Mock(), late)))
+            self.write(download, b'bar')
+            download.finish()
+            download.close()
+            await asyncio.gather(*streams)
+
+        self.loop.run_until_complete(run())
+        for response in responses:
+            self.assertEqual(response.body, b'foobar')
+            self.assertEqual(response.headers, {'Content-Length': '6'})
+            self.assertTrue(response.eof)
+        self.assertIsNone(download._fd)
+
+    def test_raises_failure_before_data(self):
+        download = InFlightDownload()
+        response = FakeResponse()
+
+        async def run():
+            stream = asyncio.ensure_future(download.stream(mock.Mock(), response))
+            await asyncio.sleep(0)
+            download.finish(ValueError())
+            await stream
+
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(run())
+        self.assertFalse(response.prepared)
@@ -0,0 +1,100 @@
+import asyncio
+from unittest import TestCase, mock
+
+from django.test import TestCase as DjangoTestCase
+
+from pulpcore.app.models import BaseDistribution, ContentAccess
+from pulpcore.content.metrics import (
+    AccessStatisticsWriter,
+    ContentAppMetrics,
+    MetricsAccessLogger,
+)
+
+
+class ContentAppMetricsTestCase(TestCase):
+
+    def test_record(self):
+        metrics = ContentAppMetrics()
+        metrics.record('foo', 200, 100, 0.002)
+        metrics.record('foo', 404, 0, 0.3)
+        metrics.record(None, 404, 0, 0.001)
+
+        distributions = metrics.to_dict()['distributions']
+        self.assertEqual(distributions['foo']['requests'], 2)
+        self.assertEqual(distributions['foo']['statuses'], {'200': 1, '404': 1})
+        self.assertEqual(distributions['foo']['bytes'], 100)
+        self.assertEqual(distributions['foo']['latency']['0.005'], 1)
+        self.assertEqual(distributions['foo']['latency']['0.5'], 1)
+        self.assertEqual(sum(distributions['foo']['latency'].values()), 2)
+        self.assertEqual(distributions['']['requests'], 1)
+
+    def test_increment(self):
+        metrics = ContentAppMetrics()
+        metrics.increment('pull_through.downloads')
+        metrics.increment('pull_through.downloads', 2)
+        self.assertEqual(metrics.to_dict()['counters'], {'pull_through.downloads': 3})
+
+    def test_caches(self):
+        caches = ContentAppMetrics().to_dict()['caches']
+        self.assertEqual(set(caches['path_cache']), {'size', 'hits', 'misses'})
+
+
+@mock.patch('pulpcore.content.metrics.access_statistics')
+@mock.patch('pulpcore.content.metrics.content_app_metrics')
+class MetricsAccessLoggerTestCase(TestCase):
+
+    def test_log(self, content_app_metrics, access_statistics):
+        request = {'distribution': 'foo', 'distribution_id': 'd1', 'relative_path': 'a.rpm'}
+        response = mock.Mock(status=200, body_length=100)
+        MetricsAccessLogger(mock.Mock()).log(request, response, 0.5)
+        content_app_metrics.record.assert_called_once_with('foo', 200, 100, 0.5)
+        access_statistics.record.assert_called_once_with('d1', 'a.rpm', False)
+
+    def test_log_error(self, content_app_metrics, access_statistics):
+        response = mock.Mock(status=404, body_length=0)
+        MetricsAccessLogger(mock.Mock()).log({}, response, 0.5)
+        content_app_metrics.record.assert_called_once_with(None, 404, 0, 0.5)
+        access_statistics.record.assert_not_called()
+
+
+class AccessStatisticsWriterTestCase(TestCase):
+
+    def flush(self, writer):
+        written = []
+
+        async def run_in_db_thread(func, counts):
+            written.append(counts)
+
+        with mock.patch('pulpcore.content.metrics.run_in_db_thread', run_in_db_thread):
+            asyncio.get_event_loop().run_until_complete(writer.flush())
+        return written
+
+    def test_counts_are_aggregated(self):
+        writer = AccessStatisticsWriter(10)
+        writer.record('d1', 'a.rpm')
+        writer.record('d1', 'a.rpm', pull_through=True)
+        writer.record('d2', 'a.rpm')
+
+        written = self.flush(writer)
+        self.assertEqual(written, [{('d1', 'a.rpm'): [2, 1], ('d2', 'a.rpm'): [1, 0]}])
+        self.assertEqual(self.flush(writer), [])
+
+    def test_disabled(self):
+        writer = AccessStatisticsWriter(None)
+        writer.record('d1', 'a.rpm')
+        self.assertEqual(self.flush(writer), [])
+
+
+class ContentAccessTestCase(DjangoTestCase):
+
+    def test_add_counts(self):
+        distribution = BaseDistribution.objects.create(name='foo', base_path='foo')
+        ContentAccess.add_counts({(distribution.pk, 'a.rpm'): (2, 1)})
+        ContentAccess.add_counts({(distribution.pk, 'a.rpm'): (1, 0),
+                                  (distribution.pk, 'b.rpm'): (1, 1)})
+
+        counts = {
+            access.relative_path: (access.hits, access.pull_through_hits)
+            for access in distribution.accesses.all()
+        }
+        self.assertEqual(counts, {'a.rpm': (3, 1), 'b.rpm': (1, 1)})
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from unittest import TestCase, mock
+
+from django.db import OperationalError
+
+from pulpcore.content.persist import ArtifactSaveQueue
+
+
+class ArtifactSaveQueueTestCase(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+
+    def download_result(self, sha256):
+        return mock.Mock(artifact_attributes={'sha256': sha256})
+
+    def test_saves_of_a_digest_run_one_at_a_time(self):
+        queue = ArtifactSaveQueue(concurrency=4)
+        lock = threading.Lock()
+        running = {'abc': 0, 'def': 0}
+        max_running = {'abc': 0, 'def': 0}
+
+        def save_artifact(download_result, remote_artifact):
+            digest = download_result.artifact_attributes['sha256']
+            with lock:
+                running[digest] += 1
+                max_running[digest] = max(max_running[digest], running[digest])
+            threading.Event().wait(0.01)
+            with lock:
+                running[digest] -= 1
+            return digest
+
+        saves = [
+            queue.save(save_artifact, self.download_result(digest), mock.Mock())
+            for digest in ('abc', 'abc', 'abc', 'def')
+        ]
+        results = self.loop.run_until_complete(asyncio.gather(*saves))
+        self.assertEqual(results, ['abc', 'abc', 'abc', 'def'])
+        self.assertEqual(max_running['abc'], 1)
+        self.assertEqual(queue._locks, {})
+        self.loop.run_until_complete(queue.join())
+
+    def test_retries_database_errors(self):
+        queue = ArtifactSaveQueue(concurrency=1, retries=2, retry_delay=0)
+        save_artifact = mock.Mock(side_effect=[OperationalError(), 'artifact'])
+        result = self.loop.run_until_complete(
+            queue.save(save_artifact, self.download_result('abc'), mock.Mock()))
+        self.assertEqual(result, 'artifact')
+        self.assertEqual(save_artifact.call_count, 2)
+
+    def test_gives_up(self):
+        queue = ArtifactSaveQueue(concurrency=1, retries=1, retry_delay=0)
+        save_artifact = mock.Mock(side_effect=OperationalError())
+        with self.assertRaises(OperationalError):
+            self.loop.run_until_complete(
+                queue.save(save_artifact, self.download_result('abc'), mock.Mock()))
+        self.assertEqual(save_artifact.call_count, 2)
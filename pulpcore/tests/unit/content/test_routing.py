@@ -0,0 +1,51 @@
+from unittest import TestCase, mock
+
+from pulpcore.content.routing import RoutingTable
+
+
+class RoutingTableTestCase(TestCase):
+
+    def setUp(self):
+        self.foo = mock.Mock(base_path='foo', content_guard_id=None, remote_id=None)
+        self.foo_bar = mock.Mock(base_path='foo/bar', content_guard_id=None, remote_id=None)
+        self.table = RoutingTable()
+        patcher = mock.patch.multiple(
+            RoutingTable,
+            _cast_distributions=mock.Mock(return_value=[self.foo_bar]),
+            _get_fingerprint=mock.Mock(return_value=(1, None)),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_match_loads_lazily(self):
+        route = self.table.match('foo/bar/baz.rpm')
+        self.assertIs(route.distribution, self.foo_bar)
+        RoutingTable._cast_distributions.assert_called_once_with()
+
+    def test_match_requires_a_parent_directory(self):
+        self.assertIsNone(self.table.match('foo/bar'))
+        self.assertIs(self.table.match('foo/bar/').distribution, self.foo_bar)
+        self.assertIsNone(self.table.match('foo/baz/bar.rpm'))
+
+    def test_add(self):
+        self.table.load()
+        self.table.add(self.foo)
+        self.assertIs(self.table.match('foo/baz/bar.rpm').distribution, self.foo)
+        self.assertIs(self.table.match('foo/bar/baz.rpm').distribution, self.foo_bar)
+
+    def test_invalidate_reloads(self):
+        self.table.load()
+        self.table.invalidate()
+        self.table.match('foo/bar/baz.rpm')
+        self.assertEqual(RoutingTable._cast_distributions.call_count, 2)
+
+    def test_refresh_if_changed(self):
+        self.table.load()
+        self.table.refresh_if_changed()
+        self.table.match('foo/bar/baz.rpm')
+        self.assertEqual(RoutingTable._cast_distributions.call_count, 1)
+
+        RoutingTable._get_fingerprint.return_value = (2, None)
+        self.table.refresh_if_changed()
+        self.table.match('foo/bar/baz.rpm')
+        self.assertEqual(RoutingTable._cast_distributions.call_count, 2)
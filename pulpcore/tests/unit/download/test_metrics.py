@@ -0,0 +1,48 @@
+from unittest import TestCase, mock
+
+from pulpcore.download.metrics import DownloadMetrics
+
+
+class TestDownloadMetrics(TestCase):
+
+    def setUp(self):
+        self.metrics = DownloadMetrics()
+
+    @staticmethod
+    def downloader(url='https://example.com/a', remote_name='remote', size=10, retries=0,
+                   backoff_time=0.0):
+        return mock.Mock(url=url, remote_name=remote_name, _size=size, retries=retries,
+                         backoff_time=backoff_time)
+
+    def test_record_aggregates_per_remote_and_host(self):
+        self.metrics.record(self.downloader(), 1.0, 3.0, first_byte=1.5)
+        self.metrics.record(self.downloader(retries=2, backoff_time=1.5), 2.0, 3.0, failed=True)
+        self.metrics.record(self.downloader(url='https://other.org/b'), 1.0, 2.0)
+
+        snapshot = self.metrics.snapshot()
+        stats = snapshot[('remote', 'example.com')]
+        self.assertEqual(stats.downloads, 2)
+        self.assertEqual(stats.failures, 1)
+        self.assertEqual(stats.bytes, 20)
+        self.assertEqual(stats.duration, 3.0)
+        self.assertEqual(stats.time_to_first_byte, 0.5)
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(stats.backoff_time, 1.5)
+        self.assertEqual(snapshot[('remote', 'other.org')].downloads, 1)
+
+    def test_delta_only_includes_new_downloads(self):
+        self.metrics.record(self.downloader(), 1.0, 2.0)
+        self.metrics.record(self.downloader(url='https://other.org/b'), 1.0, 2.0)
+        before = self.metrics.snapshot()
+        self.metrics.record(self.downloader(size=5), 1.0, 2.0)
+
+        delta = self.metrics.delta(before)
+        self.assertEqual(list(delta), [('remote', 'example.com')])
+        self.assertEqual(delta[('remote', 'example.com')].downloads, 1)
+        self.assertEqual(delta[('remote', 'example.com')].bytes, 5)
+
+    def test_snapshot_is_a_copy(self):
+        self.metrics.record(self.downloader(), 1.0, 2.0)
+        snapshot = self.metrics.snapshot()
+        self.metrics.record(self.downloader(), 1.0, 2.0)
+        self.assertEqual(snapshot[('remote', 'example.com')].downloads, 1)
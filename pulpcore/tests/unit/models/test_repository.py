@@ -1,7 +1,14 @@
 from itertools import compress
+from unittest import mock
 
-from django.test import TestCase
-from pulpcore.plugin.models import Content, Repository, RepositoryVersion
+from django.test import TestCase, override_settings
+from pulpcore.app.models import (
+    BaseDistribution,
+    DirectoryListing,
+    MaterializedVersionContent,
+    RepositoryVersionContentDetails,
+)
+from pulpcore.plugin.models import Content, ContentArtifact, Repository, RepositoryVersion
 
 
 class RepositoryVersionTestCase(TestCase):
@@ -91,6 +98,15 @@ class RepositoryVersionTestCase(TestCase):
         self.assertCountEqual(added_pks, compress(self.pks, added), added_pks)
         self.assertCountEqual(removed_pks, compress(self.pks, removed), removed_pks)
 
+    def test_add_remove_no_content(self):
+        """Verify that adding and removing an empty set of content units does nothing."""
+        with self.repository.new_version() as version1:
+            version1.add_content(self.content_qs(self.pks[:2]))
+            version1.remove_content(self.content_qs([]))
+            version1.add_content(self.content_qs([]))
+            self.verify_content_sets(version1, content=[1]*2 + [0]*3, added=[1]*2 + [0]*3,
+                                     removed=[])
+
     def test_add_remove(self):
         """Verify that adding and then removing content units is handled properly."""
         latest_version = self.repository.latest_version()
@@ -256,6 +272,239 @@ class RepositoryVersionTestCase(TestCase):
             self.pks_of_next_qs(qs_generator)
 
 
+@override_settings(MATERIALIZE_REPOSITORY_VERSION_CONTENT=True)
+class MaterializedVersionContentTestCase(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create()
+        self.repository.CONTENT_TYPES = [Content]
+        self.repository.save()
+
+        contents = [Content(pulp_type="core.content") for _ in range(0, 4)]
+        Content.objects.bulk_create(contents)
+        self.pks = [c.pk for c in contents]
+
+    def materialized_pks(self, version):
+        return set(MaterializedVersionContent.objects.filter(
+            repository_version=version).values_list('content_id', flat=True))
+
+    def test_latest_version_is_materialized(self):
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks[:3]))
+            self.assertFalse(version1.materialized)
+        self.assertTrue(version1.materialized)
+        self.assertEqual(self.materialized_pks(version1), set(self.pks[:3]))
+
+        with self.repository.new_version() as version2:
+            version2.remove_content(Content.objects.filter(pk=self.pks[0]))
+            version2.add_content(Content.objects.filter(pk=self.pks[3]))
+        self.assertTrue(version2.materialized)
+        self.assertCountEqual(version2.content.values_list('pk', flat=True), self.pks[1:])
+
+        version1.refresh_from_db()
+        self.assertFalse(version1.materialized)
+        self.assertEqual(self.materialized_pks(version1), set())
+        self.assertCountEqual(version1.content.values_list('pk', flat=True), self.pks[:3])
+
+    def test_undistributed_version_is_released(self):
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks[:3]))
+        with mock.patch.object(BaseDistribution, '_served_repository_version',
+                               return_value=version1):
+            distribution = BaseDistribution.objects.create(name='foo', base_path='foo')
+            with mock.patch.object(RepositoryVersion, '_is_distributed', return_value=True):
+                with self.repository.new_version() as version2:
+                    version2.add_content(Content.objects.filter(pk=self.pks[3]))
+            version1.refresh_from_db()
+            self.assertTrue(version1.materialized)
+
+            distribution.delete()
+        version1.refresh_from_db()
+        self.assertFalse(version1.materialized)
+        self.assertEqual(self.materialized_pks(version1), set())
+        self.assertFalse(version1.directory_listings.exists())
+        self.assertTrue(version2.materialized)
+
+    def test_content_batch_qs(self):
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks))
+
+        batches = version1.content_batch_qs(batch_size=3)
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+
+    @override_settings(MATERIALIZE_REPOSITORY_VERSION_CONTENT=False)
+    def test_disabled(self):
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks))
+        self.assertFalse(version1.materialized)
+        self.assertEqual(self.materialized_pks(version1), set())
+
+
+class ContentCountsTestCase(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create()
+        self.repository.CONTENT_TYPES = [Content]
+        self.repository.save()
+
+        contents = [Content(pulp_type="core.content") for _ in range(0, 5)]
+        Content.objects.bulk_create(contents)
+        self.pks = [c.pk for c in contents]
+
+    def counts(self, version):
+        return {
+            count.count_type: count.count
+            for count in version.counts.filter(content_type="core.content")
+        }
+
+    def test_incremental_counts(self):
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks[:4]))
+        self.assertEqual(self.counts(version1), {RepositoryVersionContentDetails.ADDED: 4,
+                                                 RepositoryVersionContentDetails.PRESENT: 4})
+
+        with self.repository.new_version() as version2:
+            version2.remove_content(Content.objects.filter(pk__in=self.pks[:2]))
+            version2.add_content(Content.objects.filter(pk=self.pks[4]))
+        expected = {RepositoryVersionContentDetails.ADDED: 1,
+                    RepositoryVersionContentDetails.PRESENT: 3,
+                    RepositoryVersionContentDetails.REMOVED: 2}
+        self.assertEqual(self.counts(version2), expected)
+
+        version2._compute_counts(full=True)
+        self.assertEqual(self.counts(version2), expected)
+
+        with self.repository.new_version() as version3:
+            version3.remove_content(Content.objects.filter(pk__in=self.pks))
+        self.assertEqual(self.counts(version3), {RepositoryVersionContentDetails.REMOVED: 3})
+
+    def test_previous_version_without_counts(self):
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks[:4]))
+        version1.counts.all().delete()
+
+        with self.repository.new_version() as version2:
+            version2.remove_content(Content.objects.filter(pk=self.pks[0]))
+        self.assertEqual(self.counts(version2), {RepositoryVersionContentDetails.PRESENT: 3,
+                                                 RepositoryVersionContentDetails.REMOVED: 1})
+
+
+class DiffTestCase(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create()
+        self.repository.CONTENT_TYPES = [Content]
+        self.repository.save()
+
+        contents = [Content(pulp_type="core.content") for _ in range(0, 6)]
+        Content.objects.bulk_create(contents)
+        self.pks = sorted(c.pk for c in contents)
+
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks[:4]))
+        with self.repository.new_version() as version2:
+            version2.remove_content(Content.objects.filter(pk__in=self.pks[:2]))
+            version2.add_content(Content.objects.filter(pk__in=self.pks[4:]))
+        with self.repository.new_version() as version3:
+            version3.add_content(Content.objects.filter(pk=self.pks[0]))
+        self.version1 = version1
+        self.version3 = version3
+
+    def assert_diff(self, version, base_version):
+        expected = [(self.pks[1], 'core.content', False), (self.pks[4], 'core.content', True),
+                    (self.pks[5], 'core.content', True)]
+        self.assertEqual(version.diff(base_version), expected)
+        self.assertEqual(version.diff(base_version, limit=2), expected[:2])
+        self.assertEqual(version.diff(base_version, after=self.pks[1]), expected[1:])
+        self.assertEqual(version.diff(base_version, pulp_type='core.other'), [])
+
+        self.assertCountEqual(version.added(base_version).values_list('pk', flat=True),
+                              self.pks[4:])
+        self.assertCountEqual(version.removed(base_version).values_list('pk', flat=True),
+                              [self.pks[1]])
+
+    def test_diff(self):
+        self.assert_diff(self.version3, self.version1)
+
+    def test_diff_materialized(self):
+        self.version1.materialize_content()
+        self.version3.materialize_content()
+        self.assert_diff(self.version3, self.version1)
+
+
+class PruneVersionsTestCase(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create()
+        self.repository.CONTENT_TYPES = [Content]
+        self.repository.save()
+
+        contents = [Content(pulp_type="core.content") for _ in range(0, 5)]
+        Content.objects.bulk_create(contents)
+        self.pks = [c.pk for c in contents]
+
+    def new_version(self, add=(), remove=()):
+        with self.repository.new_version() as version:
+            version.remove_content(Content.objects.filter(pk__in=[self.pks[i] for i in remove]))
+            version.add_content(Content.objects.filter(pk__in=[self.pks[i] for i in add]))
+        return version
+
+    def content(self, version):
+        return set(version.content.values_list('pk', flat=True))
+
+    @mock.patch.object(Repository, 'prune_versions', side_effect=Exception('failed'))
+    def test_prune_failure_is_logged(self, prune_versions):
+        with self.assertLogs('pulpcore.app.models.repository', level='ERROR'):
+            version = self.new_version(add=[0])
+        prune_versions.assert_called_once_with()
+        version.refresh_from_db()
+        self.assertTrue(version.complete)
+        self.assertEqual(self.repository.latest_version(), version)
+
+    def test_prune_versions(self):
+        self.new_version(add=[0, 1, 2])
+        self.new_version(remove=[0], add=[3])
+        self.new_version(remove=[1, 3])
+        self.new_version(add=[0, 1, 4])
+        self.new_version(remove=[4])
+        versions = list(self.repository.versions.order_by('number'))[-2:]
+        expected = [self.content(version) for version in versions]
+
+        self.assertEqual(self.repository.prune_versions(2), 4)
+
+        self.assertEqual(list(self.repository.versions.order_by('number')), versions)
+        self.assertEqual([self.content(version) for version in versions], expected)
+        self.assertEqual(set(versions[0].added().values_list('pk', flat=True)), expected[0])
+        self.assertFalse(versions[0].removed().exists())
+        self.assertEqual({count.count_type: count.count for count in versions[0].counts.all()},
+                         {'A': 4, 'P': 4})
+
+    def test_squash_versions(self):
+        version1 = self.new_version(add=[0, 1])
+        self.new_version(remove=[0])
+        self.new_version(add=[0])
+        version4 = self.new_version(add=[2])
+
+        versions = self.repository.versions.filter(number__in=[2, 3])
+        self.assertEqual(self.repository.squash_versions(versions, version4), 2)
+
+        self.assertEqual(self.content(version1), set(self.pks[:2]))
+        self.assertEqual(self.content(version4), set(self.pks[:3]))
+        self.assertEqual(set(version4.added().values_list('pk', flat=True)), {self.pks[2]})
+        self.assertFalse(version4.removed().exists())
+
+    def test_retain_repo_versions(self):
+        self.repository.retain_repo_versions = 2
+        self.repository.save()
+        self.new_version(add=[0])
+        self.new_version(add=[1])
+        version3 = self.new_version(remove=[0])
+
+        self.assertEqual(list(self.repository.versions.values_list('number', flat=True)
+                              .order_by('number')), [2, 3])
+        self.assertEqual(self.content(version3), {self.pks[1]})
+
+
 class RepositoryTestCase(TestCase):
 
     def setUp(self):
@@ -315,3 +564,79 @@ class RepositoryTestCase(TestCase):
         self.assertEqual(
             self.repository.latest_version().number, 1, self.repository.latest_version().number
         )
+
+
+class DirectoryListingTestCase(TestCase):
+
+    def test_list_directories(self):
+        directories = DirectoryListing.list_directories(['a/b/c.rpm', 'a/d.rpm', 'e.rpm'])
+        self.assertEqual(directories, {
+            '': {'a/', 'e.rpm'},
+            'a/': {'b/', 'd.rpm'},
+            'a/b/': {'c.rpm'},
+        })
+
+    def test_list_no_directories(self):
+        self.assertEqual(DirectoryListing.list_directories([]), {'': set()})
+
+    def test_computed_for_new_version(self):
+        repository = Repository.objects.create()
+        repository.CONTENT_TYPES = [Content]
+        content = Content.objects.create(pulp_type="core.content")
+        ContentArtifact.objects.create(content=content, relative_path='a/b.rpm')
+
+        with repository.new_version() as version:
+            version.add_content(Content.objects.filter(pk=content.pk))
+
+        listings = dict(version.directory_listings.values_list('path', 'entries'))
+        self.assertEqual(listings, {'': ['a/'], 'a/': ['b.rpm']})
+
+    def create_version(self, repository, add=(), remove=()):
+        contents = [Content(pulp_type="core.content") for _ in add]
+        Content.objects.bulk_create(contents)
+        ContentArtifact.objects.bulk_create([
+            ContentArtifact(content=content, relative_path=relative_path)
+            for content, relative_path in zip(contents, add)
+        ])
+        with repository.new_version() as version:
+            version.remove_content(Content.objects.filter(
+                contentartifact__relative_path__in=remove))
+            version.add_content(Content.objects.filter(pk__in=[c.pk for c in contents]))
+        return version
+
+    def test_derived_from_previous_version(self):
+        repository = Repository.objects.create()
+        repository.CONTENT_TYPES = [Content]
+        version1 = self.create_version(repository, add=['a/b.rpm', 'a/c/d.rpm', 'e.rpm', 'f/g'])
+        version2 = self.create_version(repository, add=['a/c/h.rpm', 'f/g/i.rpm', 'j.rpm'],
+                                       remove=['a/c/d.rpm', 'e.rpm', 'f/g'])
+        listings = dict(version2.directory_listings.values_list('path', 'entries'))
+        self.assertEqual(listings, {
+            '': ['a/', 'f/', 'j.rpm'],
+            'a/': ['b.rpm', 'c/'],
+            'a/c/': ['h.rpm'],
+            'f/': ['g/'],
+            'f/g/': ['i.rpm'],
+        })
+        version3 = self.create_version(repository, remove=['a/c/h.rpm'])
+        listings = dict(version3.directory_listings.values_list('path', 'entries'))
+        self.assertEqual(listings, {
+            '': ['a/', 'f/', 'j.rpm'],
+            'a/': ['b.rpm'],
+            'f/': ['g/'],
+            'f/g/': ['i.rpm'],
+        })
+        self.assertFalse(version1.directory_listings.exists())
+        self.assertFalse(version2.directory_listings.exists())
+
+    def test_distributed_previous_version_keeps_listings(self):
+        repository = Repository.objects.create()
+        repository.CONTENT_TYPES = [Content]
+        version1 = self.create_version(repository, add=['a/b.rpm', 'c.rpm'])
+        with mock.patch.object(RepositoryVersion, '_is_distributed', return_value=True):
+            version2 = self.create_version(repository, add=['a/d.rpm'])
+
+        listings = dict(version1.directory_listings.values_list('path', 'entries'))
+        self.assertEqual(listings, {'': ['a/', 'c.rpm'], 'a/': ['b.rpm']})
+        listings = dict(version2.directory_listings.values_list('path', 'entries'))
+        self.assertEqual(listings, {'': ['a/', 'c.rpm'], 'a/': ['b.rpm', 'd.rpm']})
@@ -3,8 +3,12 @@ from unittest import TestCase
 import mock
 from rest_framework import serializers
 
-from pulpcore.app.models import BaseDistribution
-from pulpcore.app.serializers import BaseDistributionSerializer, PublicationSerializer
+from pulpcore.app.models import BaseDistribution, Content
+from pulpcore.app.serializers import (
+    BaseDistributionSerializer,
+    PublicationSerializer,
+    RepositoryCopySerializer,
+)
 
 
 class TestPublicationSerializer(TestCase):
@@ -106,3 +110,32 @@ class TestDistributionPath(TestCase):
         serializer = BaseDistributionSerializer(data=data)
         self.assertFalse(serializer.is_valid())
         self.assertDictEqual(overlap_errors, serializer.errors)
+
+
+class TestRepositoryCopySerializer(TestCase):
+
+    def setUp(self):
+        repository = mock.Mock(CONTENT_TYPES=[Content])
+        repository.name = 'foo'
+        repository.cast.return_value = repository
+        self.serializer = RepositoryCopySerializer(context={'repository': repository})
+
+    def test_validate_content_filters(self):
+        content_filters = {'core.content': {'pulp_created__gte': '2020-01-01T00:00:00Z'}}
+        self.assertEqual(self.serializer.validate_content_filters(content_filters),
+                         content_filters)
+
+    def test_validate_unknown_content_type(self):
+        with self.assertRaises(serializers.ValidationError):
+            self.serializer.validate_content_filters({'foo.bar': {}})
+
+    def test_validate_unsupported_content_type(self):
+        self.serializer.context['repository'].CONTENT_TYPES = []
+        with self.assertRaises(serializers.ValidationError):
+            self.serializer.validate_content_filters({'core.content': {}})
+
+    def test_validate_lookups(self):
+        for lookup in ('foo', 'pulp_type__foo', 'pulp_created__date__gte',
+                       'contentartifact__relative_path', 'version_memberships__repository'):
+            with self.assertRaises(serializers.ValidationError):
+                self.serializer.validate_content_filters({'core.content': {lookup: 'bar'}})
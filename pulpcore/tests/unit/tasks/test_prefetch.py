@@ -0,0 +1,88 @@
+import asyncio
+from unittest import TestCase, mock
+
+from django.test import TestCase as DjangoTestCase
+from django.utils import timezone
+
+from pulpcore.app.models import BaseDistribution, ContentAccess
+from pulpcore.app.tasks.prefetch import _download, _popular_content_artifacts
+
+
+class DownloadTestCase(TestCase):
+
+    def setUp(self):
+        self.downloaded = []
+
+    def remote_artifact(self, url, size, actual_size=None):
+        remote_artifact = mock.Mock(url=url, size=size)
+        remote = mock.Mock()
+
+        async def run():
+            self.downloaded.append(url)
+            return mock.Mock(artifact_attributes={'size': actual_size or size})
+
+        remote.get_downloader.return_value.run = run
+        return remote_artifact, remote
+
+    def download(self, remote_artifacts, max_bytes):
+        with mock.patch('pulpcore.app.tasks.prefetch.save_downloaded_artifact') as save_artifact:
+            progress_report = mock.Mock()
+            asyncio.get_event_loop().run_until_complete(
+                _download(remote_artifacts, max_bytes, progress_report))
+        self.assertEqual(save_artifact.call_count, len(self.downloaded))
+        self.assertEqual(progress_report.increment.call_count, len(self.downloaded))
+
+    def test_no_budget(self):
+        self.download([self.remote_artifact('a', 10), self.remote_artifact('b', None, 10)], None)
+        self.assertEqual(self.downloaded, ['a', 'b'])
+
+    def test_budget_skips_downloads_too_large(self):
+        remote_artifacts = [
+            self.remote_artifact('a', 60),
+            self.remote_artifact('b', 50),
+            self.remote_artifact('c', 40),
+        ]
+        self.download(remote_artifacts, 100)
+        self.assertEqual(self.downloaded, ['a', 'c'])
+
+    def test_budget_counts_downloads_of_unknown_size(self):
+        remote_artifacts = [
+            self.remote_artifact('a', None, 100),
+            self.remote_artifact('b', None, 10),
+            self.remote_artifact('c', 10),
+        ]
+        self.download(remote_artifacts, 100)
+        self.assertEqual(self.downloaded, ['a'])
+
+    def test_failed_downloads_are_not_counted(self):
+        remote_artifact, remote = self.remote_artifact('a', 100)
+
+        async def run():
+            raise OSError()
+
+        remote.get_downloader.return_value.run = run
+        self.download([(remote_artifact, remote), self.remote_artifact('b', None, 100)], 100)
+        self.assertEqual(self.downloaded, ['b'])
+
+
+class PopularContentArtifactsTestCase(DjangoTestCase):
+
+    def setUp(self):
+        distribution = BaseDistribution.objects.create(name='foo', base_path='foo')
+        for path, hits in (('a', 5), ('b', 4), ('c', 3), ('d', 1)):
+            ContentAccess.objects.create(distribution=distribution, relative_path=path, hits=hits,
+                                         last_accessed=timezone.now())
+
+    def popular_content_artifacts(self, count):
+        def match_paths(distribution, relative_paths):
+            return [(path, path.upper()) for path in relative_paths if path != 'b']
+
+        with mock.patch('pulpcore.app.tasks.prefetch.ACCESS_BATCH_SIZE', 2), \
+                mock.patch('pulpcore.app.tasks.prefetch._match_paths', side_effect=match_paths):
+            return _popular_content_artifacts(count)
+
+    def test_most_requested_first(self):
+        self.assertEqual(self.popular_content_artifacts(10), ['A', 'C', 'D'])
+
+    def test_count(self):
+        self.assertEqual(self.popular_content_artifacts(2), ['A', 'C'])
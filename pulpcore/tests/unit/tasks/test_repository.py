@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from pulpcore.app.models import Content, Repository
+from pulpcore.app.tasks.repository import copy_version
+
+
+class CopyVersionTestCase(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(Repository, 'CONTENT_TYPES', [Content])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.source = Repository.objects.create(name='source')
+        self.destination = Repository.objects.create(name='destination')
+
+        contents = [Content(pulp_type="core.content") for _ in range(0, 4)]
+        Content.objects.bulk_create(contents)
+        self.pks = [c.pk for c in contents]
+
+        with self.source.new_version() as version:
+            version.add_content(Content.objects.filter(pk__in=self.pks[:3]))
+        self.source_version = version
+        with self.destination.new_version() as version:
+            version.add_content(Content.objects.filter(pk__in=self.pks[2:]))
+
+    def latest_content(self):
+        return set(self.destination.latest_version().content.values_list('pk', flat=True))
+
+    def test_copy_version(self):
+        copy_version(self.destination.pk, self.source_version.pk)
+        self.assertEqual(self.latest_content(), set(self.pks[:3]))
+
+    def test_copy_version_with_filters(self):
+        copy_version(self.destination.pk, self.source_version.pk,
+                     content_filters={'core.content': {'pk__in': self.pks[1:]}})
+        self.assertEqual(self.latest_content(), set(self.pks[1:3]))
+
+    def test_copy_version_with_unsupported_type(self):
+        with self.assertRaises(ValueError):
+            copy_version(self.destination.pk, self.source_version.pk,
+                         content_filters={'foo.bar': {}})
@@ -0,0 +1,126 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from pulpcore.plugin.models import Content, ContentArtifact, Repository
+from pulpcore.plugin.repo_version_utils import (
+    remove_duplicates,
+    validate_duplicate_content,
+    validate_version_paths,
+)
+
+
+class IncrementalValidationTestCase(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create()
+        self.repository.CONTENT_TYPES = [Content]
+        self.repository.save()
+
+        with self.repository.new_version() as version1:
+            version1.add_content(self.create_content('a/b', 'c'))
+        self.version1 = version1
+
+    def create_content(self, *relative_paths):
+        contents = [Content(pulp_type="core.content") for _ in relative_paths]
+        Content.objects.bulk_create(contents)
+        ContentArtifact.objects.bulk_create([
+            ContentArtifact(content=content, relative_path=relative_path)
+            for content, relative_path in zip(contents, relative_paths)
+        ])
+        return Content.objects.filter(pk__in=[content.pk for content in contents])
+
+    def assert_invalid_paths(self, *relative_paths):
+        with self.assertRaises(ValueError):
+            with self.repository.new_version() as version:
+                version.add_content(self.create_content(*relative_paths))
+                validate_version_paths(version, incremental=True)
+
+    def test_valid_paths(self):
+        with self.repository.new_version() as version2:
+            version2.add_content(self.create_content('a/d', 'e/f'))
+            validate_version_paths(version2, incremental=True)
+
+    def test_overlapping_paths(self):
+        self.assert_invalid_paths('a/b/c')
+        self.assert_invalid_paths('a')
+        self.assert_invalid_paths('c')
+        self.assert_invalid_paths('d', 'd')
+
+    def test_removed_paths(self):
+        with self.repository.new_version() as version2:
+            version2.remove_content(Content.objects.filter(contentartifact__relative_path='a/b'))
+            version2.add_content(self.create_content('a/b/c'))
+            validate_version_paths(version2, incremental=True)
+
+    def test_replaced_paths(self):
+        with self.repository.new_version() as version2:
+            version2.remove_content(Content.objects.all())
+            version2.add_content(self.create_content('a/b', 'c'))
+            validate_version_paths(version2, incremental=True)
+
+    def test_previous_version_without_listings(self):
+        self.version1.directory_listings.all().delete()
+        self.assert_invalid_paths('a/b/c')
+
+    @mock.patch.object(Content, 'repo_key_fields', ('pulp_type',))
+    def test_duplicate_content(self):
+        with self.repository.new_version() as version2:
+            version2.remove_content(Content.objects.all())
+            version2.add_content(self.create_content('d'))
+            validate_duplicate_content(version2, incremental=True)
+
+        with self.assertRaises(ValueError):
+            with self.repository.new_version() as version3:
+                version3.add_content(self.create_content('e'))
+                validate_duplicate_content(version3, incremental=True)
+
+
+@mock.patch.object(Content, 'repo_key_fields', ('pulp_type',))
+class RemoveDuplicatesTestCase(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create()
+        self.repository.CONTENT_TYPES = [Content]
+        self.repository.save()
+
+        contents = [Content(pulp_type="core.content") for _ in range(0, 4)]
+        Content.objects.bulk_create(contents)
+        self.pks = [c.pk for c in contents]
+
+    def test_remove_duplicates(self):
+        with self.repository.new_version() as version1:
+            version1.add_content(Content.objects.filter(pk__in=self.pks[:1]))
+            remove_duplicates(version1)
+        self.assertCountEqual(version1.content.values_list('pk', flat=True), self.pks[:1])
+
+        with self.repository.new_version() as version2:
+            version2.add_content(Content.objects.filter(pk__in=self.pks[1:2]))
+            remove_duplicates(version2)
+        self.assertCountEqual(version2.content.values_list('pk', flat=True), self.pks[1:2])
+        self.assertCountEqual(version2.removed().values_list('pk', flat=True), self.pks[:1])
+
+    def test_added_duplicates(self):
+        with self.assertRaises(ValueError):
+            with self.repository.new_version() as version1:
+                version1.add_content(Content.objects.filter(pk__in=self.pks[:2]))
+                remove_duplicates(version1)
+
+    def test_null_repo_key_fields(self):
+        Content.objects.filter(pk__in=self.pks).update(pulp_last_updated=None)
+        repo_key_fields = ('pulp_type', 'pulp_last_updated')
+        with mock.patch.object(Content, 'repo_key_fields', repo_key_fields):
+            with self.repository.new_version() as version1:
+                version1.add_content(Content.objects.filter(pk__in=self.pks[:1]))
+                remove_duplicates(version1)
+
+            with self.repository.new_version() as version2:
+                version2.add_content(Content.objects.filter(pk__in=self.pks[1:2]))
+                remove_duplicates(version2)
+                validate_duplicate_content(version2, incremental=True)
+            self.assertCountEqual(version2.content.values_list('pk', flat=True), self.pks[1:2])
+
+            with self.assertRaises(ValueError):
+                with self.repository.new_version() as version3:
+                    version3.add_content(Content.objects.filter(pk__in=self.pks[2:3]))
+                    validate_duplicate_content(version3, incremental=True)
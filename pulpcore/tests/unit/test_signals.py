@@ -0,0 +1,24 @@
+from unittest import mock
+
+from django.db.models.signals import post_delete, post_save
+from django.test import TestCase
+
+from pulpcore.app.models import BaseDistribution, Content, RepositoryContent
+
+
+class ContentAppReceiversTestCase(TestCase):
+
+    def test_receivers_are_connected_per_model(self):
+        self.assertTrue(post_save.has_listeners(BaseDistribution))
+        self.assertTrue(post_delete.has_listeners(BaseDistribution))
+        self.assertFalse(post_delete.has_listeners(RepositoryContent))
+        self.assertFalse(post_delete.has_listeners(Content))
+
+    @mock.patch('pulpcore.app.signals.notify_content_app')
+    def test_notify(self, notify_content_app):
+        distribution = BaseDistribution.objects.create(name='foo', base_path='foo')
+        notify_content_app.assert_called_once_with('distribution', distribution.pk)
+        notify_content_app.reset_mock()
+        pk = distribution.pk
+        distribution.delete()
+        notify_content_app.assert_called_once_with('distribution', pk)
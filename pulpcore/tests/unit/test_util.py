@@ -1,6 +1,14 @@
 from unittest import TestCase, mock
+import uuid
+
+from django.test import TestCase as DjangoTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
 from pulpcore.app import models, util
+from pulpcore.app.serializers import RelatedField
 
 
 class TestViewNameForModel(TestCase):
@@ -17,3 +25,99 @@ class TestViewNameForModel(TestCase):
         Given an unknown viewset (in this case a Mock()), this should raise LookupError.
         """
         self.assertRaises(LookupError, util.get_view_name_for_model, mock.Mock(), 'foo')
+
+
+class TestBatchQs(DjangoTestCase):
+
+    def setUp(self):
+        contents = [models.Content(pulp_type='core.content') for _ in range(7)]
+        models.Content.objects.bulk_create(contents)
+        self.pks = [content.pk for content in contents]
+        # Ties on the first ordering field must be broken by the primary key.
+        models.Content.objects.filter(pk__in=self.pks[:4]).update(pulp_created=timezone.now())
+        self.qs = models.Content.objects.filter(pk__in=self.pks)
+
+    def assertBatches(self, qs, batch_size=3, **kwargs):
+        batches = [list(batch) for batch in util.batch_qs(qs, batch_size=batch_size, **kwargs)]
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual([item for batch in batches for item in batch], list(qs))
+
+    def test_unordered(self):
+        batches = [list(batch) for batch in util.batch_qs(self.qs, batch_size=3)]
+        self.assertEqual([content.pk for batch in batches for content in batch], sorted(self.pks))
+
+    def test_ordered(self):
+        self.assertBatches(self.qs.order_by('pulp_created', 'pk'))
+        self.assertBatches(self.qs.order_by('-pulp_created', 'pk'))
+        self.assertBatches(self.qs.order_by('-pulp_created', '-pk'))
+
+    def test_values(self):
+        self.assertBatches(self.qs.order_by('-pulp_created', 'pk').values('pulp_type', 'pk'))
+
+    def test_ordering_completed_with_pk(self):
+        batches = [list(batch) for batch in util.batch_qs(self.qs.order_by('pulp_created'),
+                                                          batch_size=3)]
+        self.assertEqual([item for batch in batches for item in batch],
+                         list(self.qs.order_by('pulp_created', 'pk')))
+
+    def test_offset(self):
+        self.assertBatches(self.qs.order_by('-pulp_created', 'pk'), keyset=False)
+
+    def test_exact_batches(self):
+        batches = list(util.batch_qs(self.qs.filter(pk__in=self.pks[:6]), batch_size=3))
+        self.assertEqual([len(batch) for batch in batches], [3, 3])
+
+    def test_batch_iterator(self):
+        batches = list(util.batch_iterator(self.qs.order_by('pk'), batch_size=3))
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual([content.pk for batch in batches for content in batch],
+                         sorted(self.pks))
+
+
+class TestResolveHrefs(DjangoTestCase):
+
+    def setUp(self):
+        self.tasks = [models.Task.objects.create(state='completed') for _ in range(3)]
+        self.hrefs = [
+            reverse('tasks-detail', kwargs={'pk': task.pk}) for task in self.tasks
+        ]
+
+    def test_pks(self):
+        hrefs = list(reversed(self.hrefs))
+        with self.assertNumQueries(1):
+            pks = util.resolve_hrefs(hrefs, models.Task)
+        self.assertEqual(pks, [task.pk for task in reversed(self.tasks)])
+
+    def test_objects(self):
+        tasks = util.resolve_hrefs(self.hrefs, models.Task, objects=True)
+        self.assertEqual(tasks, self.tasks)
+
+    def test_queryset(self):
+        queryset = models.Task.objects.exclude(pk=self.tasks[0].pk)
+        with self.assertRaises(ValidationError) as cm:
+            util.resolve_hrefs(self.hrefs, queryset)
+        self.assertEqual(len(cm.exception.detail), 1)
+        self.assertIn(self.hrefs[0], cm.exception.detail[0])
+
+    def test_errors_are_reported_together(self):
+        missing = reverse('tasks-detail', kwargs={'pk': uuid.uuid4()})
+        hrefs = self.hrefs + [missing, '/foo/', reverse('workers-list')]
+        with self.assertRaises(ValidationError) as cm:
+            util.resolve_hrefs(hrefs, models.Task)
+        self.assertEqual(len(cm.exception.detail), 3)
+
+    def test_view_name(self):
+        with self.assertRaises(ValidationError) as cm:
+            util.resolve_hrefs(self.hrefs, models.Task, view_name='workers-detail')
+        self.assertEqual(len(cm.exception.detail), len(self.hrefs))
+
+    def test_related_field(self):
+        field = RelatedField(many=True, view_name='tasks-detail',
+                             queryset=models.Task.objects.all())
+        with self.assertNumQueries(1):
+            self.assertEqual(field.to_internal_value(self.hrefs), self.tasks)
+
+        field = RelatedField(many=True, view_name='workers-detail',
+                             queryset=models.Task.objects.all())
+        with self.assertRaises(serializers.ValidationError):
+            field.to_internal_value(self.hrefs)